@@ -0,0 +1,643 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, QThread, QTime, QTimer, QRect, pyqtSignal
+
+from Buffer import Buffer, SemaphoreBuffer
+from CameraView import CameraView
+from CaptureThread import CaptureThread
+from FramePacer import FramePacer, JitterHistogram
+from FanOutBuffer import FanOutBuffer
+from FrameRecorder import FrameRecorder
+from KeyframeIndex import KeyframeIndex
+from MemoryBudget import MemoryBudget
+from FrameSource import SyntheticFrameSource
+from ProcessingThread import ProcessingThread
+from SharedImageBuffer import SharedImageBuffer
+from StatisticsPublisher import StatisticsPublisher
+from Structures import ThreadStatisticsData, Frame, ImageProcessingFlags, ImageProcessingSettings
+from Config import KEYFRAME_INDEX_CACHE_SUFFIX, STATISTICS_PUBLISH_INTERVAL, DEFAULT_IMAGE_BUFFER_SIZE, \
+    SYNTHETIC_SOURCE_WIDTH, SYNTHETIC_SOURCE_HEIGHT, SYNTHETIC_SOURCE_FPS, SYNTHETIC_SOURCE_CHANNELS, \
+    RECORDING_SUFFIX, DEFAULT_CANNY_THRESHOLD_1, DEFAULT_CANNY_THRESHOLD_2, DEFAULT_CANNY_APERTURE_SIZE, \
+    DEFAULT_CANNY_L2GRADIENT
+
+
+def benchmarkBuffer(bufferClass, nItems, bufferSize, dropIfFull):
+    imageBuffer = bufferClass(bufferSize)
+    item = object()
+
+    def producer():
+        for _ in range(nItems):
+            imageBuffer.add(item, dropIfFull)
+
+    # Single-threaded: add followed by get (uncontended lock cost)
+    t = time.perf_counter()
+    for _ in range(nItems):
+        imageBuffer.add(item, dropIfFull)
+        imageBuffer.get()
+    uncontended = 2 * nItems / (time.perf_counter() - t)
+
+    # Producer/consumer: one producer thread, consumer in this thread (blocking backpressure)
+    imageBuffer = bufferClass(bufferSize)
+    thread = threading.Thread(target=producer)
+    t = time.perf_counter()
+    thread.start()
+    for _ in range(nItems):
+        imageBuffer.get()
+    thread.join()
+    contended = 2 * nItems / (time.perf_counter() - t)
+
+    return uncontended, contended
+
+
+def benchmarkBufferBatch(nItems, bufferSize, batchSize):
+    # Producer/consumer with consumer taking up to batchSize items per lock acquisition (getMany)
+    imageBuffer = Buffer(bufferSize)
+    item = object()
+
+    def producer():
+        for _ in range(nItems):
+            imageBuffer.add(item, False)
+
+    thread = threading.Thread(target=producer)
+    t = time.perf_counter()
+    thread.start()
+    nTaken = 0
+    while nTaken < nItems:
+        nTaken += len(imageBuffer.getMany(batchSize))
+    thread.join()
+    return 2 * nItems / (time.perf_counter() - t)
+
+
+def runBufferBenchmark(args):
+    print("%-16s %16s %16s" % ("class", "add+get ops/s", "prod/cons ops/s"))
+    for bufferClass in (SemaphoreBuffer, Buffer):
+        uncontended, contended = benchmarkBuffer(bufferClass, args.n, args.size, False)
+        print("%-16s %16.0f %16.0f" % (bufferClass.__name__, uncontended, contended))
+    if args.batch > 0:
+        print("%-16s %16s %16.0f" % ("Buffer.getMany", "", benchmarkBufferBatch(args.n, args.size, args.batch)))
+
+
+def checkMemoryCeiling(nFrames, nFramesFit):
+    # Adds frames 0..nFrames-1 (1 KiB each) with drop policy to buffers whose memory budget fits nFramesFit frames:
+    # returns the frames left for the consumer of a Buffer and for each of two consumers of a FanOutBuffer
+    survivors = {}
+    imageBuffer = Buffer(2 * nFrames)
+    fanOutBuffer = FanOutBuffer(2 * nFrames)
+    fanOutConsumers = [fanOutBuffer.registerConsumer(name) for name in ('processing', 'recording')]
+    for name, buffer in (('Buffer', imageBuffer), ('FanOutBuffer', fanOutBuffer)):
+        buffer.setMemoryBudget(MemoryBudget(nFramesFit * 1024))
+        for i in range(nFrames):
+            buffer.add(np.full(1024, i, np.uint8), True)
+    survivors['Buffer'] = [int(frame[0]) for frame in imageBuffer.drain()]
+    for consumer in fanOutConsumers:
+        survivors['FanOutBuffer (%s)' % consumer.name] = [int(frame[0]) for frame in consumer.drain()]
+    return survivors
+
+
+def runMemoryCeilingCheck(args):
+    # Drop policy at the memory ceiling: oldest frames are dropped, the newest nFramesFit frames survive
+    expected = list(range(args.n - args.fit, args.n))
+    ok = True
+    for name, frames in checkMemoryCeiling(args.n, args.fit).items():
+        print("%-26s frames left %s (expected %s): %s" % (name, frames, expected,
+                                                          "OK" if frames == expected else "FAILED"))
+        ok = ok and frames == expected
+    if not ok:
+        sys.exit(1)
+
+
+def benchmarkTeardown(nStreams, deviceUrl):
+    # Every stream has a capture thread blocked on its full buffer (no consumer) and a processing thread blocked on
+    # the empty buffer of a dead camera (no producer): returns the time needed to stop all of them
+    # (one SharedImageBuffer per stream: all streams read the same file)
+    imageBuffers = []
+    threads = []
+    for i in range(nStreams):
+        sharedImageBuffer = SharedImageBuffer()
+        sharedImageBuffer.add(deviceUrl, Buffer(2))
+        sharedImageBuffer.add('dead', Buffer(2))
+        captureThread = CaptureThread(sharedImageBuffer, deviceUrl, False, cv2.CAP_ANY, -1, -1)
+        if not captureThread.connectToCamera():
+            raise RuntimeError("Could not open %s" % deviceUrl)
+        imageBuffers.append(sharedImageBuffer.getByDeviceUrl(deviceUrl))
+        threads += [captureThread, ProcessingThread(sharedImageBuffer, 'dead', i)]
+    for thread in threads:
+        thread.start()
+    # Wait until all capture threads are blocked on their full buffer
+    while not all(imageBuffer.isFull() for imageBuffer in imageBuffers):
+        time.sleep(0.01)
+    time.sleep(0.1)
+    t = time.perf_counter()
+    for thread in threads:
+        thread.stop()
+    for thread in threads:
+        thread.wait()
+    teardownTime = time.perf_counter() - t
+    for thread in threads[::2]:
+        thread.disconnectCamera()
+    return teardownTime
+
+
+def runTeardownBenchmark(args):
+    # Synthetic video file used as camera
+    filename = os.path.join(tempfile.mkdtemp(), 'teardown.avi')
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*'MJPG'), 1000, (64, 48))
+    for i in range(16):
+        writer.write(np.full((48, 64, 3), i * 16, np.uint8))
+    writer.release()
+    teardownTime = benchmarkTeardown(args.n, filename)
+    os.remove(filename)
+    if os.path.exists(filename + KEYFRAME_INDEX_CACHE_SUFFIX):
+        os.remove(filename + KEYFRAME_INDEX_CACHE_SUFFIX)
+    os.rmdir(os.path.dirname(filename))
+    print("Stopped %d streams (%d threads) in %.3f s: %s" % (args.n, 2 * args.n, teardownTime,
+                                                            "OK" if teardownTime < args.limit else "TOO SLOW"))
+    if teardownTime >= args.limit:
+        sys.exit(1)
+
+
+def benchmarkPacing(pacer, nFrames, fps, workTime):
+    # Frame times relative to the ideal schedule (first frame + n / fps) of a capture loop doing workTime ms of work per
+    # frame (uniformly distributed); pacer(n) waits for frame n. Returns jitter histogram and final drift (ms).
+    histogram = JitterHistogram()
+    rng = np.random.default_rng(0)
+    start = None
+    for n in range(nFrames):
+        time.sleep(rng.uniform(0, workTime) / 1000)
+        pacer(n)
+        now = time.perf_counter_ns()
+        # Schedule starts with the first frame
+        if start is None:
+            start = now
+        histogram.add(now - (start + int(n * 1e9 / fps)))
+    drift = (now - start - (nFrames - 1) * 1e9 / fps) / 1e6
+    return histogram, drift
+
+
+def runPacingBenchmark(args):
+    # Legacy pacing: sleep for the integer frame interval (ms) minus the time elapsed since the previous frame
+    t = QTime()
+    defaultTime = int(1000 / args.fps)
+
+    def legacyPacer(n):
+        if n > 0:
+            delta = defaultTime - t.elapsed()
+            if delta > 0:
+                QThread.msleep(delta)
+        t.start()
+
+    framePacer = FramePacer(int(1e9 / args.fps))
+    for name, pacer in (("QTime/msleep", legacyPacer), ("FramePacer", lambda n: framePacer.wait())):
+        histogram, drift = benchmarkPacing(pacer, args.n, args.fps, args.work)
+        statsData = histogram.getStatisticsData()
+        print("%s: jitter mean/max %.2f/%.2f ms, drift after %d frames %.1f ms"
+              % (name, statsData.jitterMean, statsData.jitterMax, args.n, drift))
+        print(histogram.format())
+
+
+class StatisticsEmitter(QThread):
+    # Stands in for the capture and processing threads of a stream: updates their statistics at fps and publishes
+    # them every interval ms (0: every frame)
+    updateCaptureStatistics = pyqtSignal(ThreadStatisticsData)
+    updateProcessingStatistics = pyqtSignal(ThreadStatisticsData)
+
+    def __init__(self, fps, duration, interval, parent=None):
+        super(StatisticsEmitter, self).__init__(parent)
+        self.fps = fps
+        self.duration = duration
+        self.interval = interval
+
+    def run(self):
+        publishers = [StatisticsPublisher(self.updateCaptureStatistics, self.interval),
+                      StatisticsPublisher(self.updateProcessingStatistics, self.interval)]
+        statsData = ThreadStatisticsData()
+        framePacer = FramePacer(int(1e9 / self.fps))
+        for n in range(int(self.duration * self.fps)):
+            framePacer.wait()
+            statsData.nFramesProcessed += 1
+            statsData.averageFPS = self.fps
+            for publisher in publishers:
+                publisher.update(statsData)
+
+
+def benchmarkStatistics(app, nStreams, fps, duration, interval):
+    # CPU time (s) the GUI thread spends receiving the statistics of nStreams streams and updating their CameraViews
+    # (signals are queued: emitted by the stream threads), and number of signals it received
+    views = []
+    emitters = []
+    for i in range(nStreams):
+        deviceUrl = 'stream%d' % i
+        sharedImageBuffer = SharedImageBuffer()
+        sharedImageBuffer.add(deviceUrl, Buffer(2))
+        view = CameraView(None, deviceUrl, sharedImageBuffer, i)
+        # Threads are not started: only used by the statistics slots
+        view.captureThread = CaptureThread(sharedImageBuffer, deviceUrl, True, cv2.CAP_ANY, -1, -1)
+        view.processingThread = ProcessingThread(sharedImageBuffer, deviceUrl, i)
+        emitter = StatisticsEmitter(fps, duration, interval)
+        emitter.updateCaptureStatistics.connect(view.updateCaptureThreadStats)
+        emitter.updateProcessingStatistics.connect(view.updateProcessingThreadStats)
+        views.append(view)
+        emitters.append(emitter)
+    nSignals = [0]
+
+    def countSignal(statsData):
+        nSignals[0] += 1
+
+    for emitter in emitters:
+        emitter.updateCaptureStatistics.connect(countSignal)
+        emitter.updateProcessingStatistics.connect(countSignal)
+    # Run GUI event loop until all emitters finished and their signals were delivered
+    cpuTime = time.thread_time()
+    for emitter in emitters:
+        emitter.start()
+    timer = QTimer()
+    timer.timeout.connect(lambda: all(emitter.isFinished() for emitter in emitters) and app.quit())
+    timer.start(50)
+    app.exec_()
+    app.processEvents()
+    cpuTime = time.thread_time() - cpuTime
+    for emitter in emitters:
+        emitter.wait()
+    for view in views:
+        view.deleteLater()
+    return cpuTime, nSignals[0]
+
+
+def runStatisticsBenchmark(args):
+    # CameraViews are not shown
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    print("%d streams at %g fps for %g s:" % (args.n, args.fps, args.duration))
+    print("%-22s %10s %16s %14s" % ("mode", "signals", "GUI thread CPU", "GUI thread load"))
+    for name, interval in (("per frame", 0), ("coalesced (%d ms)" % args.interval, args.interval)):
+        cpuTime, nSignals = benchmarkStatistics(app, args.n, args.fps, args.duration, interval)
+        print("%-22s %10d %14.3f s %13.1f%%" % (name, nSignals, cpuTime, 100 * cpuTime / args.duration))
+
+
+def checkFrameSets(nStreams, duration):
+    # Connects nStreams synthetic streams synchronized by timestamp one after the other (like MainWindow does, without
+    # the dialogs), runs them for duration s: returns number of frame set tabs, registered consumers per stream
+    # (processing thread + frame set thread) and frame sets matched
+    from MainWindow import MainWindow
+    from FrameSetView import FrameSetView
+    mainWindow = MainWindow()
+    mainWindow.actionSynchronizeStreams.setChecked(True)
+    mainWindow.actionTimestampSynchronization.setChecked(True)
+    mainWindow.sharedImageBuffer.setSyncEnabled(True)
+    for i in range(nStreams):
+        deviceUrl = 'synthetic://%d?width=160&height=120' % i
+        mainWindow.sharedImageBuffer.add(deviceUrl, FanOutBuffer(DEFAULT_IMAGE_BUFFER_SIZE), True)
+        cameraView = CameraView(mainWindow.tabWidget, deviceUrl, mainWindow.sharedImageBuffer, i)
+        if not cameraView.connectToCamera(True, cv2.CAP_ANY, QThread.NormalPriority, QThread.NormalPriority, True,
+                                          -1, -1):
+            raise RuntimeError("Could not open %s" % deviceUrl)
+        if i == 0:
+            mainWindow.tabWidget.removeTab(0)
+        mainWindow.tabWidget.addTab(cameraView, deviceUrl)
+        mainWindow.cameraViewDict[deviceUrl] = cameraView
+        mainWindow.deviceUrlDict[deviceUrl] = i
+        mainWindow.updateFrameSetView()
+    time.sleep(duration)
+    nFrameSetTabs = sum(isinstance(mainWindow.tabWidget.widget(i), FrameSetView)
+                        for i in range(mainWindow.tabWidget.count()))
+    nConsumers = [len(mainWindow.sharedImageBuffer.getByDeviceUrl(deviceUrl).consumers)
+                  for deviceUrl in mainWindow.cameraViewDict]
+    nFrameSets = mainWindow.frameSetView.frameSetThread.frameSetConsumer.getStatistics().nFrameSetsMatched
+    while mainWindow.cameraViewDict:
+        mainWindow.disconnectCamera(0)
+    return nFrameSetTabs, nConsumers, nFrameSets
+
+
+def runFrameSetsCheck(args):
+    # Views are not shown
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    nFrameSetTabs, nConsumers, nFrameSets = checkFrameSets(args.n, args.duration)
+    ok = nFrameSetTabs == 1 and nConsumers == [2] * args.n and nFrameSets > 0
+    print("%d synchronized streams: %d frame set tab(s), consumers per stream %s, %d frame sets matched: %s"
+          % (args.n, nFrameSetTabs, nConsumers, nFrameSets, "OK" if ok else "FAILED"))
+    if not ok:
+        sys.exit(1)
+
+
+def benchmarkStreams(nStreams, width, height, fps, channels, duration):
+    # Runs nStreams synthetic streams (capture + processing thread each, no GUI) for duration s: returns frames
+    # captured, frames processed, frames lost (dropped by full image buffers) and CPU load (CPU time of the whole
+    # process per wall time until all threads stopped)
+    streams = []
+    for i in range(nStreams):
+        deviceUrl = 'synthetic://%d?width=%d&height=%d&fps=%g&channels=%d' % (i, width, height, fps, channels)
+        sharedImageBuffer = SharedImageBuffer()
+        sharedImageBuffer.add(deviceUrl, Buffer(DEFAULT_IMAGE_BUFFER_SIZE))
+        captureThread = CaptureThread(sharedImageBuffer, deviceUrl, True, cv2.CAP_ANY, -1, -1)
+        if not captureThread.connectToCamera():
+            raise RuntimeError("Could not open %s" % deviceUrl)
+        processingThread = ProcessingThread(sharedImageBuffer, deviceUrl, i, captureThread.framePool)
+        processingThread.setROI(QRect(0, 0, width, height))
+        streams.append((captureThread, processingThread))
+    cpuTime = time.process_time()
+    wallTime = time.perf_counter()
+    for captureThread, processingThread in streams:
+        processingThread.start()
+        captureThread.start()
+    time.sleep(duration)
+    for captureThread, processingThread in streams:
+        captureThread.stop()
+        processingThread.stop()
+    for captureThread, processingThread in streams:
+        captureThread.wait()
+        processingThread.wait()
+    cpuLoad = (time.process_time() - cpuTime) / (time.perf_counter() - wallTime)
+    for captureThread, processingThread in streams:
+        captureThread.disconnectCamera()
+    return (sum(captureThread.statsData.nFramesProcessed for captureThread, _ in streams),
+            sum(processingThread.statsData.nFramesProcessed for _, processingThread in streams),
+            sum(processingThread.statsData.nFramesLost for _, processingThread in streams), cpuLoad)
+
+
+def runStreamsBenchmark(args):
+    print("Synthetic streams %dx%dx%d at %g fps, %g s per run:" % (args.width, args.height, args.channels, args.fps,
+                                                                  args.duration))
+    print("%8s %10s %10s %10s %12s %10s" % ("streams", "captured", "processed", "lost", "fps/stream", "CPU"))
+    for nStreams in args.n:
+        nCaptured, nProcessed, nLost, cpuLoad = benchmarkStreams(nStreams, args.width, args.height, args.fps,
+                                                                 args.channels, args.duration)
+        print("%8d %10d %10d %10d %12.1f %9.0f%%" % (nStreams, nCaptured, nProcessed, nLost,
+                                                    nProcessed / nStreams / args.duration,
+                                                    100 * cpuLoad))
+
+
+def benchmarkReplay(deviceUrl, nFrames):
+    # Unpaced capture of nFrames from deviceUrl with a consumer that copies every frame (like the ROI copy of the
+    # processing thread): returns wall time (s) and CPU time (s) of the whole process
+    sharedImageBuffer = SharedImageBuffer()
+    sharedImageBuffer.add(deviceUrl, Buffer(DEFAULT_IMAGE_BUFFER_SIZE))
+    captureThread = CaptureThread(sharedImageBuffer, deviceUrl, False, cv2.CAP_ANY, -1, -1, unpaced=True)
+    if not captureThread.connectToCamera():
+        raise RuntimeError("Could not open %s" % deviceUrl)
+    imageBuffer = sharedImageBuffer.getByDeviceUrl(deviceUrl)
+    copiedFrame = np.empty((int(captureThread.getInputSourceHeight()), int(captureThread.getInputSourceWidth()),
+                            captureThread.getInputSourceChannels()), np.uint8)
+
+    def consumer():
+        for i in range(nFrames):
+            frame = imageBuffer.get()
+            np.copyto(copiedFrame, frame.data)
+            captureThread.framePool.release(frame)
+
+    consumerThread = threading.Thread(target=consumer)
+    cpuTime = time.process_time()
+    wallTime = time.perf_counter()
+    consumerThread.start()
+    captureThread.start()
+    consumerThread.join()
+    wallTime = time.perf_counter() - wallTime
+    cpuTime = time.process_time() - cpuTime
+    captureThread.stop()
+    captureThread.wait()
+    captureThread.disconnectCamera()
+    return wallTime, cpuTime
+
+
+def runReplayBenchmark(args):
+    # Same synthetic frames as compressed video file and as raw recording
+    directory = tempfile.mkdtemp()
+    videoFilename = os.path.join(directory, 'replay.mp4')
+    recordingFilename = os.path.join(directory, 'replay' + RECORDING_SUFFIX)
+    source = SyntheticFrameSource()
+    source.open('synthetic://0?width=%d&height=%d&fps=%g' % (args.width, args.height, args.fps))
+    writer = cv2.VideoWriter(videoFilename, cv2.VideoWriter_fourcc(*args.fourcc), args.fps, (args.width, args.height))
+    recorder = FrameRecorder(recordingFilename, (args.height, args.width, 3))
+    for i in range(args.n):
+        _, data = source.read()
+        writer.write(data)
+        recorder.write(Frame(data, i + 1, int(i * 1e9 / args.fps)))
+    writer.release()
+    recorder.close()
+    print("%d frames %dx%d at %g fps (%g s):" % (args.n, args.width, args.height, args.fps, args.n / args.fps))
+    print("%-22s %10s %12s %14s" % ("source", "fps", "realtime", "CPU/frame"))
+    for name, deviceUrl in (("video (%s)" % args.fourcc, videoFilename), ("raw recording", recordingFilename)):
+        wallTime, cpuTime = benchmarkReplay(deviceUrl, args.n)
+        print("%-22s %10.0f %11.1fx %11.3f ms" % (name, args.n / wallTime, args.n / args.fps / wallTime,
+                                                  1000 * cpuTime / args.n))
+    for filename in os.listdir(directory):
+        os.remove(os.path.join(directory, filename))
+    os.rmdir(directory)
+
+
+def checkKeyframes(filename):
+    # Keyframes of an MPEG-4 part 2 file: I-VOPs found in the raw packets (VOP start code 00 00 01 B6, coding type in
+    # the 2 bits that follow: 0 -> I) and keyframes flagged by the backend (used by KeyframeIndex)
+    cap = cv2.VideoCapture(filename, cv2.CAP_FFMPEG)
+    if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        raise RuntimeError("Could not read raw packets of %s" % filename)
+    intraFrames = []
+    flaggedFrames = []
+    frameNumber = 0
+    while cap.grab():
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            flaggedFrames.append(frameNumber)
+        _, packet = cap.retrieve()
+        packet = packet.tobytes()
+        i = packet.find(b'\x00\x00\x01\xb6')
+        if 0 <= i < len(packet) - 4 and packet[i + 4] >> 6 == 0:
+            intraFrames.append(frameNumber)
+        frameNumber += 1
+    cap.release()
+    return frameNumber, intraFrames, flaggedFrames
+
+
+def runKeyframesCheck(args):
+    # Synthetic frames encoded with mp4v (encoder GOP: 12 frames)
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'keyframes.mp4')
+    source = SyntheticFrameSource()
+    source.open('synthetic://0?width=%d&height=%d' % (args.width, args.height))
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*'mp4v'), 30, (args.width, args.height))
+    for i in range(args.n):
+        writer.write(source.read()[1])
+    writer.release()
+    nFrames, intraFrames, flaggedFrames = checkKeyframes(filename)
+    # Index built in the background, cache cannot be written (directory in its place): no temporary file is left
+    os.mkdir(filename + KEYFRAME_INDEX_CACHE_SUFFIX)
+    keyframeIndex = KeyframeIndex(filename)
+    keyframeIndex.start()
+    keyframeIndex.wait()
+    os.rmdir(filename + KEYFRAME_INDEX_CACHE_SUFFIX)
+    leftFiles = os.listdir(directory)
+    ok = (intraFrames == flaggedFrames == keyframeIndex.keyframeNumbers and keyframeIndex.isComplete()
+          and leftFiles == ['keyframes.mp4'])
+    print("%d frames: %d I-frames %s..., %d flagged keyframes %s..., %d indexed, files left %s: %s"
+          % (nFrames, len(intraFrames), intraFrames[:4], len(flaggedFrames), flaggedFrames[:4],
+             len(keyframeIndex.keyframeNumbers), leftFiles, "OK" if ok else "FAILED"))
+    for filename in leftFiles:
+        os.remove(os.path.join(directory, filename))
+    os.rmdir(directory)
+    if not ok:
+        sys.exit(1)
+
+
+def benchmarkWorkers(frames, nWorkers, ksize, duration):
+    # Processing thread (median blur + Canny) fed with frames as fast as it takes them for duration s, frames processed
+    # by nWorkers pool workers (0: in the processing thread): returns frames delivered, whether they were delivered in
+    # order and the largest number of results held back waiting for an earlier frame
+    deviceUrl = 'benchmark'
+    height, width = frames[0].shape[:2]
+    sharedImageBuffer = SharedImageBuffer()
+    sharedImageBuffer.add(deviceUrl, Buffer(DEFAULT_IMAGE_BUFFER_SIZE))
+    imageBuffer = sharedImageBuffer.getByDeviceUrl(deviceUrl)
+    processingThread = ProcessingThread(sharedImageBuffer, deviceUrl, 0, nWorkers=nWorkers)
+    processingThread.setROI(QRect(0, 0, width, height))
+    imgProcFlags = ImageProcessingFlags()
+    imgProcFlags.smoothOn = True
+    imgProcFlags.cannyOn = True
+    imgProcSettings = ImageProcessingSettings()
+    imgProcSettings.smoothType = 2
+    imgProcSettings.smoothParam1 = ksize
+    imgProcSettings.cannyThreshold1 = DEFAULT_CANNY_THRESHOLD_1
+    imgProcSettings.cannyThreshold2 = DEFAULT_CANNY_THRESHOLD_2
+    imgProcSettings.cannyApertureSize = DEFAULT_CANNY_APERTURE_SIZE
+    imgProcSettings.cannyL2gradient = DEFAULT_CANNY_L2GRADIENT
+    processingThread.updateImageProcessingSettings(imgProcSettings)
+    processingThread.updateImageProcessingFlags(imgProcFlags)
+    delivered = []
+    # Called in the thread emitting the frame (no event loop needed)
+    processingThread.newFrame.connect(lambda frame, frameInfo: delivered.append(frameInfo.sequence),
+                                      Qt.DirectConnection)
+    stopped = threading.Event()
+
+    def producer():
+        sequence = 0
+        while not stopped.is_set():
+            sequence += 1
+            imageBuffer.add(Frame(frames[sequence % len(frames)], sequence, time.perf_counter_ns()), timeout=100)
+
+    producerThread = threading.Thread(target=producer)
+    processingThread.start()
+    producerThread.start()
+    time.sleep(duration)
+    nDelivered = len(delivered)
+    stopped.set()
+    producerThread.join()
+    processingThread.stop()
+    processingThread.wait()
+    maxReordered = processingThread.processingPool.maxReordered if processingThread.processingPool is not None else 0
+    return nDelivered, delivered == sorted(delivered), maxReordered
+
+
+def runWorkersBenchmark(args):
+    # Same synthetic frames for every run
+    source = SyntheticFrameSource()
+    source.open('synthetic://0?width=%d&height=%d' % (args.width, args.height))
+    frames = [source.read()[1].copy() for i in range(8)]
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+    print("Median blur (%d) + Canny on %dx%d frames, %g s per run, %d CPUs, OpenCV threads: %d:"
+          % (args.ksize, args.width, args.height, args.duration, os.cpu_count(), cv2.getNumThreads()))
+    print("%8s %10s %10s %10s %10s %10s" % ("workers", "frames", "fps", "speedup", "in order", "reordered"))
+    baseline = None
+    for nWorkers in args.n:
+        nDelivered, inOrder, maxReordered = benchmarkWorkers(frames, nWorkers, args.ksize, args.duration)
+        fps = nDelivered / args.duration
+        if baseline is None:
+            baseline = fps
+        print("%8s %10d %10.1f %9.2fx %10s %10d" % (nWorkers if nWorkers > 0 else "thread", nDelivered, fps,
+                                                   fps / baseline if baseline > 0 else 0, "yes" if inOrder else "NO",
+                                                   maxReordered))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pyqt5-cv2-multithreaded microbenchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+    # Buffer
+    bufferParser = subparsers.add_parser('buffer', help="Buffer add/get throughput")
+    bufferParser.add_argument('-n', type=int, default=100000, help="number of items")
+    bufferParser.add_argument('--size', type=int, default=2, help="buffer size")
+    bufferParser.add_argument('--batch', type=int, default=0, help="also measure getMany() with this batch size")
+    bufferParser.set_defaults(func=runBufferBenchmark)
+    # Memory ceiling
+    ceilingParser = subparsers.add_parser('ceiling', help="frames surviving the memory ceiling with drop policy")
+    ceilingParser.add_argument('-n', type=int, default=6, help="number of frames added")
+    ceilingParser.add_argument('--fit', type=int, default=3, help="number of frames fitting the memory budget")
+    ceilingParser.set_defaults(func=runMemoryCeilingCheck)
+    # Teardown
+    teardownParser = subparsers.add_parser('teardown', help="time to stop streams whose threads are blocked")
+    teardownParser.add_argument('-n', type=int, default=50, help="number of streams")
+    teardownParser.add_argument('--limit', type=float, default=1.0, help="maximum teardown time (s)")
+    teardownParser.set_defaults(func=runTeardownBenchmark)
+
+    # Pacing
+    pacingParser = subparsers.add_parser('pacing', help="capture pacing jitter and drift against the ideal schedule")
+    pacingParser.add_argument('-n', type=int, default=300, help="number of frames")
+    pacingParser.add_argument('--fps', type=float, default=30, help="source frame rate")
+    pacingParser.add_argument('--work', type=float, default=10, help="maximum work per frame (ms)")
+    pacingParser.set_defaults(func=runPacingBenchmark)
+    # Statistics
+    statisticsParser = subparsers.add_parser('stats', help="GUI thread time spent on per-frame vs coalesced "
+                                                           "statistics updates")
+    statisticsParser.add_argument('-n', type=int, default=16, help="number of streams")
+    statisticsParser.add_argument('--fps', type=float, default=30, help="stream frame rate")
+    statisticsParser.add_argument('--duration', type=float, default=5, help="duration (s)")
+    statisticsParser.add_argument('--interval', type=float, default=STATISTICS_PUBLISH_INTERVAL,
+                                  help="statistics publish interval (ms)")
+    statisticsParser.set_defaults(func=runStatisticsBenchmark)
+    # Frame sets
+    frameSetsParser = subparsers.add_parser('framesets', help="frame set view of streams synchronized by timestamp "
+                                                              "(one view, one frame set consumer per stream)")
+    frameSetsParser.add_argument('-n', type=int, default=3, help="number of streams")
+    frameSetsParser.add_argument('--duration', type=float, default=1, help="duration (s)")
+    frameSetsParser.set_defaults(func=runFrameSetsCheck)
+    # Streams
+    streamsParser = subparsers.add_parser('streams', help="throughput of 1 to 64 synthetic streams (no GUI)")
+    streamsParser.add_argument('-n', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64],
+                               help="numbers of streams")
+    streamsParser.add_argument('--width', type=int, default=SYNTHETIC_SOURCE_WIDTH, help="frame width")
+    streamsParser.add_argument('--height', type=int, default=SYNTHETIC_SOURCE_HEIGHT, help="frame height")
+    streamsParser.add_argument('--fps', type=float, default=SYNTHETIC_SOURCE_FPS, help="stream frame rate")
+    streamsParser.add_argument('--channels', type=int, default=SYNTHETIC_SOURCE_CHANNELS, choices=[1, 3],
+                               help="frame channels")
+    streamsParser.add_argument('--duration', type=float, default=3, help="duration (s) per number of streams")
+    streamsParser.set_defaults(func=runStreamsBenchmark)
+    # Replay
+    replayParser = subparsers.add_parser('replay', help="unpaced replay of a video file vs a raw recording")
+    replayParser.add_argument('-n', type=int, default=600, help="number of frames")
+    replayParser.add_argument('--width', type=int, default=1280, help="frame width")
+    replayParser.add_argument('--height', type=int, default=720, help="frame height")
+    replayParser.add_argument('--fps', type=float, default=30, help="frame rate")
+    replayParser.add_argument('--fourcc', default='mp4v', help="video codec")
+    replayParser.set_defaults(func=runReplayBenchmark)
+    # Keyframes
+    keyframesParser = subparsers.add_parser('keyframes', help="keyframe flag of the backend vs I-frames of a file with "
+                                                              "a known GOP (keyframe index)")
+    keyframesParser.add_argument('-n', type=int, default=300, help="number of frames")
+    keyframesParser.add_argument('--width', type=int, default=320, help="frame width")
+    keyframesParser.add_argument('--height', type=int, default=240, help="frame height")
+    keyframesParser.set_defaults(func=runKeyframesCheck)
+    # Workers
+    workersParser = subparsers.add_parser('workers', help="processing throughput of one stream vs pool worker count")
+    workersParser.add_argument('-n', type=int, nargs='+', default=[0, 1, 2, 4, 8],
+                               help="numbers of pool workers (0: processing thread only)")
+    workersParser.add_argument('--width', type=int, default=3840, help="frame width")
+    workersParser.add_argument('--height', type=int, default=2160, help="frame height")
+    workersParser.add_argument('--ksize', type=int, default=5, help="median blur aperture size")
+    workersParser.add_argument('--cv-threads', type=int, default=1,
+                               help="OpenCV threads per call (1: parallelism comes from the pool only)")
+    workersParser.add_argument('--duration', type=float, default=5, help="duration (s) per worker count")
+    workersParser.set_defaults(func=runWorkersBenchmark)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,336 @@
-from PyQt5.QtCore import QSemaphore, QMutex
+from PyQt5.QtCore import QSemaphore, QMutex, QMutexLocker, QWaitCondition
 from queue import Queue
+import time
+
+from BufferStatistics import BufferStatistics
+from CancellationToken import deadlineFromTimeout, waitUntil
+from MemoryBudget import frameBytes
 
 
 class Buffer(object):
+    def __init__(self, size):
+        # Save buffer size
+        self.bufferSize = size
+        # Preallocate slots (ring buffer) and their enqueue times
+        self.slots = [None] * self.bufferSize
+        self.stamps = [0] * self.bufferSize
+        # Capture timestamps (perf_counter_ns) of items (used to match frames of different streams)
+        self.timestamps = [0] * self.bufferSize
+        # Index of oldest item and number of items in buffer
+        self.head = 0
+        self.count = 0
+        # Create mutex (the only lock taken per add/get)
+        self.mutex = QMutex()
+        # Create wait conditions
+        self.notEmpty = QWaitCondition()
+        self.notFull = QWaitCondition()
+        # Drop/blocking counters and queue wait samples
+        self.statistics = BufferStatistics()
+        # Process-wide memory budget (set by SharedImageBuffer)
+        self.memoryBudget = None
+
+    def setMemoryBudget(self, memoryBudget):
+        self.memoryBudget = memoryBudget
+
+    def add(self, data, dropIfFull=False, timeout=None, cancellationToken=None, timestamp=None):
+        # Returns the list of dropped items (oldest ones, and data itself if it could not be stored)
+        # Without dropping, waits at most timeout ms (None: no limit) for room, or until cancellationToken is cancelled
+        # timestamp: capture time (perf_counter_ns) of item, None: time item is added
+        dropped = []
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        # Reserve memory for frame (outside of buffer lock: waiting here must not stop the consumer)
+        reserved = True
+        if self.memoryBudget is not None:
+            t = time.perf_counter_ns()
+            reserved = self.memoryBudget.reserve(frameBytes(data), not dropIfFull, deadline, cancellationToken)
+            blockedTime = time.perf_counter_ns() - t
+        with QMutexLocker(self.mutex):
+            # Memory ceiling hit (drop policy): drop oldest frames until the new frame fits
+            while not reserved and dropIfFull and self.count > 0:
+                dropped.append(self.dropOldest())
+                reserved = self.memoryBudget.reserve(frameBytes(data), False)
+            # Memory ceiling hit with an empty buffer (or timed out/cancelled waiting for memory): drop new frame
+            if not reserved:
+                self.statistics.frameDropped()
+                dropped.append(data)
+                return dropped
+            if self.count == self.bufferSize:
+                # If dropping is enabled, do not block if buffer is full
+                if dropIfFull:
+                    # Drop oldest frame
+                    dropped.append(self.dropOldest())
+                # If buffer is full, wait for a free slot
+                else:
+                    t = time.perf_counter_ns()
+                    while self.count == self.bufferSize:
+                        if not waitUntil(self.notFull, self.mutex, deadline, cancellationToken):
+                            break
+                    blockedTime += time.perf_counter_ns() - t
+                    # Timed out or cancelled: drop new frame
+                    if self.count == self.bufferSize:
+                        self.releaseMemory(data)
+                        self.statistics.frameDropped()
+                        dropped.append(data)
+                        return dropped
+            # Add item (and its enqueue time) to tail of ring
+            tail = (self.head + self.count) % self.bufferSize
+            self.slots[tail] = data
+            self.stamps[tail] = time.perf_counter_ns()
+            self.timestamps[tail] = self.stamps[tail] if timestamp is None else timestamp
+            self.count += 1
+            self.statistics.frameAdded(blockedTime)
+            # Wake one waiting consumer
+            self.notEmpty.wakeOne()
+        return dropped
+
+    def get(self, timeout=None, cancellationToken=None):
+        # Waits at most timeout ms (None: no limit) for an item, or until cancellationToken is cancelled: returns None
+        item = self.getTimestamped(timeout, cancellationToken)
+        return None if item is None else item[1]
+
+    def getTimestamped(self, timeout=None, cancellationToken=None):
+        # Same as get(), returns (capture timestamp, item)
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.mutex):
+            # Wait for an item
+            if self.count == 0:
+                t = time.perf_counter_ns()
+                while self.count == 0:
+                    if not waitUntil(self.notEmpty, self.mutex, deadline, cancellationToken):
+                        return None
+                blockedTime = time.perf_counter_ns() - t
+            # Take item from head of ring
+            data = self.slots[self.head]
+            timestamp = self.timestamps[self.head]
+            self.slots[self.head] = None
+            self.statistics.frameTaken(time.perf_counter_ns() - self.stamps[self.head], blockedTime)
+            self.head = (self.head + 1) % self.bufferSize
+            self.count -= 1
+            self.releaseMemory(data)
+            # Wake one waiting producer
+            self.notFull.wakeOne()
+        # Return item to caller
+        return timestamp, data
+
+    def getMany(self, maxCount, timeout=None, cancellationToken=None):
+        # Takes up to maxCount items under a single lock acquisition, waiting at most timeout ms (None: no limit)
+        # for the first one. Returns a (possibly empty) list, oldest item first.
+        blockedTime = 0
+        items = []
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.mutex):
+            # Wait for an item
+            if self.count == 0 and timeout != 0:
+                t = time.perf_counter_ns()
+                while self.count == 0:
+                    if not waitUntil(self.notEmpty, self.mutex, deadline, cancellationToken):
+                        break
+                blockedTime = time.perf_counter_ns() - t
+            # Take items from head of ring
+            now = time.perf_counter_ns()
+            while self.count > 0 and len(items) < maxCount:
+                data = self.slots[self.head]
+                self.slots[self.head] = None
+                self.statistics.frameTaken(now - self.stamps[self.head], blockedTime)
+                blockedTime = 0
+                self.head = (self.head + 1) % self.bufferSize
+                self.count -= 1
+                self.releaseMemory(data)
+                items.append(data)
+            # Wake waiting producers
+            if items:
+                self.notFull.wakeAll()
+        return items
+
+    def drain(self):
+        # Takes all items currently in buffer without waiting
+        return self.getMany(self.bufferSize, 0)
+
+    def clear(self):
+        with QMutexLocker(self.mutex):
+            # Check if buffer contains items
+            if self.count > 0:
+                # Release references held by slots
+                for i in range(self.bufferSize):
+                    self.releaseMemory(self.slots[i])
+                    self.slots[i] = None
+                self.head = 0
+                self.count = 0
+                # Allow blocked producers to resume
+                self.notFull.wakeAll()
+                return True
+            else:
+                return False
+
+    def resize(self, size):
+        # Returns the (oldest) frames dropped because they no longer fit
+        dropped = []
+        with QMutexLocker(self.mutex):
+            while self.count > size:
+                dropped.append(self.dropOldest())
+            # Move remaining items to the front of the new ring
+            order = [(self.head + i) % self.bufferSize for i in range(self.count)]
+            self.slots = [self.slots[i] for i in order] + [None] * (size - self.count)
+            self.stamps = [self.stamps[i] for i in order] + [0] * (size - self.count)
+            self.timestamps = [self.timestamps[i] for i in order] + [0] * (size - self.count)
+            self.head = 0
+            self.bufferSize = size
+            # Allow blocked producers to resume
+            self.notFull.wakeAll()
+        return dropped
+
+    def dropOldest(self):
+        # Must be called with mutex locked
+        data = self.slots[self.head]
+        self.slots[self.head] = None
+        self.head = (self.head + 1) % self.bufferSize
+        self.count -= 1
+        self.releaseMemory(data)
+        self.statistics.frameDropped()
+        return data
+
+    def releaseMemory(self, data):
+        if self.memoryBudget is not None and data is not None:
+            self.memoryBudget.release(frameBytes(data))
+
+    def getStatistics(self):
+        with QMutexLocker(self.mutex):
+            statistics = self.statistics.copy()
+        return statistics.getStatisticsData()
+
+    def size(self):
+        return self.count
+
+    def maxSize(self):
+        return self.bufferSize
+
+    def isFull(self):
+        return self.count == self.bufferSize
+
+    def isEmpty(self):
+        return self.count == 0
+
+
+class MailboxBuffer(object):
+    # Holds only the newest frame: add() overwrites it, get() waits for a frame newer than the last one consumed
+    def __init__(self):
+        self.slot = None
+        self.stamp = 0
+        # Capture timestamp (perf_counter_ns) of frame
+        self.timestamp = 0
+        # Sequence number of newest frame added and of last frame consumed
+        self.sequence = 0
+        self.consumedSequence = 0
+        # Create mutex and wait condition
+        self.mutex = QMutex()
+        self.newFrame = QWaitCondition()
+        # Drop/blocking counters and queue wait samples
+        self.statistics = BufferStatistics()
+        # Process-wide memory budget (set by SharedImageBuffer)
+        self.memoryBudget = None
+
+    def setMemoryBudget(self, memoryBudget):
+        self.memoryBudget = memoryBudget
+
+    def add(self, data, dropIfFull=False, timeout=None, cancellationToken=None, timestamp=None):
+        # Always overwrites (dropIfFull is ignored, add never waits); returns the list of dropped frames: the
+        # overwritten (never consumed) frame, and data itself if the memory ceiling does not leave room for it
+        dropped = []
+        with QMutexLocker(self.mutex):
+            if self.slot is not None:
+                dropped.append(self.slot)
+                self.statistics.frameDropped()
+                self.releaseMemory(self.slot)
+            # Memory ceiling hit: drop new frame
+            if self.memoryBudget is not None and not self.memoryBudget.reserve(frameBytes(data), False):
+                self.slot = None
+                # Nothing newer to consume: get() keeps waiting instead of returning the dropped frame
+                self.consumedSequence = self.sequence
+                self.statistics.frameDropped()
+                dropped.append(data)
+                return dropped
+            self.slot = data
+            self.stamp = time.perf_counter_ns()
+            self.timestamp = self.stamp if timestamp is None else timestamp
+            self.sequence += 1
+            self.statistics.frameAdded(0)
+            # Wake waiting consumer
+            self.newFrame.wakeOne()
+        return dropped
+
+    def get(self, timeout=None, cancellationToken=None):
+        # Waits at most timeout ms (None: no limit) for a frame, or until cancellationToken is cancelled: returns None
+        item = self.getTimestamped(timeout, cancellationToken)
+        return None if item is None else item[1]
+
+    def getTimestamped(self, timeout=None, cancellationToken=None):
+        # Same as get(), returns (capture timestamp, frame)
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.mutex):
+            # Wait for a frame newer than the last one consumed
+            if self.sequence == self.consumedSequence:
+                t = time.perf_counter_ns()
+                while self.sequence == self.consumedSequence:
+                    if not waitUntil(self.newFrame, self.mutex, deadline, cancellationToken):
+                        return None
+                blockedTime = time.perf_counter_ns() - t
+            # Take frame out of mailbox
+            data = self.slot
+            self.slot = None
+            self.consumedSequence = self.sequence
+            self.releaseMemory(data)
+            self.statistics.frameTaken(time.perf_counter_ns() - self.stamp, blockedTime)
+        # Return item to caller
+        return self.timestamp, data
+
+    def getMany(self, maxCount, timeout=None, cancellationToken=None):
+        # Mailbox holds at most one frame: returns an empty list or a list with the newest frame
+        if maxCount < 1:
+            return []
+        data = self.get(timeout, cancellationToken)
+        return [] if data is None else [data]
+
+    def drain(self):
+        return self.getMany(1, 0)
+
+    def clear(self):
+        with QMutexLocker(self.mutex):
+            # Check if mailbox contains a frame
+            if self.slot is not None:
+                self.releaseMemory(self.slot)
+                self.slot = None
+                self.consumedSequence = self.sequence
+                return True
+            else:
+                return False
+
+    def getStatistics(self):
+        with QMutexLocker(self.mutex):
+            statistics = self.statistics.copy()
+        return statistics.getStatisticsData()
+
+    def releaseMemory(self, data):
+        if self.memoryBudget is not None and data is not None:
+            self.memoryBudget.release(frameBytes(data))
+
+    def size(self):
+        return 0 if self.slot is None else 1
+
+    def maxSize(self):
+        return 1
+
+    def isFull(self):
+        return self.slot is not None
+
+    def isEmpty(self):
+        return self.slot is None
+
+
+class SemaphoreBuffer(object):
+    # Previous Buffer implementation (semaphores + mutex + queue.Queue), kept for comparison in Benchmark.py
     def __init__(self, size):
         # Save buffer size
         self.bufferSize = size
@@ -21,17 +349,6 @@ class Buffer(object):
         self.clearBuffer_add.acquire()
         # If dropping is enabled, do not block if buffer is full
         if dropIfFull:
-            # Try and acquire semaphore to add item
-
-            # Drop new frame
-            # if self.freeSlots.tryAcquire():
-            #     # Add item to queue
-            #     self.queueProtect.lock()
-            #     self.queue.put(data)
-            #     self.queueProtect.unlock()
-            #     # Release semaphore
-            #     self.usedSlots.release()
-
             # Drop oldest frame
             ret = self.freeSlots.tryAcquire()
             self.queueProtect.lock()
@@ -69,36 +386,6 @@ class Buffer(object):
         # Return item to caller
         return data
 
-    def clear(self):
-        # Check if buffer contains items
-        if self.queue.qsize() > 0:
-            # Stop adding items to buffer (will return false if an item is currently being added to the buffer)
-            if self.clearBuffer_add.tryAcquire():
-                # Stop taking items from buffer (will return false if an item is currently being taken from the buffer)
-                if self.clearBuffer_get.tryAcquire():
-                    # Release all remaining slots in queue
-                    self.freeSlots.release(self.queue.qsize())
-                    # Acquire all queue slots
-                    self.freeSlots.acquire(self.bufferSize)
-                    # Reset usedSlots to zero
-                    self.usedSlots.acquire(self.queue.qsize())
-                    # Clear buffer
-                    for _ in range(self.queue.qsize()):
-                        self.queue.get()
-                    # Release all slots
-                    self.freeSlots.release(self.bufferSize)
-                    # Allow get method to resume
-                    self.clearBuffer_get.release()
-                else:
-                    return False
-                # Allow add method to resume
-                self.clearBuffer_add.release()
-                return True
-            else:
-                return False
-        else:
-            return False
-
     def size(self):
         return self.queue.qsize()
 
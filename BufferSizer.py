@@ -0,0 +1,47 @@
+from PyQt5.QtCore import qDebug
+
+from Config import *
+
+
+class BufferSizer(object):
+    # Grows/shrinks an image buffer at runtime so that frames wait at most targetLatency (ms) in it
+    def __init__(self, deviceUrl, imageBuffer, targetLatency, framePool=None):
+        self.deviceUrl = deviceUrl
+        self.imageBuffer = imageBuffer
+        self.targetLatency = targetLatency
+        # Frames dropped by shrinking the buffer are returned to this pool
+        self.framePool = framePool
+        # Last measured rates
+        self.captureFPS = 0.0
+        self.processingFPS = 0.0
+
+    def setCaptureFPS(self, fps):
+        self.captureFPS = fps
+
+    def setProcessingFPS(self, fps):
+        self.processingFPS = fps
+
+    def getTargetSize(self):
+        # Frames leave the buffer at the slower of both rates: a frame waits (size / rate) at most
+        rate = min(self.captureFPS, self.processingFPS)
+        size = int(self.targetLatency * rate / 1000)
+        return max(IMAGE_BUFFER_AUTO_SIZE_MIN, min(IMAGE_BUFFER_AUTO_SIZE_MAX, size))
+
+    def update(self):
+        # Returns the new buffer size if the buffer was resized, otherwise None
+        # Wait until both rates have been measured
+        if self.captureFPS <= 0 or self.processingFPS <= 0:
+            return None
+        currentSize = self.imageBuffer.maxSize()
+        targetSize = self.getTargetSize()
+        # Ignore small changes (measured rates fluctuate)
+        if targetSize == currentSize or abs(targetSize - currentSize) < currentSize * IMAGE_BUFFER_AUTO_SIZE_HYSTERESIS:
+            return None
+        # Resize buffer
+        for frame in self.imageBuffer.resize(targetSize):
+            if self.framePool is not None:
+                self.framePool.release(frame)
+        qDebug("[%s] Image buffer resized from %d to %d frames (capture: %.2f fps, processing: %.2f fps, "
+               "target latency: %d ms)." % (self.deviceUrl, currentSize, targetSize, self.captureFPS,
+                                            self.processingFPS, self.targetLatency))
+        return targetSize
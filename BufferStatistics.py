@@ -0,0 +1,43 @@
+from Structures import BufferStatisticsData
+from Config import *
+
+
+class BufferStatistics(object):
+    # Drop/blocking counters and queue wait samples of a buffer (updated while holding the buffer's lock).
+    # counters/samples may be passed in as multiprocessing shared arrays (see SharedMemoryBuffer).
+    def __init__(self, counters=None, samples=None):
+        # [nAdded, nTaken, nDropped, producerBlockedNs, consumerBlockedNs]
+        self.counters = [0] * 5 if counters is None else counters
+        # Ring of queue wait times (ns) of the most recently taken frames
+        self.samples = [0] * BUFFER_STAT_QUEUE_LENGTH if samples is None else samples
+
+    def frameAdded(self, blockedTime):
+        self.counters[0] += 1
+        self.counters[3] += blockedTime
+
+    def frameDropped(self):
+        self.counters[2] += 1
+
+    def frameTaken(self, waitTime, blockedTime):
+        self.samples[self.counters[1] % len(self.samples)] = waitTime
+        self.counters[1] += 1
+        self.counters[4] += blockedTime
+
+    def copy(self):
+        # Snapshot of counters and samples (taken while holding the buffer's lock)
+        return BufferStatistics(list(self.counters), list(self.samples))
+
+    def getStatisticsData(self):
+        statsData = BufferStatisticsData()
+        statsData.nFramesAdded = self.counters[0]
+        statsData.nFramesTaken = self.counters[1]
+        statsData.nFramesDropped = self.counters[2]
+        statsData.producerBlockedTime = self.counters[3] / 1e6
+        statsData.consumerBlockedTime = self.counters[4] / 1e6
+        # Queue wait percentiles
+        samples = sorted(self.samples[:min(self.counters[1], len(self.samples))])
+        if samples:
+            statsData.queueWaitP50 = samples[int(0.50 * (len(samples) - 1))] / 1e6
+            statsData.queueWaitP95 = samples[int(0.95 * (len(samples) - 1))] / 1e6
+            statsData.queueWaitP99 = samples[int(0.99 * (len(samples) - 1))] / 1e6
+        return statsData
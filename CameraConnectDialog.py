@@ -20,6 +20,12 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
         self.resWEdit.setValidator(QRegExpValidator(QRegExp("^[0-9]{1,4}$")))  # Integers 0 to 9999
         # resHEdit (resolution: height) input validation
         self.resHEdit.setValidator(QRegExpValidator(QRegExp("^[0-9]{1,4}$")))  # Integers 0 to 9999
+        # decimationEdit (keep every Nth frame / target FPS) input validation
+        self.decimationEdit.setValidator(QRegExpValidator(QRegExp("^[0-9]{1,3}$")))  # Integers 0 to 999
+        # syntheticStreamEdit (synthetic stream number) input validation
+        self.syntheticStreamEdit.setValidator(QRegExpValidator(QRegExp("^[0-9]{1,3}$")))  # Integers 0 to 999
+        # syntheticFpsEdit (synthetic source FPS) input validation
+        self.syntheticFpsEdit.setValidator(QRegExpValidator(QRegExp("^[0-9]{1,3}$")))  # Integers 0 to 999
         # Setup capture prio combo boxes
         self.apiPreference = {'CAP_ANY': cv2.CAP_ANY,
                               # 'CAP_VFW': cv2.CAP_VFW,
@@ -55,10 +61,34 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
                               # 'CAP_XINE': cv2.CAP_XINE
                               }
         self.apiPreferenceComboBox.addItems(self.apiPreference.keys())
+        # Setup decimation unit combo box
+        self.decimationUnit = {'Keep every Nth frame': 'frames',
+                               'Target FPS': 'fps'}
+        self.decimationUnitComboBox.addItems(self.decimationUnit.keys())
+        # Setup synthetic source channels combo box
+        self.syntheticChannels = {'3 (BGR)': 3,
+                                  '1 (Gray)': 1}
+        self.syntheticChannelsComboBox.addItems(self.syntheticChannels.keys())
+        # Setup image buffer type combo box
+        self.imageBufferType = {'Queue': 'queue',
+                                'Mailbox (newest frame only)': 'mailbox',
+                                'Fan-out (shared by multiple consumers)': 'fanout'}
+        self.imageBufferTypeComboBox.addItems(self.imageBufferType.keys())
+        # Setup image buffer size unit combo box (MB and ms are converted to frames on connect)
+        self.imageBufferSizeUnit = {'frames': 'frames',
+                                    'MB': 'MB',
+                                    'ms': 'ms',
+                                    'ms (auto)': 'auto'}
+        self.imageBufferSizeUnitComboBox.addItems(self.imageBufferSizeUnit.keys())
         # Setup capture prio combo boxes
         threadPriorities = ["Idle", "Lowest", "Low", "Normal", "High", "Highest", "Time Critical", "Inherit"]
         self.capturePrioComboBox.addItems(threadPriorities)
         self.processingPrioComboBox.addItems(threadPriorities)
+        # Setup processing mode combo box
+        self.processingMode = {'Thread': 'thread',
+                               'Worker process (shared memory)': 'process',
+                               'Thread pool (%d workers, in-order delivery)' % PROCESSING_POOL_WORKERS: 'pool'}
+        self.processingModeComboBox.addItems(self.processingMode.keys())
         # Set dialog to defaults
         self.resetToDefaults()
         # Enable/disable checkbox
@@ -69,7 +99,13 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
         self.deviceUrlRadioButton.clicked.connect(lambda: self.setUrlMode('device url'))
         self.filenameRadioButton.clicked.connect(lambda: self.setUrlMode('filename'))
         self.rtspRadioButton.clicked.connect(lambda: self.setUrlMode('rtsp'))
+        self.syntheticRadioButton.clicked.connect(lambda: self.setUrlMode('synthetic'))
         self.importFilePushButton.clicked.connect(self.openFile)
+        # Buffer size and drop frame setting do not apply to mailbox buffer
+        self.imageBufferTypeComboBox.currentTextChanged.connect(self.imageBufferTypeChange)
+        # Unpaced processing only applies to files (and cannot be lossless with a mailbox buffer)
+        self.filenameRadioButton.toggled.connect(self.updateUnpacedCheckBox)
+        self.imageBufferTypeComboBox.currentTextChanged.connect(self.updateUnpacedCheckBox)
 
     def getDeviceUrl(self):
         # Set device number to default (any available camera) if field is blank
@@ -112,6 +148,13 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
                     return DEFAULT_FILENAME
             else:
                 return self.filenameEdit.text()
+        elif self.syntheticRadioButton.isChecked():
+            # Resolution is requested like for cameras (resolution fields, source default if blank)
+            stream = self.syntheticStreamEdit.text().strip() or '0'
+            fps = self.syntheticFpsEdit.text().strip()
+            if fps == '' or int(fps) == 0:
+                fps = str(SYNTHETIC_SOURCE_FPS)
+            return 'synthetic://%d?fps=%s&channels=%d' % (int(stream), fps, self.getSyntheticChannels())
         else:
             if self.deviceUrlEdit.text().strip() == '':
                 QMessageBox.warning(self.parentWidget(),
@@ -155,9 +198,18 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
         else:
             return int(self.imageBufferSizeEdit.text())
 
+    def getImageBufferSizeUnit(self):
+        return self.imageBufferSizeUnit.setdefault(self.imageBufferSizeUnitComboBox.currentText(), 'frames')
+
+    def getImageBufferType(self):
+        return self.imageBufferType.setdefault(self.imageBufferTypeComboBox.currentText(), 'queue')
+
     def getDropFrameCheckBoxState(self):
         return self.dropFrameCheckBox.isChecked()
 
+    def getUnpacedCheckBoxState(self):
+        return self.unpacedCheckBox.isEnabled() and self.unpacedCheckBox.isChecked()
+
     def getApiPreference(self):
         return self.apiPreference.setdefault(self.apiPreferenceComboBox.currentText(), cv2.CAP_ANY)
 
@@ -167,6 +219,23 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
     def getProcessingThreadPrio(self):
         return self.processingPrioComboBox.currentIndex()
 
+    def getProcessingMode(self):
+        return self.processingMode.setdefault(self.processingModeComboBox.currentText(), DEFAULT_PROCESSING_MODE)
+
+    def getDecimation(self):
+        # Keep all frames if field is blank
+        if self.decimationEdit.text().strip() == '':
+            return DEFAULT_DECIMATION
+        else:
+            return int(self.decimationEdit.text())
+
+    def getDecimationUnit(self):
+        return self.decimationUnit.setdefault(self.decimationUnitComboBox.currentText(), 'frames')
+
+    def getSyntheticChannels(self):
+        return self.syntheticChannels.setdefault(self.syntheticChannelsComboBox.currentText(),
+                                                 SYNTHETIC_SOURCE_CHANNELS)
+
     def getTabLabel(self):
         return self.tabLabelEdit.text()
 
@@ -183,6 +252,9 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
             self.portEdit.setEnabled(False)
             self.channelsEdit.setEnabled(False)
             self.importFilePushButton.setEnabled(False)
+            self.syntheticStreamEdit.setEnabled(False)
+            self.syntheticFpsEdit.setEnabled(False)
+            self.syntheticChannelsComboBox.setEnabled(False)
             self.deviceUrlRadioButton.setChecked(True)
         elif mode == 'filename':
             self.deviceUrlEdit.setEnabled(False)
@@ -193,6 +265,9 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
             self.portEdit.setEnabled(False)
             self.channelsEdit.setEnabled(False)
             self.importFilePushButton.setEnabled(True)
+            self.syntheticStreamEdit.setEnabled(False)
+            self.syntheticFpsEdit.setEnabled(False)
+            self.syntheticChannelsComboBox.setEnabled(False)
             self.filenameRadioButton.setChecked(True)
         elif mode == 'rtsp':
             self.deviceUrlEdit.setEnabled(False)
@@ -203,10 +278,37 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
             self.portEdit.setEnabled(True)
             self.channelsEdit.setEnabled(True)
             self.importFilePushButton.setEnabled(False)
+            self.syntheticStreamEdit.setEnabled(False)
+            self.syntheticFpsEdit.setEnabled(False)
+            self.syntheticChannelsComboBox.setEnabled(False)
             self.rtspRadioButton.setChecked(True)
+        elif mode == 'synthetic':
+            self.deviceUrlEdit.setEnabled(False)
+            self.filenameEdit.setEnabled(False)
+            self.usernameEdit.setEnabled(False)
+            self.passwordEdit.setEnabled(False)
+            self.ipEdit.setEnabled(False)
+            self.portEdit.setEnabled(False)
+            self.channelsEdit.setEnabled(False)
+            self.importFilePushButton.setEnabled(False)
+            self.syntheticStreamEdit.setEnabled(True)
+            self.syntheticFpsEdit.setEnabled(True)
+            self.syntheticChannelsComboBox.setEnabled(True)
+            self.syntheticRadioButton.setChecked(True)
+
+    def imageBufferTypeChange(self, text):
+        isQueue = self.imageBufferType.get(text) != 'mailbox'
+        self.imageBufferSizeEdit.setEnabled(isQueue)
+        self.imageBufferSizeUnitComboBox.setEnabled(isQueue)
+        self.dropFrameCheckBox.setEnabled(isQueue)
+
+    def updateUnpacedCheckBox(self):
+        self.unpacedCheckBox.setEnabled(self.filenameRadioButton.isChecked()
+                                        and self.getImageBufferType() != 'mailbox')
 
     def openFile(self):
-        filename = QFileDialog.getOpenFileName(self.parent(), 'open file', '.', 'Excel files(*.mp4 , *.avi)')[0]
+        filename = QFileDialog.getOpenFileName(self.parent(), 'open file', '.',
+                                               'Excel files(*.mp4 , *.avi , *%s)' % RECORDING_SUFFIX)[0]
         self.filenameEdit.setText(filename)
 
     def resetToDefaults(self):
@@ -218,16 +320,37 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
         self.ipEdit.setText(DEFAULT_RTSP_IP)
         self.portEdit.setText(DEFAULT_RTSP_PORT)
         self.channelsEdit.setText(DEFAULT_RTSP_CAHHELS)
+        self.syntheticStreamEdit.setText('0')
+        self.syntheticFpsEdit.setText(str(SYNTHETIC_SOURCE_FPS))
+        for text, channels in self.syntheticChannels.items():
+            if channels == SYNTHETIC_SOURCE_CHANNELS:
+                self.syntheticChannelsComboBox.setCurrentText(text)
         self.setUrlMode(DEFAULT_URL_MODE)
         # Resolution
         self.resWEdit.clear()
         self.resHEdit.clear()
+        # Image buffer type
+        for text, bufferType in self.imageBufferType.items():
+            if bufferType == DEFAULT_IMAGE_BUFFER_TYPE:
+                self.imageBufferTypeComboBox.setCurrentText(text)
+        self.imageBufferTypeChange(self.imageBufferTypeComboBox.currentText())
         # Image buffer size
         self.imageBufferSizeEdit.setText(str(DEFAULT_IMAGE_BUFFER_SIZE))
+        for text, unit in self.imageBufferSizeUnit.items():
+            if unit == DEFAULT_IMAGE_BUFFER_SIZE_UNIT:
+                self.imageBufferSizeUnitComboBox.setCurrentText(text)
         # Drop frames
         self.dropFrameCheckBox.setChecked(DEFAULT_DROP_FRAMES)
+        # Unpaced file processing
+        self.unpacedCheckBox.setChecked(DEFAULT_UNPACED_FILE_PROCESSING)
+        self.updateUnpacedCheckBox()
         # apiPreference
         self.apiPreferenceComboBox.setCurrentText(DEFAULT_APIPREFERENCE)
+        # Decimation
+        self.decimationEdit.setText(str(DEFAULT_DECIMATION))
+        for text, unit in self.decimationUnit.items():
+            if unit == DEFAULT_DECIMATION_UNIT:
+                self.decimationUnitComboBox.setCurrentText(text)
         # Capture thread
         if DEFAULT_CAP_THREAD_PRIO == QThread.IdlePriority:
             self.capturePrioComboBox.setCurrentIndex(0)
@@ -262,6 +385,10 @@ class CameraConnectDialog(QDialog, Ui_CameraConnectDialog):
             self.processingPrioComboBox.setCurrentIndex(6)
         elif DEFAULT_PROC_THREAD_PRIO == QThread.InheritPriority:
             self.processingPrioComboBox.setCurrentIndex(7)
+        # Processing mode
+        for text, processingMode in self.processingMode.items():
+            if processingMode == DEFAULT_PROCESSING_MODE:
+                self.processingModeComboBox.setCurrentText(text)
         # Tab label
         self.tabLabelEdit.setText("")
         # Enable Frame Processing checkbox
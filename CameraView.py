@@ -1,12 +1,19 @@
-from PyQt5.QtWidgets import QWidget, QMessageBox, QDialog
-from PyQt5.QtCore import qDebug, QRect, pyqtSignal, Qt
+from PyQt5.QtWidgets import QWidget, QMessageBox, QDialog, QAbstractSlider
+from PyQt5.QtCore import qDebug, QRect, pyqtSignal, Qt, QTime, QDateTime
 from PyQt5.QtGui import QPixmap
+import os
+import re
 
 from ui_CameraView import Ui_CameraView
 from CaptureThread import CaptureThread
 from ImageProcessingSettingsDialog import ImageProcessingSettingsDialog
 from ProcessingThread import ProcessingThread
+from ProcessingProcess import ProcessingProcess
+from SharedMemoryBuffer import SharedMemoryBuffer
+from FanOutBuffer import FanOutBuffer
+from BufferSizer import BufferSizer
 from Structures import *
+from Config import *
 
 
 class CameraView(QWidget, Ui_CameraView):
@@ -25,6 +32,10 @@ class CameraView(QWidget, Ui_CameraView):
         self.deviceUrl = deviceUrl
         # Initialize internal flag
         self.isCameraConnected = False
+        # Worker process (only used if frames are processed in a separate process)
+        self.processingProcess = None
+        # Image buffer auto-sizing (only used if image buffer size unit is 'auto')
+        self.bufferSizer = None
         # Set initial GUI state
         self.frameLabel.setText("No camera connected.")
         self.imageBufferBar.setValue(0)
@@ -34,6 +45,11 @@ class CameraView(QWidget, Ui_CameraView):
         self.deviceUrlLabel.setText("")
         self.cameraResolutionLabel.setText("")
         self.roiLabel.setText("")
+        self.queueWaitLabel.setText("")
+        self.decimationLabel.setText("")
+        self.connectionLabel.setText("")
+        self.positionLabel.setText("")
+        self.seekSlider.setEnabled(False)
         self.mouseCursorPosLabel.setText("")
         self.clearImageBufferButton.setDisabled(True)
         # Initialize ImageProcessingFlags structure
@@ -54,6 +70,10 @@ class CameraView(QWidget, Ui_CameraView):
             if self.captureThread.isRunning():
                 self.stopCaptureThread()
 
+            # Stop worker process (if used) and free its shared memory
+            if self.processingProcess is not None:
+                self.processingProcess.stop()
+
             # Automatically start frame processing (for other streams)
             if self.sharedImageBuffer.isSyncEnabledForDeviceUrl(self.deviceUrl):
                 self.sharedImageBuffer.setSyncEnabled(True)
@@ -65,14 +85,19 @@ class CameraView(QWidget, Ui_CameraView):
                 qDebug("[%s] WARNING: Camera already disconnected." % self.deviceUrl)
 
     def afterCaptureThreadFinshed(self):
+        imageBuffer = self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl)
         # Delete Buffer
         self.sharedImageBuffer.removeByDeviceUrl(self.deviceUrl)
+        # Free shared memory
+        if isinstance(imageBuffer, SharedMemoryBuffer):
+            imageBuffer.close()
 
     def afterProcessingThreadFinshed(self):
         qDebug("[%s] WARNING: SQL already disconnected." % self.deviceUrl)
 
     def connectToCamera(self, dropFrameIfBufferFull, apiPreference, capThreadPrio,
-                        procThreadPrio, enableFrameProcessing, width, height):
+                        procThreadPrio, enableFrameProcessing, width, height, processingMode=DEFAULT_PROCESSING_MODE,
+                        imageBufferCapacity=None, decimation=None, unpaced=False):
         # Set frame label text
         if self.sharedImageBuffer.isSyncEnabledForDeviceUrl(self.deviceUrl):
             self.frameLabel.setText("Camera connected. Waiting...")
@@ -81,16 +106,41 @@ class CameraView(QWidget, Ui_CameraView):
 
         # Create capture thread
         self.captureThread = CaptureThread(self.sharedImageBuffer, self.deviceUrl, dropFrameIfBufferFull,
-                                           apiPreference, width, height)
+                                           apiPreference, width, height, imageBufferCapacity, decimation, unpaced)
         # Attempt to connect to camera
         if self.captureThread.connectToCamera():
+            # Process frames in a worker process: exchange frames through shared memory buffers
+            if processingMode == 'process':
+                frameShape = (int(self.captureThread.getInputSourceHeight()),
+                              int(self.captureThread.getInputSourceWidth()),
+                              self.captureThread.getInputSourceChannels())
+                imageBuffer = SharedMemoryBuffer(self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).maxSize(),
+                                                 frameShape, streamId=self.deviceUrl)
+                # Replace image buffer of this stream
+                self.sharedImageBuffer.add(self.deviceUrl, imageBuffer,
+                                           self.sharedImageBuffer.isSyncEnabledForDeviceUrl(self.deviceUrl))
+                self.processingProcess = ProcessingProcess(
+                    imageBuffer, SharedMemoryBuffer(PROCESSING_PROCESS_RESULT_BUFFER_SIZE, frameShape,
+                                                    streamId=self.deviceUrl))
+            framePool = self.captureThread.framePool
+            # Fan-out buffer returns frames to the pool once the last consumer has released them
+            if isinstance(self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl), FanOutBuffer):
+                self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).setReleaseCallback(framePool.release)
+                framePool = None
             # Create processing thread
-            self.processingThread = ProcessingThread(self.sharedImageBuffer, self.deviceUrl, self.cameraId)
+            self.processingThread = ProcessingThread(self.sharedImageBuffer, self.deviceUrl, self.cameraId,
+                                                     framePool, self.processingProcess,
+                                                     PROCESSING_POOL_WORKERS if processingMode == 'pool' else 0)
+            # Resize image buffer at runtime towards target latency (shared memory buffers have a fixed size)
+            if imageBufferCapacity is not None and imageBufferCapacity[1] == 'auto' and processingMode != 'process':
+                self.bufferSizer = BufferSizer(self.deviceUrl, self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl),
+                                               imageBufferCapacity[0], framePool)
 
             # Setup signal/slot connections
             self.processingThread.newFrame.connect(self.updateFrame)
             self.processingThread.updateStatisticsInGUI.connect(self.updateProcessingThreadStats)
             self.captureThread.updateStatisticsInGUI.connect(self.updateCaptureThreadStats)
+            self.captureThread.recordingFailed.connect(self.recordingFailed)
             self.imageProcessingSettingsDialog.newImageProcessingSettings.connect(
                 self.processingThread.updateImageProcessingSettings)
             self.newImageProcessingFlags.connect(self.processingThread.updateImageProcessingFlags)
@@ -114,6 +164,8 @@ class CameraView(QWidget, Ui_CameraView):
             self.captureThread.start(capThreadPrio)
             # Start processing captured frames (if enabled)
             if enableFrameProcessing:
+                if self.processingProcess is not None:
+                    self.processingProcess.start()
                 self.processingThread.start(procThreadPrio)
 
             # Setup imageBufferBar with minimum and maximum values
@@ -127,6 +179,20 @@ class CameraView(QWidget, Ui_CameraView):
             self.deviceUrlLabel.setText(self.deviceUrl)
             self.cameraResolutionLabel.setText("%dx%d" % (self.captureThread.getInputSourceWidth(),
                                                           self.captureThread.getInputSourceHeight()))
+            # Frames are resized in the capture thread
+            if self.captureThread.outputSize is not None:
+                self.cameraResolutionLabel.setText(self.cameraResolutionLabel.text() + " (source: %dx%d)"
+                                                   % (self.captureThread.getSourceWidth(),
+                                                      self.captureThread.getSourceHeight()))
+            # Setup seekSlider (local files; slider values are positions in ms)
+            if self.captureThread.getDuration() > 0:
+                self.seekSlider.setRange(0, int(self.captureThread.getDuration()))
+                self.seekSlider.setPageStep(SEEK_SLIDER_PAGE_STEP)
+                self.seekSlider.setEnabled(True)
+                # Dragging jumps to keyframes only, exact position is decoded once the slider is released
+                self.seekSlider.sliderMoved.connect(lambda position: self.captureThread.seek(position, False))
+                self.seekSlider.sliderReleased.connect(lambda: self.captureThread.seek(self.seekSlider.value()))
+                self.seekSlider.actionTriggered.connect(self.seekSliderAction)
             # Set internal flag and return
             self.isCameraConnected = True
             # Set frame label text
@@ -137,20 +203,21 @@ class CameraView(QWidget, Ui_CameraView):
         else:
             return False
 
+    def seekSliderAction(self, action):
+        # Seek slider clicked (page step) or moved with the keyboard (dragging is handled by sliderMoved/sliderReleased)
+        if action != QAbstractSlider.SliderMove:
+            self.captureThread.seek(self.seekSlider.sliderPosition())
+
     def stopCaptureThread(self):
         qDebug("[%s] About to stop capture thread..." % self.deviceUrl)
         self.captureThread.stop()
-        self.sharedImageBuffer.wakeAll()  # This allows the thread to be stopped if it is in a wait-state
-        # Take one frame off a FULL queue to allow the capture thread to finish
-        if self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).isFull():
-            self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).get()
+        self.sharedImageBuffer.wakeAll()  # This allows the thread to be stopped if it is waiting for other streams
         self.captureThread.wait()
         qDebug("[%s] Capture thread successfully stopped." % self.deviceUrl)
 
     def stopProcessingThread(self):
         qDebug("[%s] About to stop processing thread..." % self.deviceUrl)
         self.processingThread.stop()
-        self.sharedImageBuffer.wakeAll()  # This allows the thread to be stopped if it is in a wait-state
         self.processingThread.wait()
         qDebug("[%s] Processing thread successfully stopped." % self.deviceUrl)
 
@@ -166,15 +233,60 @@ class CameraView(QWidget, Ui_CameraView):
         self.imageBufferLabel.setText("[%d/%d]" % (imageBuffer.size(), imageBuffer.maxSize()))
         # Show percentage of image buffer full in imageBufferBar
         self.imageBufferBar.setValue(imageBuffer.size())
+        # Show queue wait percentiles, dropped frames and blocked time in queueWaitLabel
+        bufferStatsData = imageBuffer.getStatistics()
+        self.queueWaitLabel.setText(
+            "p50/p95/p99: %.1f/%.1f/%.1f ms | Dropped: [%d] | Blocked (capture/processing): %.0f/%.0f ms"
+            % (bufferStatsData.queueWaitP50, bufferStatsData.queueWaitP95, bufferStatsData.queueWaitP99,
+               bufferStatsData.nFramesDropped, bufferStatsData.producerBlockedTime,
+               bufferStatsData.consumerBlockedTime))
+        # Show number of synchronization rounds this stream missed (barrier synchronization only)
+        if self.sharedImageBuffer.isSyncEnabledForDeviceUrl(self.deviceUrl):
+            self.queueWaitLabel.setText(self.queueWaitLabel.text() + " | Missed sync rounds: [%d]"
+                                        % self.sharedImageBuffer.getMissedSyncRounds(self.deviceUrl))
 
         # Show processing rate in captureRateLabel
         self.captureRateLabel.setText("{:>6,.2f} fps".format(statData.averageFPS))
+        # Unpaced file processing: show throughput as a multiple of realtime
+        if self.captureThread.unpaced:
+            self.captureRateLabel.setText(self.captureRateLabel.text()
+                                          + " ({:,.1f}x realtime)".format(statData.realtimeFactor))
+        if self.bufferSizer is not None and statData.nFramesProcessed > 0:
+            # Only frames kept by decimation enter the image buffer
+            self.bufferSizer.setCaptureFPS(statData.averageFPS * (statData.nFramesProcessed - statData.nFramesSkipped)
+                                           / statData.nFramesProcessed)
         # Show number of frames captured in nFramesCapturedLabel
         self.nFramesCapturedLabel.setText("[%d]" % statData.nFramesProcessed)
+        # Show number of frames skipped by decimation and retrieve time this saved in decimationLabel
+        self.decimationLabel.setText("Skipped: [%d] | Retrieve time saved: %.0f ms"
+                                     % (statData.nFramesSkipped, statData.retrieveTimeSaved))
+        # Show position in positionLabel and seekSlider (unless slider is being dragged)
+        if self.seekSlider.isEnabled():
+            self.positionLabel.setText("%s / %s" % (QTime(0, 0).addMSecs(int(statData.position)).toString("hh:mm:ss"),
+                                                    QTime(0, 0).addMSecs(self.seekSlider.maximum()).toString(
+                                                        "hh:mm:ss")))
+            if not self.seekSlider.isSliderDown():
+                self.seekSlider.setValue(int(statData.position))
+        # Show connection state, number of reconnects and downtime in connectionLabel
+        if statData.reconnecting:
+            connectionState = "Reconnecting (attempt %d)" % statData.nReconnectAttempts
+        else:
+            connectionState = "Connected"
+        self.connectionLabel.setText("%s | Reconnects: [%d] | Downtime: %.1f s"
+                                     % (connectionState, statData.nReconnects, statData.downtime / 1000))
 
     def updateProcessingThreadStats(self, statData):
         # Show processing rate in processingRateLabel
         self.processingRateLabel.setText("{:>6,.2f} fps".format(statData.averageFPS))
+        # Show time from capture to processed frame and frames lost by the image buffer
+        self.processingRateLabel.setText(self.processingRateLabel.text() + " | Latency: %.1f ms | Lost: [%d]"
+                                         % (statData.latency, statData.nFramesLost))
+        # Resize image buffer towards target latency
+        if self.bufferSizer is not None:
+            self.bufferSizer.setProcessingFPS(statData.averageFPS)
+            newSize = self.bufferSizer.update()
+            if newSize is not None:
+                self.imageBufferBar.setMaximum(newSize)
         # Show ROI information in roiLabel
         self.roiLabel.setText("(%d,%d) %dx%d" % (self.processingThread.getCurrentROI().x(),
                                                  self.processingThread.getCurrentROI().y(),
@@ -183,7 +295,7 @@ class CameraView(QWidget, Ui_CameraView):
         # Show number of frames processed in nFramesProcessedLabel
         self.nFramesProcessedLabel.setText("[%d]" % statData.nFramesProcessed)
 
-    def updateFrame(self, frame):
+    def updateFrame(self, frame, frameInfo):
         # Display frame
         self.frameLabel.setPixmap(
             QPixmap.fromImage(frame).scaled(self.frameLabel.width(), self.frameLabel.height(), Qt.KeepAspectRatio))
@@ -280,12 +392,34 @@ class CameraView(QWidget, Ui_CameraView):
                 else:
                     self.setROI.emit(selectionBox)
 
+    def recordingFailed(self, error):
+        # Recording was stopped by the capture thread: untick "Record"
+        for action in self.frameLabel.menu.actions():
+            if action.text() == "Record":
+                action.setChecked(False)
+        QMessageBox.warning(self, "ERROR:", "Recording stopped:\n%s" % error)
+
     def handleContextMenuAction(self, action):
         if action.text() == "Reset ROI":
             self.setROI.emit(
                 QRect(0, 0, self.captureThread.getInputSourceWidth(), self.captureThread.getInputSourceHeight()))
         elif action.text() == "Scale to Fit Frame":
             self.frameLabel.setScaledContents(action.isChecked())
+        elif action.text() == "Record":
+            if action.isChecked() and self.isCameraConnected:
+                # Recording named after stream and start time
+                filename = os.path.join(RECORDING_DIRECTORY, "%s_%s%s" % (
+                    re.sub(r'[^0-9A-Za-z]+', '_', self.deviceUrl).strip('_'),
+                    QDateTime.currentDateTime().toString("yyyyMMdd_hhmmss"), RECORDING_SUFFIX))
+                try:
+                    self.captureThread.startRecording(filename)
+                except OSError as e:
+                    QMessageBox.warning(self, "ERROR:", "Could not start recording:\n%s" % e)
+                    action.setChecked(False)
+            elif self.isCameraConnected:
+                self.captureThread.stopRecording()
+            else:
+                action.setChecked(False)
         elif action.text() == "Grayscale":
             self.imageProcessingFlags.grayscaleOn = action.isChecked()
             self.newImageProcessingFlags.emit(self.imageProcessingFlags)
@@ -0,0 +1,75 @@
+from PyQt5.QtCore import QMutex, QMutexLocker, QWaitCondition
+import time
+
+
+class CancellationToken(object):
+    # Set by stop(): wakes every wait on a buffer/budget done with this token so the waiting thread can return
+    def __init__(self):
+        self.mutex = QMutex()
+        self.cancelled = False
+        # (mutex, wait condition) pairs currently waited on with this token
+        self.waiters = []
+        # Used by sleep()
+        self.sleepMutex = QMutex()
+        self.sleepCondition = QWaitCondition()
+
+    def cancel(self):
+        with QMutexLocker(self.mutex):
+            self.cancelled = True
+            waiters = list(self.waiters)
+        # Wake waiters (taking their mutex ensures they are waiting, not between check and wait)
+        for mutex, waitCondition in waiters:
+            with QMutexLocker(mutex):
+                waitCondition.wakeAll()
+
+    def reset(self):
+        with QMutexLocker(self.mutex):
+            self.cancelled = False
+
+    def isCancelled(self):
+        return self.cancelled
+
+    def wait(self, waitCondition, mutex, timeout=None):
+        # Must be called with mutex locked; waits until woken, timeout (ms, None: no limit) or cancellation
+        waiter = (mutex, waitCondition)
+        with QMutexLocker(self.mutex):
+            if self.cancelled:
+                return
+            self.waiters.append(waiter)
+        if timeout is None:
+            waitCondition.wait(mutex)
+        else:
+            waitCondition.wait(mutex, timeout)
+        with QMutexLocker(self.mutex):
+            self.waiters.remove(waiter)
+
+    def sleep(self, timeout):
+        # Sleeps for timeout ms (ms resolution) unless cancelled; returns False if cancelled
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.sleepMutex):
+            while waitUntil(self.sleepCondition, self.sleepMutex, deadline, self):
+                pass
+        return not self.cancelled
+
+
+def deadlineFromTimeout(timeout):
+    # Timeout in ms (None: no deadline)
+    return None if timeout is None else time.perf_counter_ns() + int(timeout * 1000000)
+
+
+def waitUntil(waitCondition, mutex, deadline=None, cancellationToken=None):
+    # Must be called with mutex locked; returns False (without waiting) if deadline passed or token was cancelled
+    if cancellationToken is not None and cancellationToken.isCancelled():
+        return False
+    remaining = None
+    if deadline is not None:
+        remaining = (deadline - time.perf_counter_ns()) // 1000000
+        if remaining <= 0:
+            return False
+    if cancellationToken is not None:
+        cancellationToken.wait(waitCondition, mutex, remaining)
+    elif remaining is None:
+        waitCondition.wait(mutex)
+    else:
+        waitCondition.wait(mutex, remaining)
+    return True
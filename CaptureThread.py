@@ -1,9 +1,17 @@
-from PyQt5.QtCore import QThread, QTime, QMutexLocker, QMutex, pyqtSignal, qDebug
+from PyQt5.QtCore import QThread, QMutexLocker, QMutex, pyqtSignal, qDebug
 from PyQt5.QtWidgets import QMessageBox
 import cv2
 from queue import Queue
 import os
+import time
 
+from FramePool import FramePool
+from FrameSource import createFrameSource
+from FrameRecorder import FrameRecorder
+from FramePacer import FramePacer
+from KeyframeIndex import KeyframeIndex
+from StatisticsPublisher import StatisticsPublisher
+from CancellationToken import CancellationToken
 from Structures import *
 from Config import *
 
@@ -11,12 +19,19 @@ from Config import *
 class CaptureThread(QThread):
     updateStatisticsInGUI = pyqtSignal(ThreadStatisticsData)
     end = pyqtSignal()
+    # Recording stopped because it could not be written (error message)
+    recordingFailed = pyqtSignal(str)
 
-    def __init__(self, sharedImageBuffer, deviceUrl, dropFrameIfBufferFull, apiPreference, width, height, parent=None):
+    def __init__(self, sharedImageBuffer, deviceUrl, dropFrameIfBufferFull, apiPreference, width, height,
+                 imageBufferCapacity=None, decimation=None, unpaced=False, parent=None):
         super(CaptureThread, self).__init__(parent)
-        self.cap = cv2.VideoCapture()
-        self.t = QTime()
+        # Frame source: cv2.VideoCapture or source registered for the url scheme (see FrameSource)
+        self.cap = createFrameSource(deviceUrl)
         self.doStopMutex = QMutex()
+        # Cancelled by stop(): buffer waits of this thread return
+        self.cancellationToken = CancellationToken()
+        # Limits fps (frame interval set once the source is opened)
+        self.framePacer = FramePacer(0, self.cancellationToken)
         self.fps = Queue()
         # Save passed parameters
         self.sharedImageBuffer = sharedImageBuffer
@@ -24,19 +39,53 @@ class CaptureThread(QThread):
         self.deviceUrl = deviceUrl
         self._deviceUrl = int(deviceUrl) if deviceUrl.isdigit() else deviceUrl
         self.localVideo = True if os.path.exists(self._deviceUrl) else False
+        # Unpaced (local files only): process as fast as possible, wait for room in the image buffer instead of dropping
+        self.unpaced = unpaced and self.localVideo
+        if self.unpaced:
+            self.dropFrameIfBufferFull = False
         self.apiPreference = apiPreference
         self.width = width
         self.height = height
+        # Image buffer capacity as (value, 'MB', 'ms' or 'auto'), None: buffer keeps its size in frames
+        self.imageBufferCapacity = imageBufferCapacity
+        # Decimation as (N, 'frames') -> keep every Nth frame or (FPS, 'fps') -> keep frames at a target rate
+        self.decimation = decimation if decimation is not None else (DEFAULT_DECIMATION, DEFAULT_DECIMATION_UNIT)
         # Initialize variables(s)
         self.captureTime = 0
+        self.lastCaptureTime = None
+        # Time (perf_counter_ns) and source position (ms) of the first frame (used to calculate the realtime factor)
+        self.startTime = None
+        self.startPts = None
         self.doStop = False
         self.sampleNumber = 0
         self.fpsSum = 0.0
         self.statsData = ThreadStatisticsData()
+        # Publishes snapshots of statsData to the GUI at STATISTICS_PUBLISH_INTERVAL
+        self.statisticsPublisher = StatisticsPublisher(self.updateStatisticsInGUI)
         self.defaultTime = 0
+        self.framePool = None
+        self.grabbedFrame = None
+        # Frame size (w, h) frames are resized to in this thread if the backend ignores the requested resolution
+        # (None: frames are passed on at source size) and frame the source is retrieved into before resizing
+        self.outputSize = None
+        self.retrievedFrame = None
+        # Local files: keyframe index (built in the background) and pending seek request (position (ms), exact)
+        self.keyframeIndex = None
+        self.seekMutex = QMutex()
+        self.seekRequest = None
+        # Recorder of the frames passed on by this thread (None: not recording)
+        self.recorderMutex = QMutex()
+        self.recorder = None
+        self.nFramesGrabbed = 0
+        self.nextKeepTime = 0
+        # Total time (ns) spent in retrieve() and number of retrieved frames (used to estimate the time saved by
+        # skipping)
+        self.retrieveTimeSum = 0
+        self.nFramesRetrieved = 0
 
     def run(self):
         pause = False
+        self.framePacer.restart()
         while True:
             ################################
             # Stop thread if doStop = TRUE #
@@ -44,71 +93,337 @@ class CaptureThread(QThread):
             self.doStopMutex.lock()
             if self.doStop:
                 self.doStop = False
+                self.cancellationToken.reset()
                 self.doStopMutex.unlock()
                 break
             self.doStopMutex.unlock()
             ################################
             ################################
 
+            # Seek (local files; only the most recent request is applied)
+            with QMutexLocker(self.seekMutex):
+                seekRequest = self.seekRequest
+                self.seekRequest = None
+            if seekRequest is not None:
+                self.applySeek(*seekRequest)
+                pause = False
+
             # Synchronize with other streams (if enabled for this stream)
             self.sharedImageBuffer.sync(self.deviceUrl)
 
             # Capture frame ( if available)
             if not self.cap.grab():
-                if pause or not self.localVideo:
+                # Stream lost (camera/network source): reopen it in this thread
+                if not self.localVideo:
+                    self.reconnect()
+                    continue
+                # Video ended: poll at frame rate until stopped
+                if pause:
+                    self.cancellationToken.sleep(self.defaultTime)
                     continue
                 # Video End
                 pause = True
+                if self.unpaced and self.startTime is not None:
+                    elapsed = max(1, self.lastCaptureTime - self.startTime)
+                    qDebug("[%s] Processed %d frames in %.2f s: %.1f fps, %.1fx realtime"
+                           % (self.deviceUrl, self.statsData.nFramesProcessed, elapsed / 1e9,
+                              (self.statsData.nFramesProcessed - 1) * 1e9 / elapsed, self.statsData.realtimeFactor))
+                # Statistics of the last frames (no further update would publish them)
+                self.statisticsPublisher.update(self.statsData, force=True)
                 self.end.emit()
                 continue
 
-            # Retrieve frame
-            _, self.grabbedFrame = self.cap.retrieve()
-            # Add frame to buffer
-            self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).add(self.grabbedFrame, self.dropFrameIfBufferFull)
+            # Source position (ms) of the grabbed frame
+            pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) if self.localVideo else None
+            if pts is not None:
+                self.statsData.position = pts
+            # Limit fps: wait until frame is due (local files follow their presentation timestamps)
+            # Capture timestamp (used to match frames of synchronized streams) is the time the frame is released
+            if self.unpaced:
+                timestamp = time.perf_counter_ns()
+            else:
+                timestamp = self.framePacer.wait(pts)
+            self.updateRealtimeFactor(timestamp, pts)
+
+            # Decimation: skipped frames are only grabbed, never retrieved (decoded/converted) or buffered
+            if not self.keepFrame(timestamp):
+                self.statsData.nFramesSkipped += 1
+                if self.nFramesRetrieved > 0:
+                    self.statsData.retrieveTimeSaved += self.retrieveTimeSum / self.nFramesRetrieved / 1e6
+            else:
+                # Retrieve frame into a pooled buffer (resize it into the pooled buffer if the backend ignored the
+                # requested resolution)
+                retrieveStart = time.perf_counter_ns()
+                self.grabbedFrame = self.framePool.acquire()
+                pooledFrame = self.grabbedFrame.data
+                if self.outputSize is not None:
+                    _, self.retrievedFrame = self.cap.retrieve(self.retrievedFrame)
+                    frame = cv2.resize(self.retrievedFrame, self.outputSize, dst=pooledFrame,
+                                       interpolation=CAPTURE_RESIZE_INTERPOLATION)
+                else:
+                    _, frame = self.cap.retrieve(pooledFrame)
+                self.retrieveTimeSum += time.perf_counter_ns() - retrieveStart
+                self.nFramesRetrieved += 1
+                # Source geometry changed (OpenCV allocated a new frame) or source passes on read-only views of its
+                # frames (zero-copy sources such as recordings): recycle the unused pooled frame
+                if frame is not pooledFrame:
+                    self.framePool.release(self.grabbedFrame)
+                    self.grabbedFrame = Frame(frame)
+                # Fill in frame envelope
+                self.grabbedFrame.sequence = self.nFramesRetrieved
+                self.grabbedFrame.captureTime = timestamp
+                self.grabbedFrame.pts = pts
+                self.grabbedFrame.streamId = self.deviceUrl
+                # Record frame (before it enters the image buffer: recordings do not lose frames dropped by the buffer)
+                failedRecorder = None
+                with QMutexLocker(self.recorderMutex):
+                    if self.recorder is not None:
+                        try:
+                            self.recorder.write(self.grabbedFrame)
+                        except OSError as e:
+                            failedRecorder, self.recorder = self.recorder, None
+                            recordingError = e
+                # Recording could not be written (e.g. disk full): stop it, capture continues
+                if failedRecorder is not None:
+                    self.closeRecorder(failedRecorder, recordingError)
+                # Add frame to buffer (recycle the frames it dropped; waiting for room is cancelled by stop())
+                for droppedFrame in self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).add(
+                        self.grabbedFrame, self.dropFrameIfBufferFull, cancellationToken=self.cancellationToken,
+                        timestamp=timestamp):
+                    self.framePool.release(droppedFrame)
 
             self.statsData.nFramesProcessed += 1
-            # Inform GUI of updated statistics
-            self.updateStatisticsInGUI.emit(self.statsData)
-
-            # Limit fps
-            delta = self.defaultTime - self.t.elapsed()
-            # delta = self.defaultTime - self.captureTime
-            if delta > 0:
-                self.msleep(delta)
+            # Inform GUI of updated statistics (coalesced)
+            self.statisticsPublisher.update(self.statsData)
+
             # Save capture time
-            self.captureTime = self.t.elapsed()
+            if self.lastCaptureTime is not None:
+                self.captureTime = (timestamp - self.lastCaptureTime) / 1e6
+            self.lastCaptureTime = timestamp
 
             # Update statistics
             self.updateFPS(self.captureTime)
 
-            # Start timer (used to calculate capture rate)
-            self.t.start()
-
+        # Final statistics
+        self.statisticsPublisher.update(self.statsData, force=True)
+        pacingStatsData = self.framePacer.getStatistics()
+        qDebug("[%s] Pacing jitter mean/max: %.2f/%.2f ms, %d resyncs over %d frames:\n%s"
+               % (self.deviceUrl, pacingStatsData.jitterMean, pacingStatsData.jitterMax, pacingStatsData.nResyncs,
+                  pacingStatsData.nFramesPaced, self.framePacer.histogram.format()))
         qDebug("Stopping capture thread...")
 
+    def keepFrame(self, timestamp):
+        value, unit = self.decimation
+        self.nFramesGrabbed += 1
+        # Keep every Nth frame
+        if unit == 'frames':
+            return value <= 1 or (self.nFramesGrabbed - 1) % value == 0
+        # Keep frames at a target rate
+        if value <= 0:
+            return True
+        interval = 1e9 / value
+        # Keep the frame closest to the scheduled time (source frames arrive every defaultTime ms)
+        if timestamp < self.nextKeepTime - self.defaultTime * 1e6 / 2:
+            return False
+        # Schedule next frame (restart schedule at this frame on start and instead of catching up after a stall)
+        self.nextKeepTime += interval
+        if self.nextKeepTime <= timestamp:
+            self.nextKeepTime = timestamp + interval
+        return True
+
     def stop(self):
         with QMutexLocker(self.doStopMutex):
             self.doStop = True
+        # Wake thread if it is waiting on its image buffer
+        self.cancellationToken.cancel()
 
     def connectToCamera(self):
         # Open camera
-        camOpenResult = self.cap.open(self._deviceUrl, self.apiPreference)
-        # Set resolution
-        if self.width != -1:
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        if self.height != -1:
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        camOpenResult = self.openCamera()
 
         if camOpenResult:
+            self.updateOutputSize()
             try:
                 self.defaultTime = int(1000 / self.cap.get(cv2.CAP_PROP_FPS))
+                self.framePacer.setInterval(int(1e9 / self.cap.get(cv2.CAP_PROP_FPS)))
             except:
                 self.defaultTime = 40
+                self.framePacer.setInterval(40000000)
+            # Convert image buffer capacity to frames (frame size/rate are only known now)
+            if self.imageBufferCapacity is not None:
+                self.resizeImageBuffer(*self.imageBufferCapacity)
+            # Build keyframe index of local video files in the background (used for seeking)
+            if self.localVideo and isinstance(self.cap, cv2.VideoCapture) and self.keyframeIndex is None:
+                self.keyframeIndex = KeyframeIndex(self._deviceUrl)
+                self.keyframeIndex.start(QThread.LowPriority)
+            # Create frame pool: one frame per buffer slot plus frames held by capture/processing
+            self.framePool = FramePool(int(self.getInputSourceWidth()), int(self.getInputSourceHeight()),
+                                       self.getInputSourceChannels(),
+                                       self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).maxSize()
+                                       + FRAME_POOL_EXTRA_FRAMES)
         # Return result
         return camOpenResult
 
+    def openCamera(self):
+        # Bound time spent opening/reading network streams (a dead stream makes grab() fail instead of hang)
+        if isinstance(self._deviceUrl, str) and not self.localVideo:
+            camOpenResult = self.cap.open(self._deviceUrl, self.apiPreference,
+                                          [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, CAPTURE_OPEN_TIMEOUT,
+                                           cv2.CAP_PROP_READ_TIMEOUT_MSEC, CAPTURE_READ_TIMEOUT])
+        else:
+            camOpenResult = self.cap.open(self._deviceUrl, self.apiPreference)
+        # Set resolution
+        if self.width != -1:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height != -1:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        return camOpenResult
+
+    def seek(self, position, exact=True):
+        # Request seek of a local file to position (ms); exact=False only jumps to the keyframe at or before position
+        # (cheap, e.g. while a seek slider is dragged)
+        with QMutexLocker(self.seekMutex):
+            self.seekRequest = (position, exact)
+
+    def applySeek(self, position, exact):
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        keyframe = self.keyframeIndex.findKeyframe(position) if self.keyframeIndex is not None else None
+        # Position not covered by the keyframe index (yet): let the backend seek
+        if keyframe is None or fps <= 0:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, position)
+        else:
+            # Jump to keyframe and decode forward to the requested frame (grab only: frames are not retrieved)
+            frameNumber, keyframeTime = keyframe
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frameNumber)
+            if exact:
+                for _ in range(int(round((position - keyframeTime) * fps / 1000))):
+                    if self.cancellationToken.isCancelled() or not self.cap.grab():
+                        break
+        # Frames after the seek start a new pacing schedule (and realtime factor measurement)
+        self.framePacer.restart()
+        self.startTime = None
+
+    def getDuration(self):
+        # Duration (ms) of local files (0: unknown)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if not self.localVideo or fps <= 0:
+            return 0
+        return self.cap.get(cv2.CAP_PROP_FRAME_COUNT) * 1000 / fps
+
+    def updateOutputSize(self, geometry=None):
+        # Requested resolution (one dimension may be omitted: source aspect ratio is kept) or, if given, the frame
+        # geometry (width, height) to keep
+        sourceWidth, sourceHeight = int(self.getSourceWidth()), int(self.getSourceHeight())
+        self.outputSize = None
+        if sourceWidth <= 0 or sourceHeight <= 0:
+            return
+        if geometry is not None:
+            width, height = geometry
+        elif self.width == -1 and self.height == -1:
+            return
+        else:
+            width = self.width if self.width != -1 else int(round(sourceWidth * self.height / sourceHeight))
+            height = self.height if self.height != -1 else int(round(sourceHeight * self.width / sourceWidth))
+        # Backend did not honor CAP_PROP_FRAME_WIDTH/HEIGHT: resize frames in this thread
+        if (width, height) != (sourceWidth, sourceHeight):
+            self.outputSize = (width, height)
+            qDebug("[%s] Source delivers %dx%d: frames are resized to %dx%d"
+                   % (self.deviceUrl, sourceWidth, sourceHeight, width, height))
+
+    def reconnect(self):
+        # Reopen camera with exponential backoff until it is reopened or the thread is stopped
+        # (CameraView, image buffer and processing thread are kept: processing resumes with the first new frame)
+        qDebug("[%s] Stream lost. Reconnecting..." % self.deviceUrl)
+        downStart = time.perf_counter_ns()
+        downtime = self.statsData.downtime
+        backoff = RECONNECT_BACKOFF_INITIAL
+        self.statsData.nReconnectAttempts = 0
+        self.statsData.reconnecting = True
+        # Frame pool, processing ROI and image buffers are sized for the current geometry: frames of the reopened
+        # stream are resized to it if it comes back at a different resolution
+        geometry = (int(self.getInputSourceWidth()), int(self.getInputSourceHeight()))
+        while not self.cancellationToken.isCancelled():
+            self.cap.release()
+            self.statsData.nReconnectAttempts += 1
+            if self.openCamera():
+                self.updateOutputSize(geometry)
+                break
+            self.statsData.downtime = downtime + (time.perf_counter_ns() - downStart) / 1e6
+            self.statisticsPublisher.update(self.statsData, force=True)
+            # Wait before next attempt (cancelled by stop())
+            self.cancellationToken.sleep(backoff)
+            backoff = min(2 * backoff, RECONNECT_BACKOFF_MAX)
+        self.statsData.downtime = downtime + (time.perf_counter_ns() - downStart) / 1e6
+        self.statsData.reconnecting = False
+        if self.cap.isOpened():
+            self.statsData.nReconnects += 1
+            qDebug("[%s] Reconnected after %.1f s (%d attempts)."
+                   % (self.deviceUrl, (time.perf_counter_ns() - downStart) / 1e9, self.statsData.nReconnectAttempts))
+        self.statisticsPublisher.update(self.statsData, force=True)
+        # Frames of the reopened stream start a new pacing schedule
+        self.framePacer.restart()
+
+    def updateRealtimeFactor(self, timestamp, pts):
+        if self.startTime is None:
+            self.startTime = timestamp
+            self.startPts = pts
+            return
+        # Source time covered so far relative to wall time
+        if pts is not None:
+            sourceTime = pts - self.startPts
+        else:
+            sourceTime = self.statsData.nFramesProcessed * self.defaultTime
+        self.statsData.realtimeFactor = sourceTime * 1e6 / max(1, timestamp - self.startTime)
+
+    def getPacingStatistics(self):
+        return self.framePacer.getStatistics()
+
+    def resizeImageBuffer(self, value, unit):
+        if unit == 'MB':
+            frameBytes = (int(self.getInputSourceWidth()) * int(self.getInputSourceHeight())
+                          * self.getInputSourceChannels())
+            nFrames = int(value * 1024 * 1024 / frameBytes) if frameBytes > 0 else DEFAULT_IMAGE_BUFFER_SIZE
+        else:
+            nFrames = int(value / self.defaultTime) if self.defaultTime > 0 else DEFAULT_IMAGE_BUFFER_SIZE
+        self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).resize(max(1, nFrames))
+        qDebug("[%s] Image buffer capacity %d %s: %d frames" % (self.deviceUrl, value, unit, max(1, nFrames)))
+
+    def startRecording(self, filename):
+        # Record frames passed on by this thread to filename (see FrameRecorder), replaces a running recording
+        recorder = FrameRecorder(filename, (int(self.getInputSourceHeight()), int(self.getInputSourceWidth()),
+                                            self.getInputSourceChannels()), streamId=self.deviceUrl)
+        with QMutexLocker(self.recorderMutex):
+            previousRecorder, self.recorder = self.recorder, recorder
+        if previousRecorder is not None:
+            self.closeRecorder(previousRecorder)
+        qDebug("[%s] Recording to %s..." % (self.deviceUrl, filename))
+
+    def stopRecording(self):
+        with QMutexLocker(self.recorderMutex):
+            recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            self.closeRecorder(recorder)
+
+    def closeRecorder(self, recorder, error=None):
+        # Frames written so far are kept; GUI is informed if the recording failed (error) or could not be closed
+        try:
+            recorder.close()
+        except OSError as e:
+            error = error or e
+        if error is not None:
+            qDebug("[%s] Recording to %s failed: %s" % (self.deviceUrl, recorder.filename, error))
+            self.recordingFailed.emit(str(error))
+
+    def isRecording(self):
+        return self.recorder is not None
+
     def disconnectCamera(self):
+        # Finish recording
+        self.stopRecording()
+        # Stop building keyframe index
+        if self.keyframeIndex is not None:
+            self.keyframeIndex.stop()
+            self.keyframeIndex.wait()
         # Camera is connected
         if self.cap.isOpened():
             # Disconnect camera
@@ -122,9 +437,25 @@ class CaptureThread(QThread):
         return self.cap.isOpened()
 
     def getInputSourceWidth(self):
+        # Width of frames passed on by this thread
+        if self.outputSize is not None:
+            return self.outputSize[0]
         return self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
 
     def getInputSourceHeight(self):
+        # Height of frames passed on by this thread
+        if self.outputSize is not None:
+            return self.outputSize[1]
+        return self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+
+    def getInputSourceChannels(self):
+        # Channels of frames passed on by this thread (cv2.VideoCapture delivers BGR frames)
+        return getattr(self.cap, 'channels', 3)
+
+    def getSourceWidth(self):
+        return self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+
+    def getSourceHeight(self):
         return self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
 
     def updateFPS(self, timeElapsed):
@@ -4,7 +4,7 @@ from PyQt5.QtCore import QThread
 APP_VERSION = '2.3.3-Python'
 
 # Url mode
-DEFAULT_URL_MODE = 'device url'  # 'device url', 'rtsp', 'filename'
+DEFAULT_URL_MODE = 'device url'  # 'device url', 'rtsp', 'filename', 'synthetic'
 # Filename
 DEFAULT_FILENAME = ''
 # Device url
@@ -17,17 +17,100 @@ DEFAULT_RTSP_CAHHELS = ''
 
 # Rtsp transport mode
 DEFAULT_TRANSPORT_MODE = 0  # 0 -> none, 1 -> unicast, 2 -> multicast
+# Synthetic frame source (url synthetic://<stream>?width=W&height=H&fps=F&channels=C): defaults and speed of the moving
+# test pattern (pixels per frame)
+SYNTHETIC_SOURCE_WIDTH = 640
+SYNTHETIC_SOURCE_HEIGHT = 480
+SYNTHETIC_SOURCE_FPS = 30
+SYNTHETIC_SOURCE_CHANNELS = 3
+SYNTHETIC_SOURCE_SPEED = 4
+# Raw frame recordings (replayed without decoding): directory of recordings started from the frame context menu,
+# filename suffix and chunk size (MB)
+RECORDING_DIRECTORY = 'recordings'
+RECORDING_SUFFIX = '.rawrec'
+RECORDING_CHUNK_SIZE = 256
 
 # FPS statistics queue lengths
 PROCESSING_FPS_STAT_QUEUE_LENGTH = 32
 CAPTURE_FPS_STAT_QUEUE_LENGTH = 32
+# Interval (ms) at which thread statistics are published to the GUI (at most one update per stream and interval)
+STATISTICS_PUBLISH_INTERVAL = 250
+# Number of frames used for image buffer queue wait percentiles
+BUFFER_STAT_QUEUE_LENGTH = 256
+# Number of frame sets used for stream synchronization skew percentiles
+SYNC_SKEW_STAT_QUEUE_LENGTH = 256
 
+# Image buffer type
+DEFAULT_IMAGE_BUFFER_TYPE = 'queue'  # 'queue' -> Buffer, 'mailbox' -> MailboxBuffer (newest frame only),
+#                                     'fanout' -> FanOutBuffer (shared by multiple consumers)
 # Image buffer size
 DEFAULT_IMAGE_BUFFER_SIZE = 2
+# Image buffer size unit
+DEFAULT_IMAGE_BUFFER_SIZE_UNIT = 'frames'  # 'frames', 'MB' or 'ms' (converted to frames on connect),
+#                                            'auto' -> target latency (ms), buffer resized from measured FPS
+# Auto-sized image buffer: size limits (frames) and relative size change ignored
+IMAGE_BUFFER_AUTO_SIZE_MIN = 1
+IMAGE_BUFFER_AUTO_SIZE_MAX = 999
+IMAGE_BUFFER_AUTO_SIZE_HYSTERESIS = 0.2
+# Ceiling on the memory held by all image buffers together (MB, 0: unlimited)
+DEFAULT_IMAGE_BUFFER_MEMORY_LIMIT = 1024
+# Frames preallocated by the capture frame pool in addition to the image buffer size
+# (frame being retrieved + frame being processed)
+FRAME_POOL_EXTRA_FRAMES = 2
 # Drop frame if image/frame buffer is full
 DEFAULT_DROP_FRAMES = True
+# Process local files as fast as possible: no pacing, capture blocks on a full image buffer instead of dropping frames
+DEFAULT_UNPACED_FILE_PROCESSING = False
 # ApiPreference for OpenCv.VideoCapture
 DEFAULT_APIPREFERENCE = 'CAP_ANY'
+# Network stream open/read timeouts (ms) and reconnect backoff (ms, doubled after every failed attempt up to maximum)
+CAPTURE_OPEN_TIMEOUT = 5000
+CAPTURE_READ_TIMEOUT = 5000
+RECONNECT_BACKOFF_INITIAL = 500
+RECONNECT_BACKOFF_MAX = 16000
+# Capture pacing: schedule offset (ms) treated as a discontinuity (schedule restarted), part of a wait (ms) done
+# with a precise sleep instead of a cancellable wait, and upper bin edges (ms) of the pacing jitter histogram
+PACING_RESYNC_THRESHOLD = 500
+PACING_PRECISE_SLEEP_TIME = 2
+PACING_JITTER_HISTOGRAM_BINS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20]
+# Interpolation used to resize frames in the capture thread if the backend ignores the requested resolution
+CAPTURE_RESIZE_INTERPOLATION = 3  # Options: [NEAREST=0,LINEAR=1,CUBIC=2,AREA=3]
+# Suffix of the keyframe index cached next to local video files (used for seeking)
+KEYFRAME_INDEX_CACHE_SUFFIX = '.kfidx.npz'
+# Seek slider page step (ms)
+SEEK_SLIDER_PAGE_STEP = 10000
+# Capture decimation: skipped frames are grabbed but not decoded
+DEFAULT_DECIMATION = 1  # Keep every Nth frame (1: keep all frames) or target FPS (0: keep all frames)
+DEFAULT_DECIMATION_UNIT = 'frames'  # 'frames' -> keep every Nth frame, 'fps' -> keep frames at a target rate
+# Interval (ms) at which waits that cannot be woken by a cancellation token (shared memory buffers) check it
+CANCELLATION_POLL_INTERVAL = 50
+# Order in which enabled image processing stages are applied (see ImageProcessing.PROCESSING_STAGES)
+PROCESSING_STAGE_ORDER = ['grayscale', 'smooth', 'dilate', 'erode', 'flip', 'canny']
+# Processing mode
+DEFAULT_PROCESSING_MODE = 'thread'  # 'thread' -> ProcessingThread, 'process' -> worker process per stream,
+#                                     'pool' -> ProcessingThread handing frames to a pool of worker threads
+# Pool processing mode: worker threads per stream and frames queued per worker
+PROCESSING_POOL_WORKERS = 4
+PROCESSING_POOL_QUEUE_DEPTH = 2
+# Multiprocessing start method used for processing worker processes
+PROCESSING_PROCESS_START_METHOD = 'spawn'
+# Number of processed frames buffered between worker process and GUI
+PROCESSING_PROCESS_RESULT_BUFFER_SIZE = 2
+# Shared memory buffer poll timeout (ms) used to check stop requests
+PROCESSING_PROCESS_POLL_TIMEOUT = 100
+# Maximum time (ms) to wait for a worker process to exit before terminating it
+PROCESSING_PROCESS_JOIN_TIMEOUT = 2000
+# Stream synchronization
+# Maximum time (ms) streams wait for each other at the synchronization barrier, and number of consecutive rounds a
+# stream may miss before it is evicted (it rejoins as soon as it reaches the barrier again)
+SYNC_BARRIER_TIMEOUT = 1000
+SYNC_MAX_MISSED_ROUNDS = 3
+DEFAULT_SYNC_MODE = 'barrier'  # 'barrier' -> capture threads wait for each other before every grab,
+#                                'timestamp' -> capture freely, frames matched by capture timestamp
+# Maximum capture timestamp skew (ms) between the frames of a matched frame set
+SYNC_TIMESTAMP_TOLERANCE = 20
+# Maximum number of unmatched frames kept per stream by the timestamp matcher
+SYNC_MATCHER_HISTORY_LENGTH = 8
 # Thread priorities
 DEFAULT_CAP_THREAD_PRIO = QThread.NormalPriority
 DEFAULT_PROC_THREAD_PRIO = QThread.HighestPriority
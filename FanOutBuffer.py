@@ -0,0 +1,347 @@
+from PyQt5.QtCore import QMutex, QMutexLocker, QWaitCondition
+import time
+
+from BufferStatistics import BufferStatistics
+from CancellationToken import deadlineFromTimeout, waitUntil
+from MemoryBudget import frameBytes
+
+
+class FanOutConsumer(object):
+    # Handle through which one registered consumer reads a FanOutBuffer (same get/size/clear API as Buffer)
+    def __init__(self, fanOutBuffer, name, dropIfFull, cursor, autoRelease=True):
+        self.fanOutBuffer = fanOutBuffer
+        self.name = name
+        # Drop policy of this consumer (None: use dropIfFull passed to FanOutBuffer.add)
+        self.dropIfFull = dropIfFull
+        # Sequence number of next frame to read
+        self.cursor = cursor
+        # True: frames are held until next get() (or release()), False: until released with release(frame)
+        self.autoRelease = autoRelease
+        # Sequence numbers of frames returned by get()/getMany() and not released yet
+        self.heldSequences = []
+        self.nFramesDropped = 0
+
+    def get(self, timeout=None, cancellationToken=None):
+        item = self.fanOutBuffer.getForConsumer(self, timeout, cancellationToken)
+        return None if item is None else item[1]
+
+    def getTimestamped(self, timeout=None, cancellationToken=None):
+        return self.fanOutBuffer.getForConsumer(self, timeout, cancellationToken)
+
+    def getMany(self, maxCount, timeout=None, cancellationToken=None):
+        return self.fanOutBuffer.getManyForConsumer(self, maxCount, timeout, cancellationToken)
+
+    def drain(self):
+        return self.fanOutBuffer.getManyForConsumer(self, self.fanOutBuffer.bufferSize, 0)
+
+    def release(self, frame=None):
+        # Releases frame (None: all frames held by this consumer)
+        self.fanOutBuffer.releaseForConsumer(self, frame)
+
+    def clear(self):
+        return self.fanOutBuffer.clearForConsumer(self)
+
+    def getStatistics(self):
+        return self.fanOutBuffer.getStatistics()
+
+    def size(self):
+        return self.fanOutBuffer.sequence - self.cursor
+
+    def maxSize(self):
+        return self.fanOutBuffer.bufferSize
+
+    def isFull(self):
+        return self.size() == self.fanOutBuffer.bufferSize
+
+    def isEmpty(self):
+        return self.size() == 0
+
+
+class FanOutBuffer(object):
+    # One producer, N registered consumers: every consumer reads every frame (read-only, not copied) through its own
+    # cursor and drop policy. A frame is released (see setReleaseCallback) once the last consumer is done with it.
+    def __init__(self, size):
+        # Save buffer size
+        self.bufferSize = size
+        # Preallocate slots (ring buffer indexed by sequence number) and their enqueue times
+        self.slots = [None] * self.bufferSize
+        self.stamps = [0] * self.bufferSize
+        # Capture timestamps (perf_counter_ns) of frames (used to match frames of different streams)
+        self.timestamps = [0] * self.bufferSize
+        # Sequence number of next frame to add
+        self.sequence = 0
+        # Registered consumers
+        self.consumers = []
+        # Live frames and number of consumers still referencing them: {sequence number: [frame, count]}
+        # (a frame held by a consumer may outlive its ring slot)
+        self.references = dict()
+        # Called with each frame once no consumer references it anymore
+        self.releaseCallback = None
+        # Create mutex and wait conditions
+        self.mutex = QMutex()
+        self.notEmpty = QWaitCondition()
+        self.notFull = QWaitCondition()
+        # Drop/blocking counters and queue wait samples
+        self.statistics = BufferStatistics()
+        # Process-wide memory budget (set by SharedImageBuffer)
+        self.memoryBudget = None
+
+    def setMemoryBudget(self, memoryBudget):
+        self.memoryBudget = memoryBudget
+
+    def setReleaseCallback(self, releaseCallback):
+        with QMutexLocker(self.mutex):
+            self.releaseCallback = releaseCallback
+
+    def registerConsumer(self, name, dropIfFull=None, autoRelease=True):
+        with QMutexLocker(self.mutex):
+            # New consumers only see frames added from now on
+            consumer = FanOutConsumer(self, name, dropIfFull, self.sequence, autoRelease)
+            self.consumers.append(consumer)
+        return consumer
+
+    def unregisterConsumer(self, consumer):
+        with QMutexLocker(self.mutex):
+            # Release held and unread frames of consumer
+            self.releaseHeld(consumer)
+            for sequence in range(consumer.cursor, self.sequence):
+                self.releaseReference(sequence)
+            consumer.cursor = self.sequence
+            self.consumers.remove(consumer)
+            # Consumer may have been the one holding back the producer
+            self.notFull.wakeAll()
+
+    def add(self, data, dropIfFull=False, timeout=None, cancellationToken=None, timestamp=None):
+        # Frames are released through the release callback: always returns an empty list (no frame for the caller to
+        # recycle)
+        # Waits at most timeout ms (None: no limit) for consumers without drop policy, or until cancellationToken
+        # is cancelled (frame is then dropped). timestamp: capture time (perf_counter_ns), None: time frame is added
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        # Reserve memory for frame (outside of buffer lock: waiting here must not stop the consumers)
+        reserved = True
+        if self.memoryBudget is not None:
+            t = time.perf_counter_ns()
+            reserved = self.memoryBudget.reserve(frameBytes(data), not dropIfFull, deadline, cancellationToken)
+            blockedTime = time.perf_counter_ns() - t
+        with QMutexLocker(self.mutex):
+            # Memory ceiling hit: consumers with drop policy skip their oldest unread frame until the new frame fits
+            # (memory of a frame is freed once no consumer references it)
+            while not reserved:
+                droppingConsumers = [consumer for consumer in self.consumers if consumer.cursor < self.sequence and
+                                     (dropIfFull if consumer.dropIfFull is None else consumer.dropIfFull)]
+                if not droppingConsumers:
+                    break
+                oldest = min(consumer.cursor for consumer in droppingConsumers)
+                for consumer in droppingConsumers:
+                    if consumer.cursor == oldest:
+                        self.releaseReference(consumer.cursor)
+                        consumer.cursor += 1
+                        consumer.nFramesDropped += 1
+                        self.statistics.frameDropped()
+                reserved = self.memoryBudget.reserve(frameBytes(data), False)
+            # No consumer registered or memory ceiling hit (no frame to skip left): frame is not stored
+            if not self.consumers or not reserved:
+                if reserved:
+                    self.releaseMemory(data)
+                self.statistics.frameDropped()
+                self.releaseFrame(data)
+                return []
+            t = None
+            while self.sequence - min(consumer.cursor for consumer in self.consumers) == self.bufferSize:
+                # Consumers a full ring behind with drop policy skip their oldest frame
+                for consumer in self.consumers:
+                    if (self.sequence - consumer.cursor == self.bufferSize
+                            and (dropIfFull if consumer.dropIfFull is None else consumer.dropIfFull)):
+                        self.releaseReference(consumer.cursor)
+                        consumer.cursor += 1
+                        consumer.nFramesDropped += 1
+                        self.statistics.frameDropped()
+                # Consumers without drop policy are still a full ring behind: wait for them
+                if self.sequence - min(consumer.cursor for consumer in self.consumers) == self.bufferSize:
+                    if t is None:
+                        t = time.perf_counter_ns()
+                    # Timed out or cancelled: drop new frame
+                    if not waitUntil(self.notFull, self.mutex, deadline, cancellationToken):
+                        self.releaseMemory(data)
+                        self.statistics.frameDropped()
+                        self.releaseFrame(data)
+                        return []
+            if t is not None:
+                blockedTime += time.perf_counter_ns() - t
+            # Frame is shared by all consumers: make it read-only
+            if hasattr(data, 'flags'):
+                data.flags.writeable = False
+            # Add frame to ring
+            self.slots[self.sequence % self.bufferSize] = data
+            self.stamps[self.sequence % self.bufferSize] = time.perf_counter_ns()
+            self.timestamps[self.sequence % self.bufferSize] = (self.stamps[self.sequence % self.bufferSize]
+                                                                if timestamp is None else timestamp)
+            self.references[self.sequence] = [data, len(self.consumers)]
+            self.sequence += 1
+            self.statistics.frameAdded(blockedTime)
+            # Wake all waiting consumers
+            self.notEmpty.wakeAll()
+        return []
+
+    def getForConsumer(self, consumer, timeout=None, cancellationToken=None):
+        # Returns (capture timestamp, frame); waits at most timeout ms (None: no limit) for a frame, or until
+        # cancellationToken is cancelled: returns None
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.mutex):
+            # Frame returned by previous get() is no longer used by this consumer
+            if consumer.autoRelease:
+                self.releaseHeld(consumer)
+            # Wait for a frame this consumer has not read yet
+            if consumer.cursor == self.sequence:
+                t = time.perf_counter_ns()
+                while consumer.cursor == self.sequence:
+                    if not waitUntil(self.notEmpty, self.mutex, deadline, cancellationToken):
+                        return None
+                blockedTime = time.perf_counter_ns() - t
+            # Take frame (without removing it for the other consumers)
+            data = self.slots[consumer.cursor % self.bufferSize]
+            timestamp = self.timestamps[consumer.cursor % self.bufferSize]
+            self.statistics.frameTaken(time.perf_counter_ns() - self.stamps[consumer.cursor % self.bufferSize],
+                                       blockedTime)
+            consumer.heldSequences.append(consumer.cursor)
+            consumer.cursor += 1
+            # Wake waiting producer
+            self.notFull.wakeAll()
+        # Return item to caller
+        return timestamp, data
+
+    def getManyForConsumer(self, consumer, maxCount, timeout=None, cancellationToken=None):
+        # Takes up to maxCount frames under a single lock acquisition, waiting at most timeout ms (None: no limit)
+        # for the first one. Returns a (possibly empty) list, oldest frame first.
+        blockedTime = 0
+        items = []
+        deadline = deadlineFromTimeout(timeout)
+        with QMutexLocker(self.mutex):
+            # Frames returned by previous get() are no longer used by this consumer
+            if consumer.autoRelease:
+                self.releaseHeld(consumer)
+            # Wait for a frame this consumer has not read yet
+            if consumer.cursor == self.sequence and timeout != 0:
+                t = time.perf_counter_ns()
+                while consumer.cursor == self.sequence:
+                    if not waitUntil(self.notEmpty, self.mutex, deadline, cancellationToken):
+                        break
+                blockedTime = time.perf_counter_ns() - t
+            # Take frames (without removing them for the other consumers)
+            now = time.perf_counter_ns()
+            while consumer.cursor < self.sequence and len(items) < maxCount:
+                items.append(self.slots[consumer.cursor % self.bufferSize])
+                self.statistics.frameTaken(now - self.stamps[consumer.cursor % self.bufferSize], blockedTime)
+                blockedTime = 0
+                consumer.heldSequences.append(consumer.cursor)
+                consumer.cursor += 1
+            # Wake waiting producer
+            if items:
+                self.notFull.wakeAll()
+        return items
+
+    def releaseForConsumer(self, consumer, frame=None):
+        with QMutexLocker(self.mutex):
+            if frame is None:
+                self.releaseHeld(consumer)
+                return
+            # Release a single held frame
+            for sequence in consumer.heldSequences:
+                if self.references[sequence][0] is frame:
+                    consumer.heldSequences.remove(sequence)
+                    self.releaseReference(sequence)
+                    return
+
+    def clearForConsumer(self, consumer):
+        with QMutexLocker(self.mutex):
+            # Check if consumer has unread frames
+            if consumer.cursor < self.sequence:
+                for sequence in range(consumer.cursor, self.sequence):
+                    self.releaseReference(sequence)
+                consumer.cursor = self.sequence
+                # Allow blocked producer to resume
+                self.notFull.wakeAll()
+                return True
+            else:
+                return False
+
+    def releaseHeld(self, consumer):
+        # Must be called with mutex locked
+        for sequence in consumer.heldSequences:
+            self.releaseReference(sequence)
+        consumer.heldSequences = []
+
+    def releaseReference(self, sequence):
+        # Must be called with mutex locked
+        reference = self.references[sequence]
+        reference[1] -= 1
+        if reference[1] == 0:
+            del self.references[sequence]
+            self.releaseMemory(reference[0])
+            self.releaseFrame(reference[0])
+
+    def releaseFrame(self, data):
+        if self.releaseCallback is not None:
+            self.releaseCallback(data)
+
+    def releaseMemory(self, data):
+        if self.memoryBudget is not None:
+            self.memoryBudget.release(frameBytes(data))
+
+    def resize(self, size):
+        # Frames dropped because they no longer fit are released through the release callback: always returns []
+        with QMutexLocker(self.mutex):
+            # Consumers more than size frames behind skip their oldest frames
+            for consumer in self.consumers:
+                while self.sequence - consumer.cursor > size:
+                    self.releaseReference(consumer.cursor)
+                    consumer.cursor += 1
+                    consumer.nFramesDropped += 1
+                    self.statistics.frameDropped()
+            # Move unread frames to their slots in the new ring
+            slots = [None] * size
+            stamps = [0] * size
+            timestamps = [0] * size
+            for sequence in range(max(0, self.sequence - min(self.bufferSize, size)), self.sequence):
+                slots[sequence % size] = self.slots[sequence % self.bufferSize]
+                stamps[sequence % size] = self.stamps[sequence % self.bufferSize]
+                timestamps[sequence % size] = self.timestamps[sequence % self.bufferSize]
+            self.slots = slots
+            self.stamps = stamps
+            self.timestamps = timestamps
+            self.bufferSize = size
+            # Allow blocked producer to resume
+            self.notFull.wakeAll()
+        return []
+
+    def clear(self):
+        # Clear unread frames of all consumers
+        with QMutexLocker(self.mutex):
+            consumers = list(self.consumers)
+        cleared = False
+        for consumer in consumers:
+            cleared = self.clearForConsumer(consumer) or cleared
+        return cleared
+
+    def getStatistics(self):
+        with QMutexLocker(self.mutex):
+            statistics = self.statistics.copy()
+        return statistics.getStatisticsData()
+
+    def size(self):
+        # Number of frames not yet read by all consumers
+        with QMutexLocker(self.mutex):
+            if not self.consumers:
+                return 0
+            return self.sequence - min(consumer.cursor for consumer in self.consumers)
+
+    def maxSize(self):
+        return self.bufferSize
+
+    def isFull(self):
+        return self.size() == self.bufferSize
+
+    def isEmpty(self):
+        return self.size() == 0
@@ -100,6 +100,10 @@ class FrameLabel(QLabel):
         action.setText("Scale to Fit Frame")
         action.setCheckable(True)
         self.menu.addAction(action)
+        action = QAction(self)
+        action.setText("Record")
+        action.setCheckable(True)
+        self.menu.addAction(action)
         self.menu.addSeparator()
         # Create image processing menu object
         menu_imgProc = QMenu(self)
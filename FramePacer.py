@@ -0,0 +1,102 @@
+import time
+
+from Structures import PacingStatisticsData
+from Config import *
+
+
+class JitterHistogram(object):
+    # Counts of |actual - due| frame times, binned by PACING_JITTER_HISTOGRAM_BINS (ms, upper bin edges)
+    def __init__(self):
+        self.counts = [0] * (len(PACING_JITTER_HISTOGRAM_BINS) + 1)
+        self.nFrames = 0
+        self.jitterSum = 0
+        self.jitterMax = 0
+
+    def add(self, jitter):
+        # Jitter in ns (late: positive, early: negative)
+        jitter = abs(jitter)
+        i = 0
+        while i < len(PACING_JITTER_HISTOGRAM_BINS) and jitter > PACING_JITTER_HISTOGRAM_BINS[i] * 1000000:
+            i += 1
+        self.counts[i] += 1
+        self.nFrames += 1
+        self.jitterSum += jitter
+        self.jitterMax = max(self.jitterMax, jitter)
+
+    def getStatisticsData(self):
+        statsData = PacingStatisticsData()
+        statsData.nFramesPaced = self.nFrames
+        statsData.jitterHistogram = list(self.counts)
+        statsData.jitterMean = self.jitterSum / self.nFrames / 1e6 if self.nFrames > 0 else 0.0
+        statsData.jitterMax = self.jitterMax / 1e6
+        return statsData
+
+    def format(self):
+        lines = []
+        lower = 0
+        for upper, count in zip(PACING_JITTER_HISTOGRAM_BINS + [None], self.counts):
+            label = "%g-%g ms" % (lower, upper) if upper is not None else "> %g ms" % lower
+            share = count / self.nFrames if self.nFrames > 0 else 0.0
+            lines.append("%12s %8d %6.1f%% %s" % (label, count, 100 * share, '#' * int(round(40 * share))))
+            lower = upper
+        return '\n'.join(lines)
+
+
+class FramePacer(object):
+    # Releases frames on an absolute monotonic schedule: frame n is due at startTime + n * interval or, if the source
+    # has presentation timestamps (local files), at startTime + (pts - startPts). Sleep overshoot and time spent
+    # grabbing/processing therefore do not accumulate into drift.
+    def __init__(self, interval, cancellationToken=None):
+        # Frame interval in ns (used for sources without timestamps)
+        self.interval = interval
+        self.cancellationToken = cancellationToken
+        self.histogram = JitterHistogram()
+        # Number of times the schedule was restarted (PTS discontinuity, stall)
+        self.nResyncs = 0
+        self.restart()
+
+    def setInterval(self, interval):
+        self.interval = interval
+        self.restart()
+
+    def restart(self):
+        # Next frame starts a new schedule
+        self.startTime = None
+        self.startPts = None
+        self.nFrames = 0
+
+    def wait(self, pts=None):
+        # Wait until the frame with presentation timestamp pts (ms, None: next frame at fixed interval) is due.
+        # Returns the time (perf_counter_ns) the frame was released.
+        now = time.perf_counter_ns()
+        if self.startTime is None:
+            self.startTime = now
+            self.startPts = pts
+            return now
+        self.nFrames += 1
+        if pts is not None and self.startPts is not None:
+            due = self.startTime + int((pts - self.startPts) * 1000000)
+        else:
+            due = self.startTime + self.nFrames * self.interval
+        # Discontinuity (seek, timestamp jump, stalled source): restart schedule at this frame
+        if abs(due - now) > PACING_RESYNC_THRESHOLD * 1000000:
+            self.nResyncs += 1
+            self.startTime = now
+            self.startPts = pts
+            self.nFrames = 0
+            return now
+        # Coarse wait (ms resolution, cancellable) followed by precise sleep for the remainder
+        if self.cancellationToken is not None and due - now > PACING_PRECISE_SLEEP_TIME * 1000000:
+            if not self.cancellationToken.sleep((due - now) / 1e6 - PACING_PRECISE_SLEEP_TIME):
+                return time.perf_counter_ns()
+        remaining = due - time.perf_counter_ns()
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+        now = time.perf_counter_ns()
+        self.histogram.add(now - due)
+        return now
+
+    def getStatistics(self):
+        statsData = self.histogram.getStatisticsData()
+        statsData.nResyncs = self.nResyncs
+        return statsData
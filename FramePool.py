@@ -0,0 +1,43 @@
+from PyQt5.QtCore import QMutex, QMutexLocker
+import numpy as np
+
+from Structures import Frame
+
+
+class FramePool(object):
+    def __init__(self, width, height, channels, count, dtype=np.uint8):
+        # Save frame geometry
+        self.shape = (height, width, channels)
+        self.dtype = dtype
+        # Create mutex
+        self.mutex = QMutex()
+        # Preallocate frames (recycled together with their envelopes)
+        self.freeFrames = [Frame(np.empty(self.shape, self.dtype)) for _ in range(count)]
+        # Number of frames allocated by this pool so far
+        self.nAllocated = count
+
+    def acquire(self):
+        with QMutexLocker(self.mutex):
+            # Reuse a free frame if one is available
+            if self.freeFrames:
+                return self.freeFrames.pop()
+            # Pool exhausted (e.g. frames discarded by Buffer.clear()): grow
+            self.nAllocated += 1
+        return Frame(np.empty(self.shape, self.dtype))
+
+    def release(self, frame):
+        # Only recycle frames with the geometry of this pool (and not views of other memory, e.g. memory-mapped
+        # recordings)
+        if (frame is None or frame.data is None or frame.data.shape != self.shape or frame.data.dtype != self.dtype
+                or not frame.data.flags.owndata):
+            return
+        # Frame may have been shared read-only (FanOutBuffer)
+        frame.data.flags.writeable = True
+        with QMutexLocker(self.mutex):
+            self.freeFrames.append(frame)
+
+    def size(self):
+        return self.nAllocated
+
+    def freeCount(self):
+        return len(self.freeFrames)
@@ -0,0 +1,82 @@
+from PyQt5.QtCore import qDebug
+import numpy as np
+import os
+
+from Config import *
+
+
+def recordingChunkFilename(filename, chunkNumber):
+    return "%s.%05d" % (filename, chunkNumber)
+
+
+class FrameRecorder(object):
+    # Records frames into a chunked raw container (replayed without decoding by RecordingFrameSource):
+    # <filename>       frame geometry and timestamp index (sequence number, capture time, pts of every frame)
+    # <filename>.<n>   chunk n: raw frames written through a memory map, RECORDING_CHUNK_SIZE MB per chunk
+    # The index is rewritten whenever a chunk is completed and when the recording is closed.
+    def __init__(self, filename, shape, dtype=np.uint8, streamId=''):
+        self.filename = filename
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.streamId = streamId
+        self.frameBytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        # Frames per chunk
+        self.chunkFrames = max(1, RECORDING_CHUNK_SIZE * 1024 * 1024 // self.frameBytes)
+        # Memory map of the chunk being written and its number
+        self.chunk = None
+        self.chunkNumber = 0
+        self.nFrames = 0
+        # Frames not recorded because their geometry differs from the recording (source geometry changed)
+        self.nFramesSkipped = 0
+        # Timestamp index
+        self.sequences = []
+        self.captureTimes = []
+        self.pts = []
+        # Create first chunk (raises OSError if the recording cannot be written)
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.openChunk(0)
+
+    def write(self, frame):
+        if frame.data.shape != self.shape or frame.data.dtype != self.dtype:
+            self.nFramesSkipped += 1
+            return False
+        # Chunk full: continue in a new one
+        if self.nFrames == (self.chunkNumber + 1) * self.chunkFrames:
+            self.openChunk(self.chunkNumber + 1)
+        self.chunk[self.nFrames - self.chunkNumber * self.chunkFrames] = frame.data
+        self.sequences.append(frame.sequence)
+        self.captureTimes.append(frame.captureTime)
+        self.pts.append(frame.pts if frame.pts is not None else np.nan)
+        self.nFrames += 1
+        return True
+
+    def openChunk(self, chunkNumber):
+        # Index covers the completed chunk
+        if self.chunk is not None:
+            self.chunk.flush()
+            self.chunk = None
+            self.saveIndex()
+        self.chunk = np.memmap(recordingChunkFilename(self.filename, chunkNumber), self.dtype, 'w+',
+                               shape=(self.chunkFrames,) + self.shape)
+        self.chunkNumber = chunkNumber
+
+    def close(self):
+        if self.chunk is not None:
+            self.chunk.flush()
+            self.chunk = None
+            # Last chunk only holds the frames written to it
+            os.truncate(recordingChunkFilename(self.filename, self.chunkNumber),
+                        (self.nFrames - self.chunkNumber * self.chunkFrames) * self.frameBytes)
+        self.saveIndex()
+        qDebug("[%s] Recorded %d frames to %s (%d skipped: geometry changed)."
+               % (self.streamId, self.nFrames, self.filename, self.nFramesSkipped))
+
+    def saveIndex(self):
+        # Written to a temporary file first: the recording may be replayed while it is recorded
+        temporaryFilename = "%s.%d.tmp" % (self.filename, os.getpid())
+        with open(temporaryFilename, 'wb') as f:
+            np.savez(f, shape=np.array(self.shape, np.int64), dtype=str(self.dtype), chunkFrames=self.chunkFrames,
+                     streamId=str(self.streamId), sequence=np.array(self.sequences, np.int64),
+                     captureTime=np.array(self.captureTimes, np.int64), pts=np.array(self.pts, np.float64))
+        os.replace(temporaryFilename, self.filename)
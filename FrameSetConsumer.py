@@ -0,0 +1,64 @@
+import time
+
+from CancellationToken import deadlineFromTimeout
+from TimestampMatcher import TimestampMatcher
+from Config import *
+
+
+class FrameSetConsumer(object):
+    # Reads time-aligned frame sets from several streams (each one a FanOutBuffer): frames are not copied and not
+    # taken away from the other consumers of the streams
+    def __init__(self, imageBuffers, deviceUrls, name, tolerance=SYNC_TIMESTAMP_TOLERANCE):
+        self.deviceUrls = list(deviceUrls)
+        # One consumer per stream (drops frames instead of holding back capture, frames held until released)
+        self.consumers = dict((deviceUrl, imageBuffer.registerConsumer(name, True, False))
+                              for deviceUrl, imageBuffer in zip(self.deviceUrls, imageBuffers))
+        self.matcher = TimestampMatcher(self.deviceUrls, tolerance)
+        self.matcher.setReleaseCallback(lambda deviceUrl, frame: self.consumers[deviceUrl].release(frame))
+        # Frame set returned by last get()
+        self.frameSet = None
+
+    def get(self, timeout=None, cancellationToken=None):
+        # Returns a tuple of frame envelopes with read-only frames (one per stream, in the order of deviceUrls)
+        # captured at most tolerance ms apart; waits at most timeout ms (None: no limit), or until cancellationToken is
+        # cancelled: returns None
+        # Frame set returned by previous get() is no longer used
+        self.release()
+        deadline = deadlineFromTimeout(timeout)
+        while True:
+            self.frameSet = self.matcher.match()
+            if self.frameSet is not None:
+                return tuple(frame for _, frame in self.frameSet)
+            # Wait for a new frame of the stream lagging behind
+            deviceUrl = self.matcher.getLaggingName()
+            remaining = None if deadline is None else max(0, (deadline - time.perf_counter_ns()) // 1000000)
+            item = self.consumers[deviceUrl].getTimestamped(remaining, cancellationToken)
+            if item is None:
+                return None
+            self.matcher.add(deviceUrl, *item)
+            # Take frames already available from the other streams
+            for deviceUrl, consumer in self.consumers.items():
+                item = consumer.getTimestamped(0)
+                while item is not None:
+                    self.matcher.add(deviceUrl, *item)
+                    item = consumer.getTimestamped(0)
+
+    def getTimestamps(self):
+        # Capture timestamps (perf_counter_ns) of frame set returned by last get()
+        return None if self.frameSet is None else tuple(timestamp for timestamp, _ in self.frameSet)
+
+    def release(self):
+        if self.frameSet is not None:
+            for deviceUrl, (_, frame) in zip(self.deviceUrls, self.frameSet):
+                self.consumers[deviceUrl].release(frame)
+            self.frameSet = None
+
+    def close(self):
+        # Release all frames and unregister from streams
+        self.release()
+        self.matcher.clear()
+        for consumer in self.consumers.values():
+            consumer.fanOutBuffer.unregisterConsumer(consumer)
+
+    def getStatistics(self):
+        return self.matcher.getStatistics()
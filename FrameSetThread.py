@@ -0,0 +1,75 @@
+from PyQt5.QtCore import QThread, QMutex, QMutexLocker, pyqtSignal, qDebug
+from PyQt5.QtGui import QImage
+import cv2
+
+from CancellationToken import CancellationToken
+from MatToQImage import matToQImage
+from StatisticsPublisher import StatisticsPublisher
+from Structures import *
+from Config import *
+
+
+class FrameSetThread(QThread):
+    # Consumer of time-aligned frame sets of several streams (e.g. stitching, stereo): by default shows the frames of
+    # each set side by side
+    newFrame = pyqtSignal(QImage)
+    updateStatisticsInGUI = pyqtSignal(SyncStatisticsData)
+
+    def __init__(self, sharedImageBuffer, deviceUrls, tolerance=SYNC_TIMESTAMP_TOLERANCE, parent=None):
+        super(FrameSetThread, self).__init__(parent)
+        self.deviceUrls = list(deviceUrls)
+        # Frame set reader (streams must use fan-out buffers)
+        self.frameSetConsumer = sharedImageBuffer.registerFrameSetConsumer(self.deviceUrls, 'frameset', tolerance)
+        # Initialize members
+        self.doStopMutex = QMutex()
+        # Cancelled by stop(): frame set waits of this thread return
+        self.cancellationToken = CancellationToken()
+        self.doStop = False
+        # Publishes frame set statistics to the GUI at STATISTICS_PUBLISH_INTERVAL
+        self.statisticsPublisher = StatisticsPublisher(self.updateStatisticsInGUI)
+
+    def run(self):
+        while True:
+            ##############################
+            # Stop thread if doStop=True #
+            ##############################
+            self.doStopMutex.lock()
+            if self.doStop:
+                self.doStop = False
+                self.cancellationToken.reset()
+                self.doStopMutex.unlock()
+                break
+            self.doStopMutex.unlock()
+            ################################
+            ################################
+
+            # Get time-aligned frame envelopes (read-only frames, not copied)
+            frames = self.frameSetConsumer.get(cancellationToken=self.cancellationToken)
+            # Cancelled by stop(): check doStop again
+            if frames is None:
+                continue
+
+            # Inform GUI thread of new frame (QImage)
+            self.newFrame.emit(matToQImage(self.processFrameSet(frames)))
+            # Inform GUI of updated statistics (coalesced: statistics are only computed when published)
+            self.statisticsPublisher.update(self.frameSetConsumer.getStatistics)
+
+        # Final statistics
+        self.statisticsPublisher.update(self.frameSetConsumer.getStatistics, force=True)
+        # Release frames held by this thread
+        self.frameSetConsumer.close()
+        qDebug("Stopping frame set thread...")
+
+    def processFrameSet(self, frames):
+        # Composite: frames side by side, scaled to the height of the first one
+        frames = [frame.data for frame in frames]
+        height = frames[0].shape[0]
+        frames = [frame if frame.shape[0] == height
+                  else cv2.resize(frame, (frame.shape[1] * height // frame.shape[0], height)) for frame in frames]
+        return cv2.hconcat(frames)
+
+    def stop(self):
+        with QMutexLocker(self.doStopMutex):
+            self.doStop = True
+        # Wake thread if it is waiting for a frame set
+        self.cancellationToken.cancel()
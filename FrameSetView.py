@@ -0,0 +1,51 @@
+from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QSizePolicy
+from PyQt5.QtCore import Qt, qDebug
+from PyQt5.QtGui import QPixmap
+
+from FrameSetThread import FrameSetThread
+from Config import *
+
+
+class FrameSetView(QWidget):
+    # Time-aligned frame sets of streams synchronized by capture timestamp (Options > Timestamp synchronization) and
+    # the skew between the frames of a set
+    def __init__(self, parent, sharedImageBuffer, deviceUrls):
+        super(FrameSetView, self).__init__(parent)
+        self.deviceUrls = list(deviceUrls)
+        # Frame set and statistics labels
+        self.frameLabel = QLabel(self)
+        self.frameLabel.setAlignment(Qt.AlignCenter)
+        self.frameLabel.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.frameLabel.setText("Waiting for frame sets...")
+        self.statisticsLabel = QLabel(self)
+        self.statisticsLabel.setText("")
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.frameLabel, 1)
+        layout.addWidget(self.statisticsLabel)
+        # Create frame set thread
+        self.frameSetThread = FrameSetThread(sharedImageBuffer, self.deviceUrls)
+        # Setup signal/slot connections
+        self.frameSetThread.newFrame.connect(self.updateFrame)
+        self.frameSetThread.updateStatisticsInGUI.connect(self.updateFrameSetThreadStats)
+        # Start frame set thread
+        self.frameSetThread.start()
+
+    def delete(self):
+        # Stop frame set thread (releases its frames and unregisters from the streams)
+        qDebug("About to stop frame set thread...")
+        self.frameSetThread.stop()
+        self.frameSetThread.wait()
+        qDebug("Frame set thread successfully stopped.")
+        self.deleteLater()
+
+    def updateFrame(self, frame):
+        # Display frame set (scaled to fit label)
+        self.frameLabel.setPixmap(
+            QPixmap.fromImage(frame).scaled(self.frameLabel.width(), self.frameLabel.height(), Qt.KeepAspectRatio))
+
+    def updateFrameSetThreadStats(self, statData):
+        # Show matched sets, discarded frames and skew percentiles in statisticsLabel
+        self.statisticsLabel.setText(
+            "Frame sets: [%d] | Discarded frames: [%d] | Skew p50/p95/max: %.1f/%.1f/%.1f ms (tolerance: %d ms)"
+            % (statData.nFrameSetsMatched, statData.nFramesDiscarded, statData.skewP50, statData.skewP95,
+               statData.skewMax, SYNC_TIMESTAMP_TOLERANCE))
@@ -0,0 +1,244 @@
+from urllib.parse import urlsplit, parse_qs
+import bisect
+import cv2
+import numpy as np
+import os
+
+from FrameRecorder import recordingChunkFilename
+from Config import *
+
+
+class SyntheticFrameSource(object):
+    # Moving test pattern (load tests without cameras): colour bars scrolling horizontally, a bouncing box and the frame
+    # number as a row of 32 black/white bits (most significant bit left) in the top left corner. Frame n of a stream
+    # is always the same image (deterministic benchmarks), the stream number offsets the pattern.
+    # Url: synthetic://<stream>[?width=W&height=H&fps=F&channels=1|3]
+    # Implements the part of the cv2.VideoCapture interface used by CaptureThread.
+    def __init__(self):
+        self.opened = False
+        self.stream = 0
+        self.width = SYNTHETIC_SOURCE_WIDTH
+        self.height = SYNTHETIC_SOURCE_HEIGHT
+        self.fps = SYNTHETIC_SOURCE_FPS
+        self.channels = SYNTHETIC_SOURCE_CHANNELS
+        self.frameNumber = -1
+        self.pattern = None
+
+    def open(self, url, apiPreference=cv2.CAP_ANY, params=None):
+        self.release()
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        try:
+            self.stream = int(parts.netloc) if parts.netloc else 0
+            self.width = int(query.get('width', [SYNTHETIC_SOURCE_WIDTH])[0])
+            self.height = int(query.get('height', [SYNTHETIC_SOURCE_HEIGHT])[0])
+            self.fps = float(query.get('fps', [SYNTHETIC_SOURCE_FPS])[0])
+            self.channels = int(query.get('channels', [SYNTHETIC_SOURCE_CHANNELS])[0])
+        except ValueError:
+            return False
+        if self.width <= 0 or self.height <= 0 or self.fps <= 0 or self.channels not in (1, 3):
+            return False
+        self.updatePattern()
+        self.frameNumber = -1
+        self.opened = True
+        return True
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def updatePattern(self):
+        # Colour bars (white, yellow, cyan, green, magenta, red, blue, black) twice side by side: every frame is a
+        # window into the pattern, shifted by SYNTHETIC_SOURCE_SPEED pixels per frame
+        colors = np.array([[255, 255, 255], [0, 255, 255], [255, 255, 0], [0, 255, 0],
+                           [255, 0, 255], [0, 0, 255], [255, 0, 0], [0, 0, 0]], np.uint8)
+        bars = colors[np.arange(self.width) * len(colors) // self.width]
+        pattern = np.tile(np.concatenate((bars, bars))[np.newaxis], (self.height, 1, 1))
+        # Bottom quarter: horizontal gray ramp
+        pattern[self.height * 3 // 4:] = (np.arange(2 * self.width) % self.width * 255
+                                          // max(1, self.width - 1)).astype(np.uint8)[:, np.newaxis]
+        if self.channels == 1:
+            pattern = cv2.cvtColor(pattern, cv2.COLOR_BGR2GRAY)[:, :, np.newaxis]
+        self.pattern = pattern
+
+    def grab(self):
+        if not self.opened:
+            return False
+        self.frameNumber += 1
+        return True
+
+    def retrieve(self, image=None, flag=None):
+        if not self.opened or self.frameNumber < 0:
+            return False, None
+        # Render into image if it has the frame geometry (like cv2.VideoCapture), otherwise into a new frame
+        shape = (self.height, self.width, self.channels)
+        if image is None or image.shape != shape or image.dtype != np.uint8:
+            image = np.empty(shape, np.uint8)
+        offset = (self.frameNumber * SYNTHETIC_SOURCE_SPEED + self.stream * self.width // 8) % self.width
+        np.copyto(image, self.pattern[:, offset:offset + self.width])
+        # Box bouncing vertically
+        size = max(1, min(self.width, self.height) // 8)
+        period = max(1, self.height - size)
+        y = abs((self.frameNumber * SYNTHETIC_SOURCE_SPEED) % (2 * period) - period)
+        x = (self.width - size) // 2
+        image[y:y + size, x:x + size] = 255
+        # Frame number (drawn with numpy only: OpenCV drawing calls release the GIL, which makes capture threads of
+        # many streams convoy behind each other)
+        bitSize = max(1, self.width // 128)
+        bits = (self.frameNumber >> np.arange(31, -1, -1)) & 1
+        image[:bitSize, :32 * bitSize] = np.repeat(bits * 255, bitSize).astype(np.uint8)[:, np.newaxis]
+        return True, image
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, propId):
+        if propId == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        elif propId == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        elif propId == cv2.CAP_PROP_FPS:
+            return self.fps
+        elif propId == cv2.CAP_PROP_POS_FRAMES:
+            return self.frameNumber + 1
+        elif propId == cv2.CAP_PROP_POS_MSEC:
+            return max(0, self.frameNumber) * 1000 / self.fps
+        return 0
+
+    def set(self, propId, value):
+        if propId in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT) and value > 0:
+            if propId == cv2.CAP_PROP_FRAME_WIDTH:
+                self.width = int(value)
+            else:
+                self.height = int(value)
+            self.updatePattern()
+            return True
+        elif propId == cv2.CAP_PROP_FPS and value > 0:
+            self.fps = value
+            return True
+        return False
+
+
+class RecordingFrameSource(object):
+    # Replays a recording made by FrameRecorder (url: its filename). Frames are read-only views into the memory-mapped
+    # chunks: nothing is decoded or copied, pages are read from disk (or the page cache) when the frame is used.
+    # Presentation timestamps are the capture times of the recorded frames (relative to the first one).
+    # Implements the part of the cv2.VideoCapture interface used by CaptureThread.
+    def __init__(self):
+        self.opened = False
+        self.channels = 3
+        # Frames are passed on without copying them into the frame pool
+        self.zeroCopy = True
+        self.filename = None
+        self.shape = None
+        self.dtype = None
+        self.chunkFrames = 0
+        self.chunks = []
+        # Timestamp index (ms, ascending)
+        self.timestamps = []
+        self.position = -1
+
+    def open(self, url, apiPreference=cv2.CAP_ANY, params=None):
+        self.release()
+        try:
+            with np.load(url) as index:
+                self.shape = tuple(int(n) for n in index['shape'])
+                self.dtype = np.dtype(str(index['dtype']))
+                self.chunkFrames = int(index['chunkFrames'])
+                captureTimes = index['captureTime']
+        except (OSError, EOFError, KeyError, ValueError):
+            return False
+        if len(captureTimes) == 0:
+            return False
+        self.filename = url
+        self.channels = self.shape[2]
+        self.timestamps = ((captureTimes - captureTimes[0]) / 1e6).tolist()
+        # Chunks are mapped when their first frame is read
+        self.chunks = [None] * ((len(self.timestamps) - 1) // self.chunkFrames + 1)
+        self.position = -1
+        self.opened = True
+        return True
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+        self.chunks = []
+
+    def grab(self):
+        if not self.opened or self.position + 1 >= len(self.timestamps):
+            return False
+        self.position += 1
+        return True
+
+    def retrieve(self, image=None, flag=None):
+        # image is ignored: the returned frame is a view of the recording
+        if not self.opened or self.position < 0:
+            return False, None
+        chunkNumber, slot = divmod(self.position, self.chunkFrames)
+        if self.chunks[chunkNumber] is None:
+            nFrames = min(self.chunkFrames, len(self.timestamps) - chunkNumber * self.chunkFrames)
+            try:
+                self.chunks[chunkNumber] = np.memmap(recordingChunkFilename(self.filename, chunkNumber), self.dtype,
+                                                     'r', shape=(nFrames,) + self.shape)
+            except (OSError, ValueError):
+                return False, None
+        return True, self.chunks[chunkNumber][slot]
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def get(self, propId):
+        if not self.opened:
+            return 0
+        if propId == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.shape[1]
+        elif propId == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.shape[0]
+        elif propId == cv2.CAP_PROP_FPS:
+            # Average frame rate of the recording
+            if len(self.timestamps) < 2 or self.timestamps[-1] <= 0:
+                return 0
+            return (len(self.timestamps) - 1) * 1000 / self.timestamps[-1]
+        elif propId == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.timestamps)
+        elif propId == cv2.CAP_PROP_POS_FRAMES:
+            return self.position + 1
+        elif propId == cv2.CAP_PROP_POS_MSEC:
+            return self.timestamps[max(0, self.position)]
+        return 0
+
+    def set(self, propId, value):
+        # Seek: next frame is the first one at or after the position
+        if not self.opened:
+            return False
+        if propId == cv2.CAP_PROP_POS_MSEC:
+            self.position = bisect.bisect_left(self.timestamps, value) - 1
+            return True
+        elif propId == cv2.CAP_PROP_POS_FRAMES:
+            self.position = min(max(0, int(value)), len(self.timestamps)) - 1
+            return True
+        return False
+
+
+# Frame sources by url scheme and by filename suffix (sources of other urls are opened with cv2.VideoCapture)
+FRAME_SOURCES = {'synthetic': SyntheticFrameSource}
+FRAME_SOURCE_SUFFIXES = {RECORDING_SUFFIX: RecordingFrameSource}
+
+
+def createFrameSource(deviceUrl):
+    if isinstance(deviceUrl, str):
+        scheme = urlsplit(deviceUrl).scheme
+        if scheme in FRAME_SOURCES:
+            return FRAME_SOURCES[scheme]()
+        suffix = os.path.splitext(deviceUrl)[1]
+        if suffix in FRAME_SOURCE_SUFFIXES:
+            return FRAME_SOURCE_SUFFIXES[suffix]()
+    return cv2.VideoCapture()
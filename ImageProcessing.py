@@ -0,0 +1,91 @@
+from functools import partial
+import cv2
+
+from Structures import *
+from Config import *
+
+# Structuring element used by dilate/erode
+kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+
+
+# Stage factories: return the stage (frame -> frame) with its parameters bound from the settings, None if the stage
+# does nothing with these settings
+
+
+def grayscaleStage(imgProcSettings):
+    def grayscale(currentFrame):
+        # Frames that are already single-channel are passed on
+        if currentFrame.ndim == 3 and (currentFrame.shape[2] == 3 or currentFrame.shape[2] == 4):
+            return cv2.cvtColor(currentFrame, cv2.COLOR_BGR2GRAY)
+        return currentFrame
+    return grayscale
+
+
+def smoothStage(imgProcSettings):
+    if imgProcSettings.smoothType == 0:
+        # BLUR
+        return partial(cv2.blur, ksize=(imgProcSettings.smoothParam1, imgProcSettings.smoothParam2))
+    elif imgProcSettings.smoothType == 1:
+        # GAUSSIAN
+        return partial(cv2.GaussianBlur, ksize=(imgProcSettings.smoothParam1, imgProcSettings.smoothParam2),
+                       sigmaX=imgProcSettings.smoothParam3, sigmaY=imgProcSettings.smoothParam4)
+    elif imgProcSettings.smoothType == 2:
+        # MEDIAN
+        return partial(cv2.medianBlur, ksize=imgProcSettings.smoothParam1)
+    return None
+
+
+def dilateStage(imgProcSettings):
+    return partial(cv2.dilate, kernel=kernel, iterations=imgProcSettings.dilateNumberOfIterations)
+
+
+def erodeStage(imgProcSettings):
+    return partial(cv2.erode, kernel=kernel, iterations=imgProcSettings.erodeUrlOfIterations)
+
+
+def flipStage(imgProcSettings):
+    return partial(cv2.flip, flipCode=imgProcSettings.flipCode)
+
+
+def cannyStage(imgProcSettings):
+    return partial(cv2.Canny, threshold1=imgProcSettings.cannyThreshold1, threshold2=imgProcSettings.cannyThreshold2,
+                   apertureSize=imgProcSettings.cannyApertureSize, L2gradient=imgProcSettings.cannyL2gradient)
+
+
+# Stage factories by name (stages are ordered by PROCESSING_STAGE_ORDER). A stage is enabled by the flag
+# <name>On of ImageProcessingFlags; stages without a flag are always applied.
+PROCESSING_STAGES = {'grayscale': grayscaleStage,
+                     'smooth': smoothStage,
+                     'dilate': dilateStage,
+                     'erode': erodeStage,
+                     'flip': flipStage,
+                     'canny': cannyStage}
+
+
+class ProcessingPipeline(object):
+    # Enabled processing stages compiled into a list of callables: rebuilt when flags/settings change, the per-frame
+    # loop only calls the stages
+    def __init__(self, imgProcFlags=None, imgProcSettings=None, stageOrder=None):
+        self.stageOrder = list(stageOrder if stageOrder is not None else PROCESSING_STAGE_ORDER)
+        self.stages = []
+        self.build(imgProcFlags if imgProcFlags is not None else ImageProcessingFlags(),
+                   imgProcSettings if imgProcSettings is not None else ImageProcessingSettings())
+
+    def build(self, imgProcFlags, imgProcSettings):
+        stages = []
+        for name in self.stageOrder:
+            if getattr(imgProcFlags, name + 'On', True):
+                stage = PROCESSING_STAGES[name](imgProcSettings)
+                if stage is not None:
+                    stages.append(stage)
+        # Replaced at once: a frame is processed by either the previous or the new stages
+        self.stages = stages
+
+    def setStageOrder(self, stageOrder, imgProcFlags, imgProcSettings):
+        self.stageOrder = list(stageOrder)
+        self.build(imgProcFlags, imgProcSettings)
+
+    def process(self, currentFrame):
+        for stage in self.stages:
+            currentFrame = stage(currentFrame)
+        return currentFrame
@@ -0,0 +1,99 @@
+from PyQt5.QtCore import QThread, QMutex, QMutexLocker, qDebug
+import cv2
+import numpy as np
+import os
+import bisect
+
+from CancellationToken import CancellationToken
+from Config import *
+
+
+class KeyframeIndex(QThread):
+    # Keyframe numbers and timestamps of a local video file, built in the background by demuxing the file (packets are
+    # read without decoding) and cached on disk next to it. Keyframes are available while the index is being built.
+    def __init__(self, filename, parent=None):
+        super(KeyframeIndex, self).__init__(parent)
+        self.filename = filename
+        self.cacheFilename = filename + KEYFRAME_INDEX_CACHE_SUFFIX
+        self.mutex = QMutex()
+        # Cancelled by stop()
+        self.cancellationToken = CancellationToken()
+        # Keyframe numbers and presentation timestamps (ms), ascending
+        self.keyframeNumbers = []
+        self.keyframeTimes = []
+        self.complete = False
+
+    def run(self):
+        if self.load():
+            return
+        cap = cv2.VideoCapture(self.filename, cv2.CAP_FFMPEG)
+        # Raw mode: grab() returns packets without decoding them
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            qDebug("[%s] Keyframe index not available (backend cannot read raw packets)." % self.filename)
+            cap.release()
+            return
+        frameNumber = 0
+        while not self.cancellationToken.isCancelled() and cap.grab():
+            # Key flag of the packet (checked against the coding types of a known GOP: Benchmark.py keyframes)
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                with QMutexLocker(self.mutex):
+                    self.keyframeNumbers.append(frameNumber)
+                    self.keyframeTimes.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+            frameNumber += 1
+        cap.release()
+        if self.cancellationToken.isCancelled():
+            return
+        with QMutexLocker(self.mutex):
+            self.complete = True
+        qDebug("[%s] Keyframe index built: %d keyframes in %d frames." % (self.filename, len(self.keyframeNumbers),
+                                                                        frameNumber))
+        self.save()
+
+    def stop(self):
+        self.cancellationToken.cancel()
+
+    def load(self):
+        # Cached index is valid if the file did not change since it was built
+        try:
+            stat = os.stat(self.filename)
+            with np.load(self.cacheFilename) as cache:
+                if int(cache['size']) != stat.st_size or int(cache['mtime']) != stat.st_mtime_ns:
+                    return False
+                with QMutexLocker(self.mutex):
+                    self.keyframeNumbers = cache['keyframeNumbers'].tolist()
+                    self.keyframeTimes = cache['keyframeTimes'].tolist()
+                    self.complete = True
+        except (OSError, EOFError, KeyError, ValueError):
+            return False
+        qDebug("[%s] Keyframe index loaded from %s." % (self.filename, self.cacheFilename))
+        return True
+
+    def save(self):
+        # Index is kept in memory only if it cannot be written next to the file
+        # (written to a temporary file first: other streams of the same file may be loading the cache)
+        temporaryFilename = "%s.%d.%d.tmp" % (self.cacheFilename, os.getpid(), id(self))
+        try:
+            stat = os.stat(self.filename)
+            with open(temporaryFilename, 'wb') as f:
+                np.savez(f, keyframeNumbers=np.array(self.keyframeNumbers, np.int64),
+                         keyframeTimes=np.array(self.keyframeTimes, np.float64),
+                         size=stat.st_size, mtime=stat.st_mtime_ns)
+            os.replace(temporaryFilename, self.cacheFilename)
+        except OSError as e:
+            qDebug("[%s] Could not save keyframe index: %s" % (self.filename, e))
+            # Remove partially written temporary file (if it was created)
+            try:
+                os.remove(temporaryFilename)
+            except OSError:
+                pass
+
+    def isComplete(self):
+        return self.complete
+
+    def findKeyframe(self, position):
+        # Last keyframe at or before position (ms) as (frame number, timestamp), None if the index does not cover it yet
+        with QMutexLocker(self.mutex):
+            i = bisect.bisect_right(self.keyframeTimes, position) - 1
+            if i < 0 or (not self.complete and i == len(self.keyframeTimes) - 1):
+                return None
+            return self.keyframeNumbers[i], self.keyframeTimes[i]
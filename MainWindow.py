@@ -5,7 +5,9 @@ from ui_MainWindow import Ui_MainWindow
 from SharedImageBuffer import SharedImageBuffer
 from CameraConnectDialog import CameraConnectDialog
 from CameraView import CameraView
+from FrameSetView import FrameSetView
 from Buffer import *
+from FanOutBuffer import FanOutBuffer
 from Config import *
 
 
@@ -17,6 +19,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Create dict instead of QMap
         self.deviceUrlDict = dict()
         self.cameraViewDict = dict()
+        # Frame sets of streams synchronized by capture timestamp (tab after the camera tabs)
+        self.frameSetView = None
         # Set start tab as blank
         newTab = QLabel(self.tabWidget)
         newTab.setText("No camera connected.")
@@ -35,8 +39,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionAbout.triggered.connect(self.showAboutDialog)
         self.actionQuit.triggered.connect(self.close)
         self.actionFullScreen.toggled.connect(self.setFullScreen)
+        self.actionTimestampSynchronization.toggled.connect(self.setTimestampSynchronization)
         # Create SharedImageBuffer object
         self.sharedImageBuffer = SharedImageBuffer()
+        self.actionTimestampSynchronization.setChecked(DEFAULT_SYNC_MODE == 'timestamp')
         # Camera number
         self.cameraNum = 0
 
@@ -62,8 +68,24 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 deviceUrl = cameraConnectDialog.getDeviceUrl()
                 # Check if this camera is already connected
                 if deviceUrl not in self.deviceUrlDict:
-                    # Create ImageBuffer with user-defined size
-                    imageBuffer = Buffer(cameraConnectDialog.getImageBufferSize())
+                    # Image buffer capacity given in MB or ms is converted to frames once the source is opened
+                    imageBufferSize = cameraConnectDialog.getImageBufferSize()
+                    imageBufferCapacity = None
+                    if cameraConnectDialog.getImageBufferSizeUnit() != 'frames':
+                        imageBufferCapacity = (imageBufferSize, cameraConnectDialog.getImageBufferSizeUnit())
+                        imageBufferSize = DEFAULT_IMAGE_BUFFER_SIZE
+                    # Create ImageBuffer with user-defined type and size
+                    # (streams synchronized by timestamp are read by the frame set view too: fan-out buffer)
+                    if (self.actionSynchronizeStreams.isChecked()
+                            and self.actionTimestampSynchronization.isChecked()):
+                        imageBuffer = FanOutBuffer(imageBufferSize)
+                    elif cameraConnectDialog.getImageBufferType() == 'mailbox':
+                        imageBuffer = MailboxBuffer()
+                        imageBufferCapacity = None
+                    elif cameraConnectDialog.getImageBufferType() == 'fanout':
+                        imageBuffer = FanOutBuffer(imageBufferSize)
+                    else:
+                        imageBuffer = Buffer(imageBufferSize)
                     # Add created ImageBuffer to SharedImageBuffer object
                     self.sharedImageBuffer.add(deviceUrl, imageBuffer, self.actionSynchronizeStreams.isChecked())
                     # Create CameraView
@@ -93,7 +115,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                             cameraConnectDialog.getProcessingThreadPrio(),
                             cameraConnectDialog.getEnableFrameProcessingCheckBoxState(),
                             cameraConnectDialog.getResolutionWidth(),
-                            cameraConnectDialog.getResolutionHeight()):
+                            cameraConnectDialog.getResolutionHeight(),
+                            processingMode=cameraConnectDialog.getProcessingMode(),
+                            imageBufferCapacity=imageBufferCapacity,
+                            decimation=(cameraConnectDialog.getDecimation(),
+                                        cameraConnectDialog.getDecimationUnit()),
+                            unpaced=cameraConnectDialog.getUnpacedCheckBoxState()):
 
                         self.cameraNum += 1
                         # Save tab label
@@ -111,9 +138,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                         # Prevent user from enabling/disabling stream synchronization
                         # after a camera has been connected
                         self.actionSynchronizeStreams.setEnabled(False)
+                        self.actionTimestampSynchronization.setEnabled(False)
                         # Add to map
                         self.cameraViewDict[deviceUrl] = cameraView
                         self.deviceUrlDict[deviceUrl] = nextTabIndex
+                        # Processing started on streams synchronized by timestamp: show their frame sets
+                        self.updateFrameSetView()
                     # Could not connect to camera
                     else:
                         # Display error message
@@ -155,8 +185,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             if ret == QMessageBox.No:
                 doDisconnect = False
 
+        # Frame set tab closed: only stop frame set view
+        if self.frameSetView is not None and self.tabWidget.widget(index) is self.frameSetView:
+            self.deleteFrameSetView()
+            doDisconnect = False
+
         # Disconnect camera
         if doDisconnect:
+            # Frame set view reads from the stream (its tab is the last one)
+            self.deleteFrameSetView()
+
             # Save deviceUrl of tabs
             nTabs = self.tabWidget.count()
 
@@ -185,6 +223,31 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.tabWidget.addTab(newTab, "")
                 self.tabWidget.setTabsClosable(False)
                 self.actionSynchronizeStreams.setEnabled(True)
+                self.actionTimestampSynchronization.setEnabled(True)
+
+    def updateFrameSetView(self):
+        if (self.actionSynchronizeStreams.isChecked()
+                and self.sharedImageBuffer.getSyncMode() == 'timestamp'
+                and self.sharedImageBuffer.getSyncEnabled()
+                and len(self.cameraViewDict) > 1):
+            self.showFrameSetView()
+
+    def showFrameSetView(self):
+        # One frame set view (replaced to include all synchronized streams)
+        self.deleteFrameSetView()
+        self.frameSetView = FrameSetView(self.tabWidget, self.sharedImageBuffer, list(self.cameraViewDict.keys()))
+        self.tabWidget.addTab(self.frameSetView, "Frame sets [%s]" % ", ".join(self.cameraViewDict.keys()))
+        self.setTabCloseToolTips(self.tabWidget, "Disconnect Camera")
+
+    def deleteFrameSetView(self):
+        if self.frameSetView is not None:
+            self.tabWidget.removeTab(self.tabWidget.indexOf(self.frameSetView))
+            self.frameSetView.delete()
+            self.frameSetView = None
+
+    def setTimestampSynchronization(self, flag):
+        # Synchronized streams are captured freely and matched by capture timestamp instead of waiting for each other
+        self.sharedImageBuffer.setSyncMode('timestamp' if flag else 'barrier')
 
     def showAboutDialog(self):
         QMessageBox.information(self, "About",
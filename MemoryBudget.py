@@ -0,0 +1,45 @@
+from PyQt5.QtCore import QMutex, QMutexLocker, QWaitCondition
+
+from CancellationToken import waitUntil
+
+
+def frameBytes(data):
+    return getattr(data, 'nbytes', 0)
+
+
+class MemoryBudget(object):
+    # Process-wide ceiling on the memory held by image buffers (shared by all buffers of SharedImageBuffer)
+    def __init__(self, limit=0):
+        # Memory limit in bytes (0: unlimited)
+        self.limit = limit
+        self.used = 0
+        # Create mutex and wait condition
+        self.mutex = QMutex()
+        self.memoryFreed = QWaitCondition()
+
+    def reserve(self, nBytes, block, deadline=None, cancellationToken=None):
+        # Returns False if the ceiling would be exceeded and block is False (or deadline passed/token cancelled)
+        with QMutexLocker(self.mutex):
+            # A single frame larger than the limit is still accepted when no other memory is held
+            while self.limit and self.used > 0 and self.used + nBytes > self.limit:
+                if not block or not waitUntil(self.memoryFreed, self.mutex, deadline, cancellationToken):
+                    return False
+            self.used += nBytes
+            return True
+
+    def release(self, nBytes):
+        if nBytes:
+            with QMutexLocker(self.mutex):
+                self.used -= nBytes
+                self.memoryFreed.wakeAll()
+
+    def setLimit(self, limit):
+        with QMutexLocker(self.mutex):
+            self.limit = limit
+            self.memoryFreed.wakeAll()
+
+    def getLimit(self):
+        return self.limit
+
+    def getUsed(self):
+        return self.used
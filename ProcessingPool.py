@@ -0,0 +1,89 @@
+from PyQt5.QtCore import QThread, QMutex, QMutexLocker, qDebug
+
+from Buffer import Buffer
+from CancellationToken import CancellationToken
+from Config import *
+
+# Result of a task that could not be processed (skipped when results are delivered)
+SKIPPED = object()
+
+
+class ProcessingWorker(QThread):
+    # Takes tasks from the queue of its pool and processes them until the pool is stopped
+    def __init__(self, pool, parent=None):
+        super(ProcessingWorker, self).__init__(parent)
+        self.pool = pool
+
+    def run(self):
+        while True:
+            task = self.pool.taskBuffer.get(cancellationToken=self.pool.cancellationToken)
+            # Cancelled by stop()
+            if task is None:
+                break
+            index, data = task
+            # A frame that cannot be processed (e.g. cv2.error) is skipped: later results must not wait for it
+            try:
+                result = self.pool.process(data)
+            except Exception as e:
+                qDebug("WARNING: Processing worker could not process frame: %s" % e)
+                result = SKIPPED
+            self.pool.complete(index, result)
+
+
+class ProcessingPool(object):
+    # Processes the frames of one stream in nWorkers threads (OpenCV releases the GIL while it processes a frame).
+    # process(task) is called in a worker thread; deliver(result) is called with the results in the order the tasks
+    # were submitted (in the worker thread that completed the task releasing them, one call at a time).
+    def __init__(self, nWorkers, process, deliver):
+        self.process = process
+        self.deliver = deliver
+        # Tasks waiting for a worker: submit() blocks while every worker has PROCESSING_POOL_QUEUE_DEPTH tasks queued
+        self.taskBuffer = Buffer(nWorkers * PROCESSING_POOL_QUEUE_DEPTH)
+        # Cancelled by stop(): workers return, pending tasks are discarded
+        self.cancellationToken = CancellationToken()
+        self.workers = [ProcessingWorker(self) for i in range(nWorkers)]
+        # Results completed ahead of an earlier task, by task index
+        self.reorderMutex = QMutex()
+        self.results = {}
+        self.nextIndex = 0
+        self.nSubmitted = 0
+        # Largest number of results held back at once (waiting for an earlier task)
+        self.maxReordered = 0
+
+    def start(self, priority=QThread.InheritPriority):
+        self.cancellationToken.reset()
+        self.results = {}
+        self.nextIndex = 0
+        self.nSubmitted = 0
+        for worker in self.workers:
+            worker.start(priority)
+
+    def stop(self):
+        self.cancellationToken.cancel()
+        for worker in self.workers:
+            worker.wait()
+        # Discard tasks not taken by a worker
+        while self.taskBuffer.get(0) is not None:
+            pass
+
+    def getWorkerCount(self):
+        return len(self.workers)
+
+    def submit(self, task, cancellationToken=None):
+        # Waits for room in the task queue unless cancellationToken is cancelled: returns False if cancelled
+        index = self.nSubmitted
+        if self.taskBuffer.add((index, task), cancellationToken=cancellationToken):
+            return False
+        self.nSubmitted += 1
+        return True
+
+    def complete(self, index, result):
+        with QMutexLocker(self.reorderMutex):
+            self.results[index] = result
+            self.maxReordered = max(self.maxReordered, len(self.results) - 1)
+            # Deliver every result no earlier task is missing for (delivered under the lock: keeps them in order)
+            while self.nextIndex in self.results:
+                result = self.results.pop(self.nextIndex)
+                self.nextIndex += 1
+                if result is not SKIPPED:
+                    self.deliver(result)
@@ -0,0 +1,85 @@
+import multiprocessing
+import queue
+
+from ImageProcessing import ProcessingPipeline
+from Structures import *
+from Config import *
+
+
+def runProcessingWorker(inputBuffer, outputBuffer, controlQueue, stopEvent):
+    # Runs in the worker process
+    roi = None
+    imgProcFlags = ImageProcessingFlags()
+    imgProcSettings = ImageProcessingSettings()
+    processingPipeline = ProcessingPipeline(imgProcFlags, imgProcSettings)
+    while not stopEvent.is_set():
+        # Apply ROI/flags/settings updates sent by the GUI process
+        while True:
+            try:
+                key, value = controlQueue.get_nowait()
+            except queue.Empty:
+                break
+            if key == 'roi':
+                roi = value
+            elif key == 'flags':
+                imgProcFlags = value
+                processingPipeline.build(imgProcFlags, imgProcSettings)
+            elif key == 'settings':
+                imgProcSettings = value
+                processingPipeline.build(imgProcFlags, imgProcSettings)
+
+        # Get frame from shared memory buffer
+        frame = inputBuffer.get(PROCESSING_PROCESS_POLL_TIMEOUT)
+        if frame is None:
+            continue
+        currentFrame = frame.data
+        # Set ROI
+        if roi is not None:
+            x, y, width, height = roi
+            currentFrame = currentFrame[y:(y + height), x:(x + width)]
+
+        # Processed frame keeps the envelope of its source frame
+        frame.data = processingPipeline.process(currentFrame)
+
+        # Hand processed frame back to the GUI process (only the newest results are kept)
+        outputBuffer.add(frame, True)
+
+    inputBuffer.close()
+    outputBuffer.close()
+
+
+class ProcessingProcess(object):
+    def __init__(self, inputBuffer, outputBuffer):
+        context = multiprocessing.get_context(PROCESSING_PROCESS_START_METHOD)
+        # Save buffers (processed frames are taken from outputBuffer by ProcessingThread)
+        self.inputBuffer = inputBuffer
+        self.outputBuffer = outputBuffer
+        self.controlQueue = context.Queue()
+        self.stopEvent = context.Event()
+        self.process = context.Process(target=runProcessingWorker,
+                                       args=(inputBuffer, outputBuffer, self.controlQueue, self.stopEvent),
+                                       daemon=True)
+
+    def start(self):
+        self.process.start()
+
+    def stop(self):
+        # Ask worker to exit and wait for it (bounded)
+        self.stopEvent.set()
+        if self.process.is_alive():
+            self.process.join(PROCESSING_PROCESS_JOIN_TIMEOUT / 1000)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.outputBuffer.close()
+
+    def isRunning(self):
+        return self.process.is_alive()
+
+    def updateImageProcessingFlags(self, imgProcFlags):
+        self.controlQueue.put(('flags', imgProcFlags))
+
+    def updateImageProcessingSettings(self, imgProcSettings):
+        self.controlQueue.put(('settings', imgProcSettings))
+
+    def setROI(self, roi):
+        self.controlQueue.put(('roi', (roi.x(), roi.y(), roi.width(), roi.height())))
@@ -2,25 +2,45 @@ from PyQt5.QtCore import QThread, QMutex, QTime, qDebug, QMutexLocker, pyqtSigna
 from PyQt5.QtGui import QImage
 from queue import Queue
 import cv2
+import time
 
+from ImageProcessing import ProcessingPipeline
+from ProcessingPool import ProcessingPool
 from MatToQImage import matToQImage
+from CancellationToken import CancellationToken
+from StatisticsPublisher import StatisticsPublisher
 from Structures import *
 from Config import *
 
 
 class ProcessingThread(QThread):
-    newFrame = pyqtSignal(QImage)
+    # Processed frame and envelope of the frame it was processed from (data not set: pixels are in the QImage)
+    newFrame = pyqtSignal(QImage, Frame)
     updateStatisticsInGUI = pyqtSignal(ThreadStatisticsData)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
 
-    def __init__(self, sharedImageBuffer, deviceUrl, cameraId, parent=None):
+    def __init__(self, sharedImageBuffer, deviceUrl, cameraId, framePool=None, processingProcess=None, nWorkers=0,
+                 parent=None):
         super(QThread, self).__init__(parent)
         self.sharedImageBuffer = sharedImageBuffer
         self.cameraId = cameraId
+        # Frame pool of capture thread (frames are returned after the ROI copy)
+        self.framePool = framePool
+        # Worker process running the processing pipeline (None: process frames in this thread)
+        self.processingProcess = processingProcess
+        # Worker threads processing frames in parallel, results are delivered in frame order (None: process frames in
+        # this thread)
+        self.processingPool = (ProcessingPool(nWorkers, self.processPoolTask, self.deliverFrame) if nWorkers > 0
+                               else None)
+        # Time (perf_counter_ns) last frame was delivered by the worker pool
+        self.lastDeliveryTime = None
         # Save Device Url
         self.deviceUrl = deviceUrl
+        # Image buffer (or fan-out consumer handle) frames are taken from
+        self.imageBuffer = sharedImageBuffer.registerConsumer(deviceUrl, 'processing')
         # Initialize members
         self.doStopMutex = QMutex()
+        # Cancelled by stop(): buffer waits of this thread return
+        self.cancellationToken = CancellationToken()
         self.processingMutex = QMutex()
         self.t = QTime()
         self.processingTime = 0
@@ -32,11 +52,20 @@ class ProcessingThread(QThread):
         self.currentROI = QRect()
         self.imgProcFlags = ImageProcessingFlags()
         self.imgProcSettings = ImageProcessingSettings()
+        # Enabled processing stages (rebuilt when flags/settings are updated)
+        self.processingPipeline = ProcessingPipeline(self.imgProcFlags, self.imgProcSettings)
         self.statsData = ThreadStatisticsData()
+        # Publishes snapshots of statsData to the GUI at STATISTICS_PUBLISH_INTERVAL
+        self.statisticsPublisher = StatisticsPublisher(self.updateStatisticsInGUI)
         self.frame = None
         self.currentFrame = None
+        # Sequence number of last frame taken from the image buffer (used to detect lost frames)
+        self.lastSequence = None
 
     def run(self):
+        if self.processingPool is not None:
+            self.lastDeliveryTime = None
+            self.processingPool.start()
         while True:
             ##############################
             # Stop thread if doStop=True #
@@ -44,98 +73,138 @@ class ProcessingThread(QThread):
             self.doStopMutex.lock()
             if self.doStop:
                 self.doStop = False
+                self.cancellationToken.reset()
                 self.doStopMutex.unlock()
                 break
             self.doStopMutex.unlock()
             ################################
             ################################
 
+            # Frames are processed (and delivered in order) by the worker pool
+            if self.processingPool is not None:
+                self.dispatchFrame()
+                continue
+
             # Save processing time
             self.processingTime = self.t.elapsed()
             # Start timer (used to calculate processing rate)
             self.t.start()
 
             with QMutexLocker(self.processingMutex):
-                # Get frame from queue, store in currentFrame, set ROI
-                # self.currentFrame = Mat(self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).get().clone(),
-                #                         self.currentROI)
-                self.currentFrame = self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).get()[
-                                    self.currentROI.y():(self.currentROI.y() + self.currentROI.height()),
-                                    self.currentROI.x():(self.currentROI.x() + self.currentROI.width())].copy()
+                # Frames are processed in a worker process: take the result from its output buffer
+                if self.processingProcess is not None:
+                    processedFrame = self.processingProcess.outputBuffer.get(PROCESSING_PROCESS_POLL_TIMEOUT,
+                                                                            self.cancellationToken)
+                    # No processed frame yet (or cancelled by stop()): check doStop again
+                    if processedFrame is None:
+                        continue
+                    frameInfo = self.takeFrameInfo(processedFrame)
+                    self.currentFrame = processedFrame.data
+                else:
+                    # Get frame from queue, store in currentFrame, set ROI
+                    # self.currentFrame = Mat(self.sharedImageBuffer.getByDeviceUrl(self.deviceUrl).get().clone(),
+                    #                         self.currentROI)
+                    grabbedFrame = self.imageBuffer.get(cancellationToken=self.cancellationToken)
+                    # Cancelled by stop(): check doStop again
+                    if grabbedFrame is None:
+                        continue
+                    frameInfo = self.takeFrameInfo(grabbedFrame)
+                    self.currentFrame = self.copyROI(grabbedFrame)
+
+                    # Example of how to grab a frame from another stream (where Device Url=1)
+                    # Note: This requires stream synchronization to be ENABLED (in the Options menu of MainWindow)
+                    #       and frame processing for the stream you are grabbing FROM to be DISABLED.
+                    # if sharedImageBuffer.containsImageBufferForDeviceUrl(1):
+                    #     # Grab frame from another stream (connected to camera with Device Url=1)
+                    #     Mat frameFromAnotherStream = Mat(sharedImageBuffer.getByDeviceUrl(1).getFrame(), currentROI)
+                    #     # Linear blend images together using OpenCV and save the result to currentFrame.
+                    #     # Note: beta=1-alpha
+                    #     addWeighted(frameFromAnotherStream, 0.5, currentFrame, 0.5, 0.0, currentFrame)
+                    # Time-aligned frames of several streams (using fan-out buffers) can be read without taking them
+                    # away from their consumers: see SharedImageBuffer.registerFrameSetConsumer() and FrameSetThread.
+
+                    ##################################
+                    # PERFORM IMAGE PROCESSING BELOW #
+                    ##################################
 
-                # Example of how to grab a frame from another stream (where Device Url=1)
-                # Note: This requires stream synchronization to be ENABLED (in the Options menu of MainWindow)
-                #       and frame processing for the stream you are grabbing FROM to be DISABLED.
-                # if sharedImageBuffer.containsImageBufferForDeviceUrl(1):
-                #     # Grab frame from another stream (connected to camera with Device Url=1)
-                #     Mat frameFromAnotherStream = Mat(sharedImageBuffer.getByDeviceUrl(1).getFrame(), currentROI)
-                #     # Linear blend images together using OpenCV and save the result to currentFrame. Note: beta=1-alpha
-                #     addWeighted(frameFromAnotherStream, 0.5, currentFrame, 0.5, 0.0, currentFrame)
-
-                ##################################
-                # PERFORM IMAGE PROCESSING BELOW #
-                ##################################
-
-                # Grayscale conversion (in-place operation)
-                if self.imgProcFlags.grayscaleOn and (
-                        self.currentFrame.shape[2] == 3 or self.currentFrame.shape[2] == 4):
-                    self.currentFrame = cv2.cvtColor(self.currentFrame, cv2.COLOR_BGR2GRAY)
-
-                # Smooth (in-place operations)
-                if self.imgProcFlags.smoothOn:
-                    if self.imgProcSettings.smoothType == 0:
-                        # BLUR
-                        self.currentFrame = cv2.blur(self.currentFrame,
-                                                     (self.imgProcSettings.smoothParam1,
-                                                      self.imgProcSettings.smoothParam2))
-                    elif self.imgProcSettings.smoothType == 1:
-                        # GAUSSIAN
-                        self.currentFrame = cv2.GaussianBlur(self.currentFrame,
-                                                             (self.imgProcSettings.smoothParam1,
-                                                              self.imgProcSettings.smoothParam2),
-                                                             sigmaX=self.imgProcSettings.smoothParam3,
-                                                             sigmaY=self.imgProcSettings.smoothParam4)
-                    elif self.imgProcSettings.smoothType == 2:
-                        # MEDIAN
-                        self.currentFrame = cv2.medianBlur(self.currentFrame, self.imgProcSettings.smoothParam1)
-
-                # Dilate
-                if self.imgProcFlags.dilateOn:
-                    self.currentFrame = cv2.dilate(self.currentFrame, self.kernel,
-                                                   iterations=self.imgProcSettings.dilateNumberOfIterations)
-                # Erode
-                if self.imgProcFlags.erodeOn:
-                    self.currentFrame = cv2.erode(self.currentFrame, self.kernel,
-                                                  iterations=self.imgProcSettings.erodeUrlOfIterations)
-                # Flip
-                if self.imgProcFlags.flipOn:
-                    self.currentFrame = cv2.flip(self.currentFrame, self.imgProcSettings.flipCode)
-                # Canny edge detection
-                if self.imgProcFlags.cannyOn:
-                    self.currentFrame = cv2.Canny(self.currentFrame,
-                                                  threshold1=self.imgProcSettings.cannyThreshold1,
-                                                  threshold2=self.imgProcSettings.cannyThreshold2,
-                                                  apertureSize=self.imgProcSettings.cannyApertureSize,
-                                                  L2gradient=self.imgProcSettings.cannyL2gradient)
-
-                ##################################
-                # PERFORM IMAGE PROCESSING ABOVE #
-                ##################################
+                    self.currentFrame = self.processingPipeline.process(self.currentFrame)
+
+                    ##################################
+                    # PERFORM IMAGE PROCESSING ABOVE #
+                    ##################################
 
                 # Convert Mat to QImage
                 self.frame = matToQImage(self.currentFrame)
 
+                # Time from capture to processed frame (moving average)
+                self.statsData.latency += ((time.perf_counter_ns() - frameInfo.captureTime) / 1e6
+                                           - self.statsData.latency) / PROCESSING_FPS_STAT_QUEUE_LENGTH
+
                 # Inform GUI thread of new frame (QImage)
-                self.newFrame.emit(self.frame)
+                self.newFrame.emit(self.frame, frameInfo)
 
             # Update statistics
             self.updateFPS(self.processingTime)
             self.statsData.nFramesProcessed += 1
-            # Inform GUI of updated statistics
-            self.updateStatisticsInGUI.emit(self.statsData)
+            # Inform GUI of updated statistics (coalesced)
+            self.statisticsPublisher.update(self.statsData)
 
+        # Wait for worker pool (frames not processed yet are discarded)
+        if self.processingPool is not None:
+            self.processingPool.stop()
+        # Final statistics
+        self.statisticsPublisher.update(self.statsData, force=True)
         qDebug("Stopping processing thread...")
 
+    def takeFrameInfo(self, grabbedFrame):
+        # Count frames missing from the sequence (dropped by the image buffer)
+        if self.lastSequence is not None and grabbedFrame.sequence > self.lastSequence + 1:
+            self.statsData.nFramesLost += grabbedFrame.sequence - self.lastSequence - 1
+        self.lastSequence = grabbedFrame.sequence
+        # Copy of envelope: grabbed frame is recycled once processed
+        return Frame(None, grabbedFrame.sequence, grabbedFrame.captureTime, grabbedFrame.pts, grabbedFrame.streamId)
+
+    def copyROI(self, grabbedFrame):
+        currentFrame = grabbedFrame.data[self.currentROI.y():(self.currentROI.y() + self.currentROI.height()),
+                                    self.currentROI.x():(self.currentROI.x() + self.currentROI.width())].copy()
+        # Grabbed frame is no longer referenced: return it to the frame pool
+        if self.framePool is not None:
+            self.framePool.release(grabbedFrame)
+        return currentFrame
+
+    def dispatchFrame(self):
+        grabbedFrame = self.imageBuffer.get(cancellationToken=self.cancellationToken)
+        # Cancelled by stop(): check doStop again
+        if grabbedFrame is None:
+            return
+        with QMutexLocker(self.processingMutex):
+            frameInfo = self.takeFrameInfo(grabbedFrame)
+            currentFrame = self.copyROI(grabbedFrame)
+        # Wait for room in the queue of the worker pool (outside of processingMutex: settings can be updated meanwhile)
+        self.processingPool.submit((frameInfo, currentFrame), self.cancellationToken)
+
+    def processPoolTask(self, task):
+        # Called in a worker thread of the pool (pipeline stages are replaced at once when rebuilt: no lock needed)
+        frameInfo, currentFrame = task
+        return matToQImage(self.processingPipeline.process(currentFrame)), frameInfo
+
+    def deliverFrame(self, result):
+        # Called by the worker pool with the processed frames in frame order
+        frame, frameInfo = result
+        now = time.perf_counter_ns()
+        # Time from capture to processed frame (moving average)
+        self.statsData.latency += ((now - frameInfo.captureTime) / 1e6
+                                   - self.statsData.latency) / PROCESSING_FPS_STAT_QUEUE_LENGTH
+        # Inform GUI thread of new frame (QImage)
+        self.newFrame.emit(frame, frameInfo)
+        # Processing rate: time between delivered frames
+        if self.lastDeliveryTime is not None:
+            self.updateFPS((now - self.lastDeliveryTime) / 1e6)
+        self.lastDeliveryTime = now
+        self.statsData.nFramesProcessed += 1
+        # Inform GUI of updated statistics (coalesced)
+        self.statisticsPublisher.update(self.statsData)
+
     def doShowImage(self, val):
         with QMutexLocker(self.processingMutex):
             self.doShow = val
@@ -166,6 +235,8 @@ class ProcessingThread(QThread):
     def stop(self):
         with QMutexLocker(self.doStopMutex):
             self.doStop = True
+        # Wake thread if it is waiting on its image buffer
+        self.cancellationToken.cancel()
 
     def updateBoxesBufferMax(self, boxesBufferMax):
         with QMutexLocker(self.processingMutex):
@@ -179,6 +250,10 @@ class ProcessingThread(QThread):
             self.imgProcFlags.erodeOn = imgProcFlags.erodeOn
             self.imgProcFlags.flipOn = imgProcFlags.flipOn
             self.imgProcFlags.cannyOn = imgProcFlags.cannyOn
+            self.processingPipeline.build(self.imgProcFlags, self.imgProcSettings)
+            # Forward to worker process
+            if self.processingProcess is not None:
+                self.processingProcess.updateImageProcessingFlags(self.imgProcFlags)
 
     def updateImageProcessingSettings(self, imgProcSettings):
         with QMutexLocker(self.processingMutex):
@@ -194,6 +269,10 @@ class ProcessingThread(QThread):
             self.imgProcSettings.cannyThreshold2 = imgProcSettings.cannyThreshold2
             self.imgProcSettings.cannyApertureSize = imgProcSettings.cannyApertureSize
             self.imgProcSettings.cannyL2gradient = imgProcSettings.cannyL2gradient
+            self.processingPipeline.build(self.imgProcFlags, self.imgProcSettings)
+            # Forward to worker process
+            if self.processingProcess is not None:
+                self.processingProcess.updateImageProcessingSettings(self.imgProcSettings)
 
     def setROI(self, roi):
         with QMutexLocker(self.processingMutex):
@@ -201,6 +280,9 @@ class ProcessingThread(QThread):
             self.currentROI.setY(roi.y())
             self.currentROI.setWidth(roi.width())
             self.currentROI.setHeight(roi.height())
+            # Forward to worker process
+            if self.processingProcess is not None:
+                self.processingProcess.setROI(self.currentROI)
 
     def getCurrentROI(self):
         return QRect(self.currentROI.x(), self.currentROI.y(), self.currentROI.width(), self.currentROI.height())
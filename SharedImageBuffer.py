@@ -1,62 +1,163 @@
-from PyQt5.QtCore import QMutexLocker, QMutex, QWaitCondition
+from PyQt5.QtCore import QMutexLocker, QMutex, QWaitCondition, qDebug
+
+from CancellationToken import deadlineFromTimeout, waitUntil
+from Config import *
+from FanOutBuffer import FanOutBuffer
+from FrameSetConsumer import FrameSetConsumer
+from MemoryBudget import MemoryBudget
 
 
 class SharedImageBuffer(object):
     def __init__(self):
         # Initialize variables(s)
-        self.nArrived = 0
         self.doSync = False
         self.syncSet = set()
+        # Barrier round number and streams arrived in current round
+        self.syncRound = 0
+        self.arrivedSet = set()
+        # Streams removed from syncSet after missing SYNC_MAX_MISSED_ROUNDS consecutive rounds (rejoin on next sync())
+        self.evictedSet = set()
+        # Consecutive and total number of barrier rounds missed by each stream
+        self.consecutiveMissedRounds = dict()
+        self.nMissedRounds = dict()
         self.wc = QWaitCondition()
         self.imageBufferDict = dict()
         self.mutex = QMutex()
+        # 'barrier': sync() waits for all synchronized streams, 'timestamp': sync() returns immediately (frames of
+        # synchronized streams are matched by capture timestamp, see TimestampMatcher)
+        self.syncMode = DEFAULT_SYNC_MODE
+        # Ceiling on the memory held by all image buffers (0: unlimited)
+        self.memoryBudget = MemoryBudget(DEFAULT_IMAGE_BUFFER_MEMORY_LIMIT * 1024 * 1024)
 
     def add(self, deviceUrl, imageBuffer, sync=False):
         # Device stream is to be synchronized
         if sync:
             with QMutexLocker(self.mutex):
                 self.syncSet.add(deviceUrl)
+        # Frames held by image buffer count towards the global memory ceiling
+        imageBuffer.setMemoryBudget(self.memoryBudget)
         # Add image buffer to map
         self.imageBufferDict[deviceUrl] = imageBuffer
 
+    def setMemoryLimit(self, limit):
+        # Limit in bytes (0: unlimited)
+        self.memoryBudget.setLimit(limit)
+
+    def getMemoryBudget(self):
+        return self.memoryBudget
+
     def getByDeviceUrl(self, deviceUrl):
         return self.imageBufferDict[deviceUrl]
 
+    def registerConsumer(self, deviceUrl, name, dropIfFull=None):
+        imageBuffer = self.imageBufferDict[deviceUrl]
+        # Fan-out buffers give every registered consumer its own cursor
+        if isinstance(imageBuffer, FanOutBuffer):
+            return imageBuffer.registerConsumer(name, dropIfFull)
+        # Other buffers are read directly by their single consumer
+        return imageBuffer
+
+    def registerFrameSetConsumer(self, deviceUrls, name, tolerance=SYNC_TIMESTAMP_TOLERANCE):
+        # Time-aligned frame sets of several streams (their image buffers must be fan-out buffers)
+        imageBuffers = [self.imageBufferDict[deviceUrl] for deviceUrl in deviceUrls]
+        for deviceUrl, imageBuffer in zip(deviceUrls, imageBuffers):
+            if not isinstance(imageBuffer, FanOutBuffer):
+                raise TypeError("Image buffer of %s is not a fan-out buffer" % deviceUrl)
+        return FrameSetConsumer(imageBuffers, deviceUrls, name, tolerance)
+
     def removeByDeviceUrl(self, deviceUrl):
         # Remove buffer for device from imageBufferDict
         self.imageBufferDict.pop(deviceUrl)
 
         # Also remove from syncSet (if present)
         with QMutexLocker(self.mutex):
+            self.evictedSet.discard(deviceUrl)
+            self.arrivedSet.discard(deviceUrl)
             if self.syncSet.__contains__(deviceUrl):
                 self.syncSet.remove(deviceUrl)
-                self.wc.wakeAll()
+                # Remaining streams may all have arrived
+                if self.doSync and self.arrivedSet >= self.syncSet:
+                    self.completeSyncRound()
 
     def sync(self, deviceUrl):
-        # Only perform sync if enabled for specified device/stream
+        # Streams are captured freely in timestamp mode
+        if self.syncMode == 'timestamp':
+            return
         self.mutex.lock()
+        # Evicted stream is capturing again: rejoin
+        if self.evictedSet.__contains__(deviceUrl):
+            self.evictedSet.remove(deviceUrl)
+            self.syncSet.add(deviceUrl)
+            qDebug("[%s] Stream rejoined synchronization." % deviceUrl)
+        # Only perform sync if enabled for specified device/stream
         if self.syncSet.__contains__(deviceUrl):
-            # Increment arrived count
-            self.nArrived += 1
+            self.arrivedSet.add(deviceUrl)
+            self.consecutiveMissedRounds[deviceUrl] = 0
             # We are the last to arrive: wake all waiting threads
-            if self.doSync and self.nArrived == len(self.syncSet):
-                self.wc.wakeAll()
-            # Still waiting for other streams to arrive: wait
+            if self.doSync and self.arrivedSet >= self.syncSet:
+                self.completeSyncRound()
+            # Still waiting for other streams to arrive: wait (at most SYNC_BARRIER_TIMEOUT ms once sync is enabled)
             else:
-                self.wc.wait(self.mutex)
-            # Decrement arrived count
-            self.nArrived -= 1
+                syncRound = self.syncRound
+                deadline = None
+                while self.syncRound == syncRound:
+                    # Deadline starts once sync is enabled (setSyncEnabled() wakes streams waiting while it is deferred)
+                    if deadline is None and self.doSync:
+                        deadline = deadlineFromTimeout(SYNC_BARRIER_TIMEOUT)
+                    if not waitUntil(self.wc, self.mutex, deadline):
+                        # Deadline passed: continue without the stragglers
+                        self.missSyncRound()
+                        break
         self.mutex.unlock()
 
+    def completeSyncRound(self):
+        # Must be called with mutex locked
+        self.arrivedSet.clear()
+        self.syncRound += 1
+        self.wc.wakeAll()
+
+    def missSyncRound(self):
+        # Must be called with mutex locked
+        for deviceUrl in self.syncSet - self.arrivedSet:
+            self.consecutiveMissedRounds[deviceUrl] = self.consecutiveMissedRounds.get(deviceUrl, 0) + 1
+            self.nMissedRounds[deviceUrl] = self.nMissedRounds.get(deviceUrl, 0) + 1
+            qDebug("[%s] WARNING: Stream missed synchronization round." % deviceUrl)
+            # Evict stream (other streams no longer wait for it)
+            if self.consecutiveMissedRounds[deviceUrl] >= SYNC_MAX_MISSED_ROUNDS:
+                self.syncSet.remove(deviceUrl)
+                self.evictedSet.add(deviceUrl)
+                qDebug("[%s] WARNING: Stream evicted from synchronization." % deviceUrl)
+        self.completeSyncRound()
+
+    def getMissedSyncRounds(self, deviceUrl):
+        return self.nMissedRounds.get(deviceUrl, 0)
+
     def wakeAll(self):
         with QMutexLocker(self.mutex):
-            self.wc.wakeAll()
+            # Release all streams waiting at the barrier
+            self.completeSyncRound()
+
+    def setSyncMode(self, mode):
+        with QMutexLocker(self.mutex):
+            self.syncMode = mode
+            # Release streams waiting at the barrier
+            self.completeSyncRound()
+
+    def getSyncMode(self):
+        return self.syncMode
 
     def setSyncEnabled(self, enable):
-        self.doSync = enable
+        with QMutexLocker(self.mutex):
+            self.doSync = enable
+            # Streams may all be waiting already
+            if self.doSync and self.syncSet and self.arrivedSet >= self.syncSet:
+                self.completeSyncRound()
+            # Streams waiting without deadline (sync was deferred): wait again with one
+            elif self.doSync:
+                self.wc.wakeAll()
 
     def isSyncEnabledForDeviceUrl(self, deviceUrl):
-        return self.syncSet.__contains__(deviceUrl)
+        return self.syncSet.__contains__(deviceUrl) or self.evictedSet.__contains__(deviceUrl)
 
     def getSyncEnabled(self):
         return self.doSync
@@ -0,0 +1,185 @@
+from multiprocessing import shared_memory
+import multiprocessing
+import time
+import numpy as np
+
+from BufferStatistics import BufferStatistics
+from Structures import Frame
+from CancellationToken import deadlineFromTimeout
+from Config import *
+
+
+class SharedMemoryBuffer(object):
+    # Buffer (same API as Buffer) whose slots live in a multiprocessing.shared_memory block, so that frames can be
+    # exchanged with worker processes by slot index instead of being pickled. Items are Frame envelopes: their
+    # metadata is kept in shared arrays next to the slots.
+    def __init__(self, size, frameShape, dtype=np.uint8, streamId=None):
+        context = multiprocessing.get_context(PROCESSING_PROCESS_START_METHOD)
+        # Save buffer size and maximum frame geometry
+        self.bufferSize = size
+        self.frameShape = tuple(frameShape)
+        self.dtype = np.dtype(dtype)
+        self.slotBytes = int(np.prod(self.frameShape)) * self.dtype.itemsize
+        # Create shared memory block holding all slots
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slotBytes * self.bufferSize)
+        self.isOwner = True
+        # Shared ring state: [head, count, (height, width, channels) of each slot]
+        self.state = context.RawArray('q', 2 + 3 * self.bufferSize)
+        # Enqueue time of each slot
+        self.stamps = context.RawArray('q', self.bufferSize)
+        # Frame envelope of each slot: [sequence, capture time] and source PTS (NaN: none); all frames belong to
+        # streamId
+        self.frameInfo = context.RawArray('q', 2 * self.bufferSize)
+        self.framePts = context.RawArray('d', self.bufferSize)
+        self.streamId = streamId
+        # Drop/blocking counters and queue wait samples (shared with worker process)
+        self.statistics = BufferStatistics(context.RawArray('q', 5), context.RawArray('q', BUFFER_STAT_QUEUE_LENGTH))
+        # Create lock (the only lock taken per add/get) and wait conditions
+        self.lock = context.Lock()
+        self.notEmpty = context.Condition(self.lock)
+        self.notFull = context.Condition(self.lock)
+        self.attachSlots()
+
+    def __getstate__(self):
+        # Shared memory is re-attached by name in the worker process
+        state = self.__dict__.copy()
+        state['shm'] = self.shm.name
+        state.pop('slots')
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state['shm'])
+        self.isOwner = False
+        self.attachSlots()
+
+    def attachSlots(self):
+        self.slots = np.ndarray((self.bufferSize, self.slotBytes), np.uint8, self.shm.buf)
+
+    def add(self, data, dropIfFull=False, timeout=None, cancellationToken=None, timestamp=None):
+        # Frame is copied into shared memory: the caller's frame is returned (as only item of the list of dropped
+        # frames) as it is no longer referenced
+        # Without dropping, waits at most timeout ms (None: no limit) for room, or until cancellationToken is cancelled
+        # (capture timestamps are not kept: frames are only consumed by the worker process)
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        with self.lock:
+            head = self.state[0]
+            if self.state[1] == self.bufferSize:
+                # If dropping is enabled, do not block if buffer is full
+                if dropIfFull:
+                    # Drop oldest frame
+                    head = self.state[0] = (head + 1) % self.bufferSize
+                    self.state[1] -= 1
+                    self.statistics.frameDropped()
+                # If buffer is full, wait for a free slot
+                else:
+                    t = time.perf_counter_ns()
+                    # Timed out or cancelled: drop new frame
+                    if not self.waitFor(self.notFull, lambda: self.state[1] < self.bufferSize, deadline,
+                                        cancellationToken):
+                        self.statistics.frameDropped()
+                        return [data]
+                    blockedTime = time.perf_counter_ns() - t
+                    head = self.state[0]
+            # Copy frame into tail slot and save its geometry and envelope
+            tail = (head + self.state[1]) % self.bufferSize
+            frame = data.data
+            np.copyto(self.slots[tail, :frame.nbytes].view(self.dtype).reshape(frame.shape), frame)
+            self.state[2 + 3 * tail] = frame.shape[0]
+            self.state[3 + 3 * tail] = frame.shape[1]
+            self.state[4 + 3 * tail] = frame.shape[2] if frame.ndim == 3 else 0
+            self.frameInfo[2 * tail] = data.sequence
+            self.frameInfo[2 * tail + 1] = data.captureTime
+            self.framePts[tail] = np.nan if data.pts is None else data.pts
+            self.stamps[tail] = time.perf_counter_ns()
+            self.state[1] += 1
+            self.statistics.frameAdded(blockedTime)
+            # Wake one waiting consumer
+            self.notEmpty.notify()
+        return [data]
+
+    def get(self, timeout=None, cancellationToken=None):
+        # Timeout in milliseconds (None: wait forever); returns None on timeout or cancellation
+        blockedTime = 0
+        deadline = deadlineFromTimeout(timeout)
+        with self.lock:
+            # Wait for an item
+            if self.state[1] == 0:
+                t = time.perf_counter_ns()
+                if not self.waitFor(self.notEmpty, lambda: self.state[1] > 0, deadline, cancellationToken):
+                    return None
+                blockedTime = time.perf_counter_ns() - t
+            # Copy frame out of head slot
+            head = self.state[0]
+            height, width, channels = self.state[2 + 3 * head:5 + 3 * head]
+            shape = (height, width, channels) if channels else (height, width)
+            pts = self.framePts[head]
+            data = Frame(self.slots[head, :height * width * max(channels, 1) * self.dtype.itemsize].view(
+                self.dtype).reshape(shape).copy(), self.frameInfo[2 * head], self.frameInfo[2 * head + 1],
+                None if np.isnan(pts) else pts, self.streamId)
+            self.statistics.frameTaken(time.perf_counter_ns() - self.stamps[head], blockedTime)
+            self.state[0] = (head + 1) % self.bufferSize
+            self.state[1] -= 1
+            # Wake one waiting producer
+            self.notFull.notify()
+        # Return item to caller
+        return data
+
+    def waitFor(self, condition, predicate, deadline, cancellationToken):
+        # Must be called with lock held; returns False if deadline (perf_counter_ns) passed or token was cancelled
+        # (a CancellationToken cannot wake a multiprocessing condition: it is polled)
+        while not predicate():
+            if cancellationToken is not None and cancellationToken.isCancelled():
+                return False
+            timeout = None
+            if deadline is not None:
+                timeout = (deadline - time.perf_counter_ns()) / 1e9
+                if timeout <= 0:
+                    return False
+            if cancellationToken is not None:
+                timeout = min(CANCELLATION_POLL_INTERVAL / 1000, timeout or CANCELLATION_POLL_INTERVAL / 1000)
+            condition.wait(timeout)
+        return True
+
+    def clear(self):
+        with self.lock:
+            # Check if buffer contains items
+            if self.state[1] > 0:
+                self.state[0] = 0
+                self.state[1] = 0
+                # Allow blocked producers to resume
+                self.notFull.notify_all()
+                return True
+            else:
+                return False
+
+    def close(self):
+        # Detach from (and, in the creating process, free) the shared memory block
+        if self.slots is None:
+            return
+        self.slots = None
+        self.shm.close()
+        if self.isOwner:
+            self.shm.unlink()
+
+    def setMemoryBudget(self, memoryBudget):
+        # Slots are preallocated in shared memory: nothing to account per frame
+        pass
+
+    def getStatistics(self):
+        with self.lock:
+            statistics = self.statistics.copy()
+        return statistics.getStatisticsData()
+
+    def size(self):
+        return self.state[1]
+
+    def maxSize(self):
+        return self.bufferSize
+
+    def isFull(self):
+        return self.state[1] == self.bufferSize
+
+    def isEmpty(self):
+        return self.state[1] == 0
@@ -0,0 +1,34 @@
+import copy
+import time
+
+from Config import *
+
+
+class StatisticsPublisher(object):
+    # Coalesces statistics updates of a thread: the statistics object it keeps updating is published (as a snapshot
+    # owned by the receiver) at most once per interval instead of once per frame
+    def __init__(self, signal, interval=STATISTICS_PUBLISH_INTERVAL):
+        # Bound signal emitted with the snapshot
+        self.signal = signal
+        # Interval in ns
+        self.interval = int(interval * 1000000)
+        self.lastPublishTime = None
+        # Number of updates and number of them published (used to measure the coalescing)
+        self.nUpdates = 0
+        self.nPublished = 0
+
+    def update(self, statsData, force=False):
+        # Publish statsData (or statistics returned by statsData() if it is a function: only called when a snapshot is
+        # published) if the interval elapsed since the last snapshot (force: publish now, e.g. state changes and the
+        # final statistics of a stopping thread). Returns True if a snapshot was published.
+        self.nUpdates += 1
+        now = time.perf_counter_ns()
+        if not force and self.lastPublishTime is not None and now - self.lastPublishTime < self.interval:
+            return False
+        self.lastPublishTime = now
+        self.nPublished += 1
+        if callable(statsData):
+            statsData = statsData()
+        # Snapshot: the thread keeps updating statsData while the GUI thread reads the published copy
+        self.signal.emit(copy.copy(statsData))
+        return True
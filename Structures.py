@@ -34,7 +34,86 @@ class MouseData(object):
         self.rightButtonRelease = bool()
 
 
+class Frame(object):
+    # Envelope of a frame passed from CaptureThread through the image buffer to ProcessingThread (no per-instance
+    # dict: envelopes are recycled together with their frames by FramePool)
+    __slots__ = ('data', 'sequence', 'captureTime', 'pts', 'streamId')
+
+    def __init__(self, data=None, sequence=0, captureTime=0, pts=None, streamId=None):
+        # Image (ndarray)
+        self.data = data
+        # Number of the frame in its stream (frames skipped by decimation are not numbered)
+        self.sequence = sequence
+        # Capture time (perf_counter_ns)
+        self.captureTime = captureTime
+        # Source presentation timestamp (ms, local files only)
+        self.pts = pts
+        # Device Url of stream
+        self.streamId = streamId
+
+    # Buffers account and share envelopes like bare frames
+    @property
+    def nbytes(self):
+        return getattr(self.data, 'nbytes', 0)
+
+    @property
+    def flags(self):
+        return self.data.flags
+
+
 class ThreadStatisticsData(object):
     def __init__(self):
         self.averageFPS = 0.0
         self.nFramesProcessed = 0
+        # Processing: time (ms) from capture to processed frame (moving average) and frames missing from the sequence
+        # (dropped by the image buffer)
+        self.latency = 0.0
+        self.nFramesLost = 0
+        # Source time processed per wall time and position (ms) of the last frame (capture from local files)
+        self.realtimeFactor = 0.0
+        self.position = 0.0
+        # Capture decimation: frames grabbed but not retrieved and retrieve (decode/convert) time (ms) this saved
+        self.nFramesSkipped = 0
+        self.retrieveTimeSaved = 0.0
+        # Capture reconnection: stream currently lost, attempts of the current/last outage, completed reconnects and
+        # total time (ms) the stream was down
+        self.reconnecting = False
+        self.nReconnectAttempts = 0
+        self.nReconnects = 0
+        self.downtime = 0.0
+
+
+class PacingStatisticsData(object):
+    def __init__(self):
+        self.nFramesPaced = 0
+        # Number of times the pacing schedule was restarted (timestamp discontinuity, stalled source)
+        self.nResyncs = 0
+        # |actual - due| frame time (ms) and its histogram (bins: PACING_JITTER_HISTOGRAM_BINS)
+        self.jitterMean = 0.0
+        self.jitterMax = 0.0
+        self.jitterHistogram = []
+
+
+class SyncStatisticsData(object):
+    def __init__(self):
+        self.nFrameSetsMatched = 0
+        # Frames that could not be matched with frames of the other streams
+        self.nFramesDiscarded = 0
+        # Timestamp skew (ms) between the frames of a set (over the last SYNC_SKEW_STAT_QUEUE_LENGTH sets)
+        self.skewP50 = 0.0
+        self.skewP95 = 0.0
+        self.skewMax = 0.0
+
+
+class BufferStatisticsData(object):
+    def __init__(self):
+        self.nFramesAdded = 0
+        self.nFramesTaken = 0
+        self.nFramesDropped = 0
+        # Total time (ms) producer/consumer spent blocked on a full/empty buffer
+        self.producerBlockedTime = 0.0
+        self.consumerBlockedTime = 0.0
+        # Time (ms) frames waited in the buffer (percentiles over the last BUFFER_STAT_QUEUE_LENGTH frames)
+        self.queueWaitP50 = 0.0
+        self.queueWaitP95 = 0.0
+        self.queueWaitP99 = 0.0
@@ -0,0 +1,82 @@
+from collections import deque
+
+from Structures import SyncStatisticsData
+from Config import *
+
+
+class TimestampMatcher(object):
+    # Matches frames of several streams by capture timestamp (soft synchronization): streams are captured freely and
+    # a frame set is formed from frames captured at most tolerance ms apart
+    def __init__(self, names, tolerance=SYNC_TIMESTAMP_TOLERANCE, historyLength=SYNC_MATCHER_HISTORY_LENGTH):
+        self.names = list(names)
+        # Maximum skew (ns) between the frames of a set
+        self.tolerance = int(tolerance * 1000000)
+        # Unmatched (timestamp, frame) pairs of each stream, oldest first
+        self.historyLength = historyLength
+        self.queues = dict((name, deque()) for name in self.names)
+        # Called with (name, frame) for each frame that will never be part of a set
+        self.releaseCallback = None
+        # Statistics
+        self.nFrameSetsMatched = 0
+        self.nFramesDiscarded = 0
+        # Ring of skews (ns) of the most recently matched sets
+        self.skews = [0] * SYNC_SKEW_STAT_QUEUE_LENGTH
+
+    def setReleaseCallback(self, releaseCallback):
+        self.releaseCallback = releaseCallback
+
+    def add(self, name, timestamp, frame):
+        self.queues[name].append((timestamp, frame))
+        # Bound history (stream has run ahead of the others)
+        if len(self.queues[name]) > self.historyLength:
+            self.discard(name)
+
+    def getLaggingName(self):
+        # Stream whose newest unmatched frame is the oldest (a stream without unmatched frames first)
+        return min(self.names, key=lambda name: self.queues[name][-1][0] if self.queues[name] else -1)
+
+    def match(self):
+        # Returns a tuple of (timestamp, frame) pairs (one per stream, in the order of names), or None if no set can be
+        # formed from the frames added so far
+        queues = self.queues
+        while all(queues[name] for name in self.names):
+            # No frame set can be older than the newest of the oldest frames of all streams
+            reference = max(queues[name][0][0] for name in self.names)
+            # Skip frames for which a later frame of the same stream is nearer to reference
+            for name in self.names:
+                while (len(queues[name]) > 1
+                       and abs(queues[name][1][0] - reference) < abs(queues[name][0][0] - reference)):
+                    self.discard(name)
+            oldest = min(self.names, key=lambda name: queues[name][0][0])
+            skew = max(queues[name][0][0] for name in self.names) - queues[oldest][0][0]
+            # Frames are close enough: frame set found
+            if skew <= self.tolerance:
+                self.skews[self.nFrameSetsMatched % len(self.skews)] = skew
+                self.nFrameSetsMatched += 1
+                return tuple(queues[name].popleft() for name in self.names)
+            # Oldest frame is too old to be matched with the other streams (their frames are all newer)
+            self.discard(oldest)
+        return None
+
+    def discard(self, name):
+        _, frame = self.queues[name].popleft()
+        self.nFramesDiscarded += 1
+        if self.releaseCallback is not None:
+            self.releaseCallback(name, frame)
+
+    def clear(self):
+        for name in self.names:
+            while self.queues[name]:
+                self.discard(name)
+
+    def getStatistics(self):
+        statsData = SyncStatisticsData()
+        statsData.nFrameSetsMatched = self.nFrameSetsMatched
+        statsData.nFramesDiscarded = self.nFramesDiscarded
+        # Skew percentiles
+        skews = sorted(self.skews[:min(self.nFrameSetsMatched, len(self.skews))])
+        if skews:
+            statsData.skewP50 = skews[int(0.50 * (len(skews) - 1))] / 1e6
+            statsData.skewP95 = skews[int(0.95 * (len(skews) - 1))] / 1e6
+            statsData.skewMax = skews[-1] / 1e6
+        return statsData
@@ -11,11 +11,11 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_CameraConnectDialog(object):
     def setupUi(self, CameraConnectDialog):
         CameraConnectDialog.setObjectName("CameraConnectDialog")
-        CameraConnectDialog.resize(742, 490)
-        CameraConnectDialog.setMinimumSize(QtCore.QSize(742, 490))
-        CameraConnectDialog.setMaximumSize(QtCore.QSize(742, 490))
+        CameraConnectDialog.resize(742, 619)
+        CameraConnectDialog.setMinimumSize(QtCore.QSize(742, 619))
+        CameraConnectDialog.setMaximumSize(QtCore.QSize(742, 619))
         self.layoutWidget = QtWidgets.QWidget(CameraConnectDialog)
-        self.layoutWidget.setGeometry(QtCore.QRect(10, 10, 721, 471))
+        self.layoutWidget.setGeometry(QtCore.QRect(10, 10, 721, 600))
         self.layoutWidget.setObjectName("layoutWidget")
         self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.layoutWidget)
         self.verticalLayout_4.setContentsMargins(0, 0, 0, 0)
@@ -135,6 +135,37 @@ class Ui_CameraConnectDialog(object):
         self.rtspRadioButton.setObjectName("rtspRadioButton")
         self.gridLayout.addWidget(self.rtspRadioButton, 0, 0, 1, 1)
         self.verticalLayout_3.addLayout(self.gridLayout)
+        self.horizontalLayout_17 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_17.setObjectName("horizontalLayout_17")
+        self.syntheticRadioButton = QtWidgets.QRadioButton(self.layoutWidget)
+        self.syntheticRadioButton.setObjectName("syntheticRadioButton")
+        self.horizontalLayout_17.addWidget(self.syntheticRadioButton)
+        self.label_26 = QtWidgets.QLabel(self.layoutWidget)
+        self.label_26.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_26.setObjectName("label_26")
+        self.horizontalLayout_17.addWidget(self.label_26)
+        self.syntheticStreamEdit = QtWidgets.QLineEdit(self.layoutWidget)
+        self.syntheticStreamEdit.setObjectName("syntheticStreamEdit")
+        self.horizontalLayout_17.addWidget(self.syntheticStreamEdit)
+        self.label_27 = QtWidgets.QLabel(self.layoutWidget)
+        self.label_27.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_27.setObjectName("label_27")
+        self.horizontalLayout_17.addWidget(self.label_27)
+        self.syntheticFpsEdit = QtWidgets.QLineEdit(self.layoutWidget)
+        self.syntheticFpsEdit.setObjectName("syntheticFpsEdit")
+        self.horizontalLayout_17.addWidget(self.syntheticFpsEdit)
+        self.label_28 = QtWidgets.QLabel(self.layoutWidget)
+        self.label_28.setAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignTrailing|QtCore.Qt.AlignVCenter)
+        self.label_28.setObjectName("label_28")
+        self.horizontalLayout_17.addWidget(self.label_28)
+        self.syntheticChannelsComboBox = QtWidgets.QComboBox(self.layoutWidget)
+        self.syntheticChannelsComboBox.setObjectName("syntheticChannelsComboBox")
+        self.horizontalLayout_17.addWidget(self.syntheticChannelsComboBox)
+        self.horizontalLayout_17.setStretch(0, 1)
+        self.horizontalLayout_17.setStretch(2, 1)
+        self.horizontalLayout_17.setStretch(4, 1)
+        self.horizontalLayout_17.setStretch(6, 1)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_17)
         self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_8.setObjectName("horizontalLayout_8")
         self.horizontalLayout_13 = QtWidgets.QHBoxLayout()
@@ -186,6 +217,27 @@ class Ui_CameraConnectDialog(object):
         self.apiPreferenceComboBox.setObjectName("apiPreferenceComboBox")
         self.horizontalLayout_6.addWidget(self.apiPreferenceComboBox)
         self.verticalLayout_3.addLayout(self.horizontalLayout_6)
+        self.horizontalLayout_16 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_16.setObjectName("horizontalLayout_16")
+        self.label_25 = QtWidgets.QLabel(self.layoutWidget)
+        self.label_25.setObjectName("label_25")
+        self.horizontalLayout_16.addWidget(self.label_25)
+        self.decimationEdit = QtWidgets.QLineEdit(self.layoutWidget)
+        self.decimationEdit.setObjectName("decimationEdit")
+        self.horizontalLayout_16.addWidget(self.decimationEdit)
+        self.decimationUnitComboBox = QtWidgets.QComboBox(self.layoutWidget)
+        self.decimationUnitComboBox.setObjectName("decimationUnitComboBox")
+        self.horizontalLayout_16.addWidget(self.decimationUnitComboBox)
+        self.horizontalLayout_16.setStretch(0, 1)
+        self.horizontalLayout_16.setStretch(1, 1)
+        self.horizontalLayout_16.setStretch(2, 1)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_16)
+        self.unpacedCheckBox = QtWidgets.QCheckBox(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        self.unpacedCheckBox.setFont(font)
+        self.unpacedCheckBox.setObjectName("unpacedCheckBox")
+        self.verticalLayout_3.addWidget(self.unpacedCheckBox)
         self.label_3 = QtWidgets.QLabel(self.layoutWidget)
         font = QtGui.QFont()
         font.setPointSize(9)
@@ -194,6 +246,25 @@ class Ui_CameraConnectDialog(object):
         self.label_3.setFont(font)
         self.label_3.setObjectName("label_3")
         self.verticalLayout_3.addWidget(self.label_3)
+        self.horizontalLayout_15 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_15.setObjectName("horizontalLayout_15")
+        self.label_9 = QtWidgets.QLabel(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(False)
+        font.setWeight(50)
+        self.label_9.setFont(font)
+        self.label_9.setObjectName("label_9")
+        self.horizontalLayout_15.addWidget(self.label_9)
+        self.imageBufferTypeComboBox = QtWidgets.QComboBox(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        self.imageBufferTypeComboBox.setFont(font)
+        self.imageBufferTypeComboBox.setObjectName("imageBufferTypeComboBox")
+        self.horizontalLayout_15.addWidget(self.imageBufferTypeComboBox)
+        self.horizontalLayout_15.setStretch(0, 1)
+        self.horizontalLayout_15.setStretch(1, 1)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_15)
         self.horizontalLayout = QtWidgets.QHBoxLayout()
         self.horizontalLayout.setObjectName("horizontalLayout")
         self.horizontalLayout_11 = QtWidgets.QHBoxLayout()
@@ -222,6 +293,12 @@ class Ui_CameraConnectDialog(object):
         self.imageBufferSizeEdit.setFont(font)
         self.imageBufferSizeEdit.setObjectName("imageBufferSizeEdit")
         self.horizontalLayout.addWidget(self.imageBufferSizeEdit)
+        self.imageBufferSizeUnitComboBox = QtWidgets.QComboBox(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        self.imageBufferSizeUnitComboBox.setFont(font)
+        self.imageBufferSizeUnitComboBox.setObjectName("imageBufferSizeUnitComboBox")
+        self.horizontalLayout.addWidget(self.imageBufferSizeUnitComboBox)
         self.horizontalLayout.setStretch(0, 1)
         self.horizontalLayout.setStretch(1, 1)
         self.verticalLayout_3.addLayout(self.horizontalLayout)
@@ -276,6 +353,25 @@ class Ui_CameraConnectDialog(object):
         self.verticalLayout_2.addWidget(self.processingPrioComboBox)
         self.horizontalLayout_3.addLayout(self.verticalLayout_2)
         self.verticalLayout_3.addLayout(self.horizontalLayout_3)
+        self.horizontalLayout_18 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_18.setObjectName("horizontalLayout_18")
+        self.label_29 = QtWidgets.QLabel(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        font.setBold(False)
+        font.setWeight(50)
+        self.label_29.setFont(font)
+        self.label_29.setObjectName("label_29")
+        self.horizontalLayout_18.addWidget(self.label_29)
+        self.processingModeComboBox = QtWidgets.QComboBox(self.layoutWidget)
+        font = QtGui.QFont()
+        font.setPointSize(9)
+        self.processingModeComboBox.setFont(font)
+        self.processingModeComboBox.setObjectName("processingModeComboBox")
+        self.horizontalLayout_18.addWidget(self.processingModeComboBox)
+        self.horizontalLayout_18.setStretch(0, 1)
+        self.horizontalLayout_18.setStretch(1, 1)
+        self.verticalLayout_3.addLayout(self.horizontalLayout_18)
         self.horizontalLayout_5 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_5.setObjectName("horizontalLayout_5")
         self.label_8 = QtWidgets.QLabel(self.layoutWidget)
@@ -334,14 +430,24 @@ class Ui_CameraConnectDialog(object):
         CameraConnectDialog.setTabOrder(self.passwordEdit, self.ipEdit)
         CameraConnectDialog.setTabOrder(self.ipEdit, self.portEdit)
         CameraConnectDialog.setTabOrder(self.portEdit, self.channelsEdit)
-        CameraConnectDialog.setTabOrder(self.channelsEdit, self.resWEdit)
+        CameraConnectDialog.setTabOrder(self.channelsEdit, self.syntheticRadioButton)
+        CameraConnectDialog.setTabOrder(self.syntheticRadioButton, self.syntheticStreamEdit)
+        CameraConnectDialog.setTabOrder(self.syntheticStreamEdit, self.syntheticFpsEdit)
+        CameraConnectDialog.setTabOrder(self.syntheticFpsEdit, self.syntheticChannelsComboBox)
+        CameraConnectDialog.setTabOrder(self.syntheticChannelsComboBox, self.resWEdit)
         CameraConnectDialog.setTabOrder(self.resWEdit, self.resHEdit)
         CameraConnectDialog.setTabOrder(self.resHEdit, self.apiPreferenceComboBox)
-        CameraConnectDialog.setTabOrder(self.apiPreferenceComboBox, self.imageBufferSizeEdit)
-        CameraConnectDialog.setTabOrder(self.imageBufferSizeEdit, self.dropFrameCheckBox)
+        CameraConnectDialog.setTabOrder(self.apiPreferenceComboBox, self.decimationEdit)
+        CameraConnectDialog.setTabOrder(self.decimationEdit, self.decimationUnitComboBox)
+        CameraConnectDialog.setTabOrder(self.decimationUnitComboBox, self.unpacedCheckBox)
+        CameraConnectDialog.setTabOrder(self.unpacedCheckBox, self.imageBufferTypeComboBox)
+        CameraConnectDialog.setTabOrder(self.imageBufferTypeComboBox, self.imageBufferSizeEdit)
+        CameraConnectDialog.setTabOrder(self.imageBufferSizeEdit, self.imageBufferSizeUnitComboBox)
+        CameraConnectDialog.setTabOrder(self.imageBufferSizeUnitComboBox, self.dropFrameCheckBox)
         CameraConnectDialog.setTabOrder(self.dropFrameCheckBox, self.capturePrioComboBox)
         CameraConnectDialog.setTabOrder(self.capturePrioComboBox, self.processingPrioComboBox)
-        CameraConnectDialog.setTabOrder(self.processingPrioComboBox, self.tabLabelEdit)
+        CameraConnectDialog.setTabOrder(self.processingPrioComboBox, self.processingModeComboBox)
+        CameraConnectDialog.setTabOrder(self.processingModeComboBox, self.tabLabelEdit)
         CameraConnectDialog.setTabOrder(self.tabLabelEdit, self.enableFrameProcessingCheckBox)
         CameraConnectDialog.setTabOrder(self.enableFrameProcessingCheckBox, self.resetToDefaultsPushButton)
 
@@ -364,17 +470,25 @@ class Ui_CameraConnectDialog(object):
         self.label_16.setText(_translate("CameraConnectDialog", "ip address"))
         self.label_24.setText(_translate("CameraConnectDialog", ":"))
         self.rtspRadioButton.setText(_translate("CameraConnectDialog", "RTSP:"))
+        self.syntheticRadioButton.setText(_translate("CameraConnectDialog", "Synthetic (test pattern):"))
+        self.label_26.setText(_translate("CameraConnectDialog", "Stream:"))
+        self.label_27.setText(_translate("CameraConnectDialog", "FPS:"))
+        self.label_28.setText(_translate("CameraConnectDialog", "Channels:"))
         self.label_11.setText(_translate("CameraConnectDialog", "Resolution (W x H):"))
         self.label_12.setText(_translate("CameraConnectDialog", "[optional]"))
         self.label_13.setText(_translate("CameraConnectDialog", "x"))
         self.label.setText(_translate("CameraConnectDialog", "apiPreference:"))
+        self.label_25.setText(_translate("CameraConnectDialog", "Decimation:"))
+        self.unpacedCheckBox.setText(_translate("CameraConnectDialog", "Process file as fast as possible (no pacing, no dropped frames)"))
         self.label_3.setText(_translate("CameraConnectDialog", "Image Buffer:"))
+        self.label_9.setText(_translate("CameraConnectDialog", "Type:"))
         self.label_2.setText(_translate("CameraConnectDialog", "Size (number of images/frames):"))
         self.label_4.setText(_translate("CameraConnectDialog", "[1-999]"))
         self.dropFrameCheckBox.setText(_translate("CameraConnectDialog", "Drop frame if image buffer is full"))
         self.label_5.setText(_translate("CameraConnectDialog", "Thread Priorities:"))
         self.label_6.setText(_translate("CameraConnectDialog", "Capture Thread:"))
         self.label_7.setText(_translate("CameraConnectDialog", "Processing Thread:"))
+        self.label_29.setText(_translate("CameraConnectDialog", "Processing Mode:"))
         self.label_8.setText(_translate("CameraConnectDialog", "Tab Label:"))
         self.enableFrameProcessingCheckBox.setText(_translate("CameraConnectDialog", "Enable frame processing"))
         self.resetToDefaultsPushButton.setText(_translate("CameraConnectDialog", "Reset to Defaults"))
@@ -296,6 +296,114 @@ class Ui_CameraView(object):
         self.reconnectButton.setSizePolicy(sizePolicy)
         self.reconnectButton.setObjectName("reconnectButton")
         self.gridLayout.addWidget(self.reconnectButton, 1, 3, 1, 1)
+        self.label_8 = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_8.sizePolicy().hasHeightForWidth())
+        self.label_8.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_8.setFont(font)
+        self.label_8.setAlignment(QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft|QtCore.Qt.AlignVCenter)
+        self.label_8.setObjectName("label_8")
+        self.gridLayout.addWidget(self.label_8, 8, 0, 1, 1)
+        self.queueWaitLabel = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.queueWaitLabel.sizePolicy().hasHeightForWidth())
+        self.queueWaitLabel.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.queueWaitLabel.setFont(font)
+        self.queueWaitLabel.setText("")
+        self.queueWaitLabel.setObjectName("queueWaitLabel")
+        self.gridLayout.addWidget(self.queueWaitLabel, 8, 1, 1, 3)
+        self.label_9 = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_9.sizePolicy().hasHeightForWidth())
+        self.label_9.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_9.setFont(font)
+        self.label_9.setAlignment(QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft|QtCore.Qt.AlignVCenter)
+        self.label_9.setObjectName("label_9")
+        self.gridLayout.addWidget(self.label_9, 9, 0, 1, 1)
+        self.decimationLabel = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.decimationLabel.sizePolicy().hasHeightForWidth())
+        self.decimationLabel.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.decimationLabel.setFont(font)
+        self.decimationLabel.setText("")
+        self.decimationLabel.setObjectName("decimationLabel")
+        self.gridLayout.addWidget(self.decimationLabel, 9, 1, 1, 3)
+        self.label_10 = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_10.sizePolicy().hasHeightForWidth())
+        self.label_10.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_10.setFont(font)
+        self.label_10.setAlignment(QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft|QtCore.Qt.AlignVCenter)
+        self.label_10.setObjectName("label_10")
+        self.gridLayout.addWidget(self.label_10, 10, 0, 1, 1)
+        self.connectionLabel = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.connectionLabel.sizePolicy().hasHeightForWidth())
+        self.connectionLabel.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.connectionLabel.setFont(font)
+        self.connectionLabel.setText("")
+        self.connectionLabel.setObjectName("connectionLabel")
+        self.gridLayout.addWidget(self.connectionLabel, 10, 1, 1, 3)
+        self.label_11 = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.label_11.sizePolicy().hasHeightForWidth())
+        self.label_11.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        font.setBold(True)
+        font.setWeight(75)
+        self.label_11.setFont(font)
+        self.label_11.setAlignment(QtCore.Qt.AlignLeading|QtCore.Qt.AlignLeft|QtCore.Qt.AlignVCenter)
+        self.label_11.setObjectName("label_11")
+        self.gridLayout.addWidget(self.label_11, 11, 0, 1, 1)
+        self.positionLabel = QtWidgets.QLabel(CameraView)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.positionLabel.sizePolicy().hasHeightForWidth())
+        self.positionLabel.setSizePolicy(sizePolicy)
+        font = QtGui.QFont()
+        font.setPointSize(8)
+        self.positionLabel.setFont(font)
+        self.positionLabel.setText("")
+        self.positionLabel.setObjectName("positionLabel")
+        self.gridLayout.addWidget(self.positionLabel, 11, 3, 1, 1)
+        self.seekSlider = QtWidgets.QSlider(CameraView)
+        self.seekSlider.setOrientation(QtCore.Qt.Horizontal)
+        self.seekSlider.setObjectName("seekSlider")
+        self.gridLayout.addWidget(self.seekSlider, 11, 1, 1, 2)
         self.gridLayout.setColumnStretch(0, 1)
         self.gridLayout.setColumnStretch(1, 1)
         self.gridLayout.setColumnStretch(2, 1)
@@ -316,6 +424,10 @@ class Ui_CameraView(object):
         self.label_1.setText(_translate("CameraView", "Image Buffer:"))
         self.label_3.setText(_translate("CameraView", "Processing Rate:"))
         self.label_2.setText(_translate("CameraView", "Capture Rate:"))
+        self.label_8.setText(_translate("CameraView", "Queue Wait:"))
+        self.label_9.setText(_translate("CameraView", "Decimation:"))
+        self.label_10.setText(_translate("CameraView", "Connection:"))
+        self.label_11.setText(_translate("CameraView", "Position:"))
         self.clearImageBufferButton.setText(_translate("CameraView", "Clear Image Buffer"))
         self.startButton.setText(_translate("CameraView", "Start"))
         self.pauseButton.setText(_translate("CameraView", "Pause"))
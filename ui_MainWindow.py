@@ -55,6 +55,9 @@ class Ui_MainWindow(object):
         self.actionSynchronizeStreams = QtWidgets.QAction(MainWindow)
         self.actionSynchronizeStreams.setCheckable(True)
         self.actionSynchronizeStreams.setObjectName("actionSynchronizeStreams")
+        self.actionTimestampSynchronization = QtWidgets.QAction(MainWindow)
+        self.actionTimestampSynchronization.setCheckable(True)
+        self.actionTimestampSynchronization.setObjectName("actionTimestampSynchronization")
         self.actionScaleToFitFrame = QtWidgets.QAction(MainWindow)
         self.actionScaleToFitFrame.setCheckable(True)
         self.actionScaleToFitFrame.setObjectName("actionScaleToFitFrame")
@@ -64,6 +67,7 @@ class Ui_MainWindow(object):
         self.menuFile.addAction(self.actionQuit)
         self.menuHelp.addAction(self.actionAbout)
         self.menuOptions.addAction(self.actionSynchronizeStreams)
+        self.menuOptions.addAction(self.actionTimestampSynchronization)
         self.menuView.addAction(self.actionFullScreen)
         self.menuBar.addAction(self.menuFile.menuAction())
         self.menuBar.addAction(self.menuOptions.menuAction())
@@ -84,6 +88,7 @@ class Ui_MainWindow(object):
         self.actionAbout.setText(_translate("MainWindow", "About"))
         self.actionQuit.setText(_translate("MainWindow", "Quit"))
         self.actionSynchronizeStreams.setText(_translate("MainWindow", "Synchronize streams"))
+        self.actionTimestampSynchronization.setText(_translate("MainWindow", "Timestamp synchronization (soft)"))
         self.actionScaleToFitFrame.setText(_translate("MainWindow", "Scale to fit frame"))
         self.actionFullScreen.setText(_translate("MainWindow", "Full Screen(&F)"))
 